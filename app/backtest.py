@@ -0,0 +1,158 @@
+# this is the "app/backtest.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import numpy as np
+import pandas as pd
+
+from app.frequencies import FREQUENCIES, RESAMPLE_RULES
+from app.manager import PORTFOLIO_OBJECTIVES, fetch_returns
+from app.optimizer import solve_portfolio
+from app.rolling import walk_forward_statistics
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def rebalance_dates(index, frequency):
+    '''
+        Purpose: The rebalance dates of a schedule: every date for 'daily', otherwise the first date and the last
+                 available date of every month ('monthly') or quarter ('quarterly').
+
+        Params: A pandas DatetimeIndex of trading dates and the 'frequency'.
+
+        Returns: A pandas DatetimeIndex.
+    '''
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Unknown rebalance frequency '{frequency}'.")
+
+    index = pd.DatetimeIndex(index)
+    if frequency not in RESAMPLE_RULES:
+        return index
+
+    period_ends = pd.Series(index, index = index).resample(RESAMPLE_RULES[frequency]).last().dropna()
+    return pd.DatetimeIndex(period_ends.values).union(index[:1])
+
+def weight_schedule(weights, index, frequency='monthly'):
+    '''
+        Purpose: Expands fixed target weights into a schedule that rebalances back to them at every rebalance date.
+
+        Params: The target 'weights' (a dictionary or pandas series keyed by ticker), the trading dates and the 'frequency'.
+
+        Returns: A pandas dataframe of weights indexed by rebalance date with one column per ticker.
+    '''
+    weights = pd.Series(weights, dtype = float)
+    dates = rebalance_dates(index, frequency)
+    return pd.DataFrame(np.tile(weights.values, (len(dates), 1)), index = dates, columns = weights.index)
+
+def backtest(price_data, schedule, initial_nav=1.0, cost=0.0):
+    '''
+        Purpose: Simulates a weight schedule over a price panel. At the close of each schedule date the portfolio is
+                 rebalanced to that row's weights and then drifts with prices until the next one. The simulation works on
+                 whole T x N arrays: holdings are kept as shares per unit of NAV, so each day's value is one row-wise dot
+                 product with the shares of its rebalance period and no Python loop runs over days or rebalances.
+
+                 Weight that is not invested (weights summing to less than one, or assets without a price yet) is held
+                 as cash earning nothing.
+
+        Params: A pandas dataframe of prices 'price_data', a dataframe 'schedule' of weights indexed by rebalance date
+                (dates between trading days take effect on the next trading day), the starting NAV and the transaction
+                'cost' charged per unit of NAV traded.
+
+        Returns: A dictionary with the daily 'nav', 'returns' and 'drawdown' (pandas series), the one-way 'turnover'
+                 at each rebalance date (pandas series), the 'max_drawdown' and the 'total_return'.
+    '''
+    dates = price_data.index
+    schedule = schedule.reindex(columns = price_data.columns, fill_value = 0.0).fillna(0.0)
+
+    #
+    # align each rebalance to the first trading day on or after it; a later row for the same day wins
+    #
+    positions = dates.searchsorted(schedule.index, side = 'left')
+    keep = positions < len(dates)
+    positions, weights = positions[keep], schedule.values[keep]
+    positions, last = np.unique(positions[::-1], return_index = True)
+    weights = weights[::-1][last]
+    if not len(positions):
+        raise ValueError("The weight schedule has no dates within the price history.")
+
+    prices = price_data.ffill().values.astype(float)
+    reference = prices[positions]
+    priced = np.isfinite(reference) & (reference > 0)
+
+    #
+    # shares held per unit of NAV in each rebalance period, and the cash left over
+    #
+    weights = np.where(priced, weights, 0.0)
+    shares = np.divide(weights, reference, out = np.zeros_like(weights), where = priced)
+    cash = 1 - weights.sum(axis = 1)
+    prices = np.nan_to_num(prices)
+    reference = np.nan_to_num(reference)
+
+    #
+    # growth of each period up to the next rebalance, and the drifted weights just before it
+    #
+    period_growth = np.einsum('kn,kn->k', reference[1:], shares[:-1]) + cash[:-1]
+    drifted = reference[1:] * shares[:-1] / period_growth[:, None]
+    drifted_cash = cash[:-1] / period_growth
+
+    previous = np.vstack([np.zeros((1, weights.shape[1])), drifted])
+    previous_cash = np.concatenate([[1.0], drifted_cash])
+    traded = np.abs(weights - previous).sum(axis = 1)
+    turnover = (traded + np.abs(cash - previous_cash)) / 2
+
+    #
+    # NAV right after each rebalance: the previous period's growth, less the cost of trading
+    #
+    nav_at_rebalance = initial_nav * np.cumprod(np.concatenate([[1.0], period_growth]) * (1 - cost * traded))
+
+    period = np.searchsorted(positions, np.arange(len(dates)), side = 'right') - 1
+    invested = period >= 0
+    current = np.clip(period, 0, None)
+    value = np.einsum('tn,tn->t', prices, shares[current]) + cash[current]
+    nav = np.where(invested, nav_at_rebalance[current] * value, initial_nav)
+
+    nav = pd.Series(nav, index = dates, name = 'nav')
+    drawdown = nav / nav.cummax() - 1
+
+    return {
+        'nav': nav,
+        'returns': nav.pct_change().fillna(0.0).rename('returns'),
+        'drawdown': drawdown.rename('drawdown'),
+        'turnover': pd.Series(turnover, index = dates[positions], name = 'turnover'),
+        'max_drawdown': float(drawdown.min()),
+        'total_return': float(nav.iloc[-1] / initial_nav - 1),
+    }
+
+def integrative_schedule(price_data, portfolioSelection, rf, frequency='monthly', window=None, halflife=None, min_history=60):
+    '''
+        Purpose: Walk-forward weights of an integrative portfolio (a key of PORTFOLIO_OBJECTIVES): at every
+                 rebalance date the portfolio is re-optimized using only the daily returns known on that date.
+
+        Params: A pandas dataframe of prices, the 'portfolioSelection', the risk-free rate 'rf', the rebalance 'frequency',
+                an optional rolling 'window' or exponential 'halflife' (app/rolling.py) and the minimum number of
+                return observations before the first rebalance.
+
+        Returns: A pandas dataframe of weights indexed by rebalance date, usable with backtest.
+    '''
+    objective = PORTFOLIO_OBJECTIVES[portfolioSelection]
+    rets = fetch_returns(price_data)
+    dates = rebalance_dates(rets.index, frequency)
+    dates = dates[dates >= rets.index[min(min_history, len(rets) - 1)]]
+
+    rows = {}
+    for date, mu, VarCov in walk_forward_statistics(rets, dates, window = window, halflife = halflife):
+        #
+        # the minimum CVaR construction uses the return scenarios known on the date (the same rolling window)
+        #
+        scenarios = None
+        if objective == 'minimum_cvar':
+            history = rets.loc[:date].iloc[1:]
+            scenarios = (history.tail(window) if window else history).dropna().values
+        rows[date] = solve_portfolio(objective, mu.values, VarCov.values, rf, scenarios = scenarios)['x']
+
+    return pd.DataFrame.from_dict(rows, orient = 'index', columns = rets.columns)
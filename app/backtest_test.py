@@ -0,0 +1,48 @@
+# import some code we want to test
+
+import numpy as np
+
+from app.backtest import backtest, integrative_schedule, rebalance_dates, weight_schedule
+from app.benchmarks import synthetic_prices
+
+def simulate(price_data, schedule, cost):
+    #
+    # a day-by-day reference simulation
+    #
+    nav, holdings, cash, navs = 1.0, None, 1.0, []
+    for date, prices in price_data.iterrows():
+        if holdings is not None:
+            nav = float((holdings * prices).sum()) + cash
+        if date in schedule.index:
+            target = schedule.loc[date].reindex(price_data.columns, fill_value = 0.0)
+            current = holdings * prices / nav if holdings is not None else 0 * target
+            nav *= 1 - cost * float((target - current).abs().sum())
+            holdings, cash = target * nav / prices, nav * (1 - target.sum())
+        navs.append(nav)
+    return np.array(navs)
+
+def test_backtest_matches_daily_simulation():
+    price_data = synthetic_prices(4, 1, seed = 3)
+    schedule = weight_schedule({"SYN0000": 0.5, "SYN0002": 0.3}, price_data.index, 'monthly')
+    schedule.iloc[5] = [0.25, 0.25]
+
+    result = backtest(price_data, schedule, cost = 0.001)
+
+    assert np.allclose(result['nav'].values, simulate(price_data, schedule, 0.001))
+    assert np.isclose(result['turnover'].iloc[0], 0.8)
+    assert len(result['turnover']) == 13
+    assert result['max_drawdown'] == result['drawdown'].min() <= 0
+
+def test_rebalance_dates_and_walk_forward_schedule():
+    price_data = synthetic_prices(5, 2, seed = 4)
+    quarterly = rebalance_dates(price_data.index, 'quarterly')
+    assert len(quarterly) == 9
+    assert quarterly[0] == price_data.index[0] and quarterly[-1] == price_data.index[-1]
+    assert len(rebalance_dates(price_data.index, 'daily')) == len(price_data)
+
+    schedule = integrative_schedule(price_data, '1', 0.01, 'quarterly', window = 126)
+    assert schedule.index[0] >= price_data.index[60]
+    assert np.allclose(schedule.sum(axis = 1), 1)
+
+    result = backtest(price_data, schedule)
+    assert np.allclose(result['nav'].loc[:schedule.index[0]], 1.0)
@@ -0,0 +1,441 @@
+# this is the "app/batch.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from app.holdings import initial_guess, read_holdings
+from app.instrumentation import instrumented
+from app.frequencies import FREQUENCIES
+from app.manager import (APPROACHES, RISK_TOLERANCES, PORTFOLIO_OBJECTIVES, stock_data_retrieval,
+                         integrative_analysis, speculative_analysis, holistic_analysis)
+from app.constraints import PortfolioConstraints
+from app.optimizer import SCENARIO_CONSTRUCTIONS, construction_key
+from app.parallel import optimize_portfolios
+from app.panels import ReturnPanels
+from app.providers import default_fetcher
+from app.result_cache import ResultCache, cacheable, default_result_cache
+from app.risk_free import RiskFreeService, default_risk_free
+from app.stats_cache import default_statistics_cache
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def normalize_choice(value, choices, name):
+    '''
+        Purpose: Maps a user entry (e.g. 'int', 'a', 'm') onto its canonical menu choice.
+
+        Params: The entered 'value', a dictionary of canonical choices to accepted aliases and the field 'name' for errors.
+
+        Returns: The canonical choice. Raises ValueError for unknown entries.
+    '''
+    value = str(value).strip().lower()
+    for choice, aliases in choices.items():
+        if value in aliases:
+            return choice
+
+    raise ValueError(f"invalid {name} '{value}'")
+
+def split_tickers(value):
+    '''
+        Purpose: Parses a ticker list written as 'AAPL MSFT', 'AAPL;MSFT', 'AAPL|MSFT' or a JSON list.
+
+        Params: A string or list of stock symbols.
+
+        Returns: A list of upper-case stock symbols without duplicates.
+    '''
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+
+    if isinstance(value, str):
+        value = value.replace(";", " ").replace("|", " ").replace(",", " ").split()
+
+    return list(dict.fromkeys(str(symbol).strip().upper() for symbol in value if str(symbol).strip()))
+
+#
+# the optional portfolio limits of an integrative request (see app/constraints.py) and how each is parsed
+#
+CONSTRAINT_FIELDS = {'max_holdings': int, 'min_weight': float, 'max_weight': float, 'max_turnover': float,
+                     'sector_caps': json.loads}
+
+def request_limits(clientRequest):
+    '''
+        Purpose: The portfolio limits given in a client request. CSV fields arrive as strings: numbers are parsed and
+                 'sector_caps' is either one cap for every sector or a JSON object of sector to cap.
+
+        Params: A client request dictionary.
+
+        Returns: A dictionary of the limits that are set (empty when there are none).
+    '''
+    limits = {}
+    for name, parse in CONSTRAINT_FIELDS.items():
+        value = clientRequest.get(name)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        if isinstance(value, str):
+            try:
+                value = parse(value)
+            except ValueError:
+                raise ValueError(f"invalid {name.replace('_', ' ')} '{value}'")
+        limits[name] = value
+    return limits
+
+def normalize_request(clientRequest):
+    '''
+        Purpose: Validates one client request and fills in defaults.
+
+        Params: A dictionary with 'client_id', 'tickers', 'approach' and optionally 'risk_tolerance',
+                'frequency', 'portfolio' ('1' to '5'), 'candidates' (for the holistic approach) and 'initial_weights'
+                (the current weights by ticker, where the integrative optimization starts), the portfolio limits of
+                CONSTRAINT_FIELDS and the 'sectors' of the tickers (a dictionary, or a JSON object in a CSV file).
+
+        Returns: A normalized copy of the request.
+    '''
+    frequencies = {name: aliases for name, (aliases, timing) in FREQUENCIES.items()}
+
+    request = {
+        'client_id': str(clientRequest.get('client_id', '')),
+        'tickers': split_tickers(clientRequest.get('tickers')),
+        'approach': normalize_choice(clientRequest.get('approach', ''), APPROACHES, 'approach'),
+        'risk_tolerance': normalize_choice(clientRequest.get('risk_tolerance') or 'moderate', RISK_TOLERANCES, 'risk tolerance'),
+        'frequency': normalize_choice(clientRequest.get('frequency') or 'daily', frequencies, 'frequency'),
+        'portfolio': str(clientRequest.get('portfolio') or '1').strip(),
+        'candidates': split_tickers(clientRequest.get('candidates')),
+        'initial_weights': clientRequest.get('initial_weights') or None,
+        'sectors': clientRequest.get('sectors') or None,
+        'limits': request_limits(clientRequest),
+    }
+
+    for field in ('initial_weights', 'sectors'):
+        if isinstance(request[field], str):
+            request[field] = json.loads(request[field])
+
+    if request['portfolio'].endswith('.0'):
+        request['portfolio'] = request['portfolio'][:-2]
+    if request['portfolio'] not in PORTFOLIO_OBJECTIVES:
+        raise ValueError(f"invalid portfolio selection '{request['portfolio']}'")
+    if not request['tickers']:
+        raise ValueError("no tickers provided")
+    if request['approach'] == 'holistic' and not request['candidates']:
+        raise ValueError("the holistic approach needs at least one candidate stock")
+
+    return request
+
+def load_client_requests(filePath):
+    '''
+        Purpose: Reads a file of client requests. CSV files need a header row with the request fields;
+                 '.json' / '.jsonl' files hold one JSON request per line (or a single JSON list).
+
+        Params: A string containing the path to the request file.
+
+        Returns: A list of request dictionaries.
+    '''
+    if filePath.endswith(".json") or filePath.endswith(".jsonl"):
+        with open(filePath) as handle:
+            text = handle.read().strip()
+        if text.startswith("["):
+            return json.loads(text)
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    requests = pd.read_csv(filePath, dtype = str, keep_default_na = False)
+    return requests.to_dict(orient = 'records')
+
+def run_request(request, statistics_for, rf, opt_mve = None, result_cache = None):
+    '''
+        Purpose: Runs the analysis of a single normalized client request on shared, precomputed returns.
+
+        Params: A normalized request, a function returning the UniverseStatistics for a frequency, the risk-free rate 'rf'
+                optionally the already solved integrative construction 'opt_mve' and an optional ResultCache of solved
+                constructions (app/result_cache.py).
+
+        Returns: A dictionary with the analysis results.
+    '''
+    frequency = request['frequency']
+    timing = FREQUENCIES[frequency][1]
+    statistics = statistics_for(frequency)
+    universe_rets = statistics.rets
+
+    tickers = [ticker for ticker in request['tickers'] if ticker in universe_rets.columns]
+    candidates = [ticker for ticker in request['candidates'] if ticker in universe_rets.columns]
+    invalid = [ticker for ticker in request['tickers'] + request['candidates'] if ticker not in universe_rets.columns]
+
+    result = {'client_id': request['client_id'], 'approach': request['approach'], 'frequency': frequency}
+    if invalid:
+        result['invalid_tickers'] = invalid
+    if not tickers:
+        raise ValueError("none of the tickers have price data")
+
+    rets = universe_rets[tickers]
+
+    if request['approach'] == 'integrative':
+        result['portfolio'] = request['portfolio']
+        constraints = None
+        if request['limits']:
+            constraints = PortfolioConstraints.for_tickers(tickers, request['sectors'], request['initial_weights'], **request['limits'])
+        result.update(integrative_analysis(rets, timing, rf, request['portfolio'], statistics, opt_mve,
+                                           initial_guess = initial_guess(request['initial_weights'], tickers),
+                                           constraints = constraints, result_cache = result_cache))
+
+    elif request['approach'] == 'speculative':
+        result['risk_tolerance'] = request['risk_tolerance']
+        recommendations = speculative_analysis(rets, request['risk_tolerance'], timing, statistics)
+        result['recommendations'] = recommendations.reset_index().to_dict(orient = 'records')
+
+    else:
+        sharpeRatio, impact = holistic_analysis(rets, universe_rets[candidates], rf, timing, statistics)
+        result['sharpe_ratio'] = round(sharpeRatio, 2)
+        result['candidates'] = {candidate: {column: (bool(value) if column == 'improves' else float(value))
+                                            for column, value in scores.items()}
+                                for candidate, scores in impact.to_dict(orient = 'index').items()}
+
+    return result
+
+def solve_integrative_requests(requests, statistics_for, rf_for, workers, result_cache = None):
+    '''
+        Purpose: Solves the portfolio constructions of all integrative requests on a process pool, one pool run per frequency.
+
+        Params: The normalized requests, a function returning the UniverseStatistics for a frequency, a function
+                returning the risk-free rate for a frequency, the number of worker processes and an optional
+                ResultCache: constructions found in it are not sent to the pool, and the pool's solutions are added
+                to it.
+
+        Returns: A dictionary of request position to its OptimizeResult.
+    '''
+    by_frequency = {}
+    for position, request in enumerate(requests):
+        if request.get('approach') == 'integrative':
+            by_frequency.setdefault(request['frequency'], []).append(position)
+
+    solutions = {}
+    for frequency, positions in by_frequency.items():
+        statistics = statistics_for(frequency)
+
+        rf = rf_for(frequency)
+        tasks = []
+        solved = []
+        keys = []
+        for position in positions:
+            tickers = [ticker for ticker in requests[position]['tickers'] if ticker in statistics.tickers]
+            #
+            # scenario-based constructions (minimum CVaR) need the returns themselves and constrained requests their
+            # own limits; both are solved by run_request
+            #
+            objective = PORTFOLIO_OBJECTIVES[requests[position]['portfolio']]
+            if not tickers or objective in SCENARIO_CONSTRUCTIONS or requests[position]['limits']:
+                continue
+
+            #
+            # the account's current weights warm start the solver exactly as in run_request
+            #
+            guess = initial_guess(requests[position]['initial_weights'], tickers)
+            if result_cache is not None:
+                mu, VarCov = statistics.subset(tickers)
+                key = construction_key(objective, mu.values, VarCov.values, rf, initial_guess = guess)
+                cached = result_cache.get(key)
+                if cached is not None:
+                    solutions[position] = cached
+                    continue
+                keys.append(key)
+
+            tasks.append((objective, tickers, rf, guess))
+            solved.append(position)
+
+        if not tasks:
+            continue
+
+        results = optimize_portfolios(tasks, statistics.mu, statistics.VarCov, rf, max_workers = workers)
+        solutions.update(zip(solved, results))
+
+        for key, result in zip(keys, results):
+            if cacheable(result):
+                result_cache.put(key, result)
+
+    return solutions
+
+def run_batch(clientRequests, start = "2016-01-01", end = "2018-12-31", cache = None, rf = None, statistics_cache = None,
+              workers = 1, result_cache = None, risk_free = None):
+    '''
+        Purpose: Runs the integrative, speculative and holistic analyses for many clients in one pass.
+                 Prices for the union of all tickers are retrieved once, and the universe returns, 'mu' and 'VarCov'
+                 are computed once per frequency; every client's statistics are slices of them.
+
+        Params: A list of client request dictionaries, the 'start' / 'end' dates of the price window, an optional
+                PriceCache, an optional risk-free rate 'rf' (by default the ^IRX yield read through the same cache and
+                averaged over the dates of each frequency's returns, as in the interactive program) and an optional
+                StatisticsCache (defaults to the cache shared within the process). With 'workers' > 1 the integrative
+                constructions are solved concurrently on a process pool (app/parallel.py). Constructions are looked up
+                in, and added to, an optional ResultCache (defaults to the cache shared within the process), so clients
+                holding the same model portfolio share one solve, in process or on the pool. A long-lived caller can
+                pass its own RiskFreeService (app/risk_free.py) as 'risk_free', so the yields stay loaded between batches.
+
+        Returns: A list of result dictionaries in the same order as the requests. Requests that fail carry an 'error'.
+    '''
+    requests = []
+    for clientRequest in clientRequests:
+        try:
+            requests.append(normalize_request(clientRequest))
+        except ValueError as error:
+            requests.append({'client_id': str(clientRequest.get('client_id', '')), 'error': str(error)})
+
+    valid = [request for request in requests if 'error' not in request]
+
+    universe = []
+    for request in valid:
+        universe.extend(request['tickers'] + request['candidates'])
+    universe = list(dict.fromkeys(universe))
+
+    #
+    # the risk-free rate downloads concurrently with the universe prices
+    #
+    if rf is not None or all(request['approach'] == 'speculative' for request in valid):
+        risk_free = None
+    else:
+        if risk_free is None:
+            risk_free = RiskFreeService(cache) if cache is not None else default_risk_free()
+        rf_future = default_fetcher().submit(risk_free.series, start, end)
+
+    #
+    # the universe prices are loaded into one float32 PricePanel and the returns computed on its array, so
+    # universe-scale batches hold half the memory of a float64 dataframe and no intermediate price frames
+    #
+    price_data = stock_data_retrieval(universe, start, end, cache, panel = True) if universe else pd.DataFrame()
+
+    if risk_free is not None:
+        rf_future.result()
+
+    if statistics_cache is None:
+        statistics_cache = default_statistics_cache
+
+    if result_cache is None:
+        result_cache = default_result_cache
+
+    #
+    # the return panels of every requested frequency are computed once per price load and the prices hashed once;
+    # each frequency is then looked up once per batch, so a client's cost does not depend on the length of the history
+    #
+    panels = ReturnPanels(price_data, {request['frequency'] for request in valid})
+    statistics = {}
+    def statistics_for(frequency):
+        if frequency not in statistics:
+            statistics[frequency] = statistics_cache.get(panels, frequency)
+        return statistics[frequency]
+
+    rates = {}
+    def rf_for(frequency):
+        if rf is not None:
+            return rf
+        if frequency not in rates:
+            statistics = statistics_for(frequency)
+            rates[frequency] = risk_free.annualized(statistics.rets.dropna(how = 'all').index, statistics.timing)
+        return rates[frequency]
+
+    solutions = {}
+    if workers > 1:
+        solutions = solve_integrative_requests(requests, statistics_for, rf_for, workers, result_cache)
+
+    results = []
+    for position, request in enumerate(requests):
+        if 'error' in request:
+            results.append(request)
+            continue
+
+        try:
+            requestRf = None if request['approach'] == 'speculative' else rf_for(request['frequency'])
+            results.append(run_request(request, statistics_for, requestRf, solutions.get(position), result_cache))
+        except (ValueError, KeyError, ZeroDivisionError, FloatingPointError) as error:
+            results.append({'client_id': request['client_id'], 'error': str(error)})
+
+    return results
+
+def write_results(results, filePath):
+    '''
+        Purpose: Writes batch results as JSON lines, one client per line.
+
+        Params: The list of result dictionaries and the output path.
+    '''
+    with open(filePath, "w") as handle:
+        for result in results:
+            handle.write(json.dumps(result) + "\n")
+
+def main(argv = None):
+    '''
+        Purpose: Command-line entry point: python -m app.batch requests.csv --output results.jsonl
+                 or, for one integrative request per account of a holdings file: python -m app.batch --holdings holdings.csv
+
+        Params: An optional list of command-line arguments.
+    '''
+    parser = argparse.ArgumentParser(description = "Run portfolio analyses for a file of client requests.")
+    parser.add_argument("requests", nargs = "?", help = "CSV or JSON lines file of client requests")
+    parser.add_argument("--holdings", help = "holdings CSV (accounts, tickers, quantities or weights) to rebalance per account")
+    parser.add_argument("--portfolio", default = "1", help = "portfolio construction for --holdings ('1' to '5')")
+    parser.add_argument("--output", "-o", help = "where to write the JSON lines results (default: print them)")
+    parser.add_argument("--start", default = "2016-01-01", help = "first date of the price window")
+    parser.add_argument("--end", default = "2018-12-31", help = "end date of the price window (exclusive)")
+    parser.add_argument("--rf", type = float, help = "risk-free rate to use instead of downloading ^IRX")
+    parser.add_argument("--workers", type = int, default = 1, help = "worker processes for the portfolio optimizations")
+    parser.add_argument("--max-holdings", type = int, help = "most positions an integrative portfolio may hold")
+    parser.add_argument("--min-weight", type = float, help = "smallest weight of a position held (e.g. 0.02)")
+    parser.add_argument("--max-weight", type = float, help = "largest weight of any position")
+    parser.add_argument("--sector-cap", type = float, help = "largest total weight of any one sector")
+    parser.add_argument("--max-turnover", type = float, help = "largest one-way turnover from the current weights")
+    parser.add_argument("--result-cache", help = "directory of solved constructions reused across runs")
+    parser.add_argument("--trace", help = "write a JSON timing trace of the run's stages to this file")
+    parser.add_argument("--profile", help = "write cProfile statistics of the run to this file")
+    args = parser.parse_args(argv)
+
+    if args.trace or args.profile:
+        with instrumented(args.trace, args.profile):
+            return run(args, parser)
+    return run(args, parser)
+
+def run(args, parser):
+    '''
+        Purpose: Runs the batch described by the parsed command line arguments of main.
+    '''
+
+    if args.holdings:
+        #
+        # quantities are valued at the last price of the window, which the price cache then reuses for the batch
+        #
+        holdings = read_holdings(args.holdings)
+        price_data = stock_data_retrieval(holdings.tickers(), args.start, args.end)
+        clientRequests = holdings.requests(portfolio = args.portfolio, price_data = price_data)
+    elif args.requests:
+        clientRequests = load_client_requests(args.requests)
+    else:
+        parser.error("provide a requests file or --holdings")
+
+    #
+    # portfolio limits given on the command line apply to every request that does not set its own
+    #
+    limits = {'max_holdings': args.max_holdings, 'min_weight': args.min_weight, 'max_weight': args.max_weight,
+              'sector_caps': args.sector_cap, 'max_turnover': args.max_turnover}
+    for clientRequest in clientRequests:
+        for name, value in limits.items():
+            if value is not None and clientRequest.get(name) in (None, ""):
+                clientRequest[name] = value
+
+    result_cache = ResultCache(cache_dir = args.result_cache) if args.result_cache else None
+    results = run_batch(clientRequests, start = args.start, end = args.end, rf = args.rf, workers = args.workers,
+                        result_cache = result_cache)
+
+    if args.output:
+        write_results(results, args.output)
+        failed = sum('error' in result for result in results)
+        print(f"Processed {len(results)} client requests ({failed} failed). Results written to {os.path.abspath(args.output)}")
+    else:
+        for result in results:
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# import some code we want to test
+
+import numpy as np
+import pandas as pd
+
+from app.batch import load_client_requests, run_batch
+from app.price_cache import PriceCache
+from app.result_cache import ResultCache
+
+def fake_prices(tickers, start, end):
+    dates = pd.bdate_range(start, end, inclusive = "left")
+    rng = np.random.default_rng(len(tickers))
+    steps = rng.normal(0.0004, 0.01, size = (len(dates), len(tickers)))
+    return pd.DataFrame(100 * np.exp(np.cumsum(steps, axis = 0)), index = dates, columns = tickers)
+
+def test_load_client_requests():
+    requests = load_client_requests('test/MockData/mock_client_requests.csv')
+
+    assert len(requests) == 4
+    assert requests[0]['tickers'] == 'AAPL MSFT NFLX'
+
+def test_run_batch_fetches_shared_universe_once(tmp_path):
+    calls = []
+    def downloader(tickers, start, end):
+        calls.append(tickers)
+        return fake_prices(tickers, start, end)
+
+    cache = PriceCache(cache_dir = str(tmp_path), downloader = downloader)
+    requests = load_client_requests('test/MockData/mock_client_requests.csv')
+    requests.append({'client_id': '1005', 'tickers': 'AAPL', 'approach': 'unknown'})
+
+    results = run_batch(requests, cache = cache, rf = 0.01)
+
+    assert calls == [['AAPL', 'MSFT', 'NFLX', 'FB', 'PYPL']]
+    assert [result['client_id'] for result in results] == ['1001', '1002', '1003', '1004', '1005']
+    assert np.isclose(sum(results[0]['weights'].values()), 1)
+    assert results[1]['method'] == 'qp'
+    assert [rec['ticker'] for rec in results[2]['recommendations']] == ['MSFT', 'NFLX']
+    assert set(results[3]['candidates']) == {'PYPL', 'MSFT'}
+    assert 'error' in results[4]
+
+def test_run_batch_with_process_pool_matches_serial(tmp_path):
+    cache = PriceCache(cache_dir = str(tmp_path), downloader = fake_prices)
+    requests = load_client_requests('test/MockData/mock_client_requests.csv')
+
+    serial = run_batch(requests, cache = cache, rf = 0.01, result_cache = ResultCache())
+    pooled = run_batch(requests, cache = cache, rf = 0.01, workers = 2, result_cache = ResultCache())
+
+    for first, second in zip(serial[:2], pooled[:2]):
+        assert first['weights'].keys() == second['weights'].keys()
+        assert np.allclose(list(first['weights'].values()), list(second['weights'].values()))
+
+    #
+    # the accounts' current weights warm start the pooled solves as well
+    #
+    current = '{"AAPL": 0.7, "MSFT": 0.1, "NFLX": 0.1, "FB": 0.1}'
+    requests = [{'client_id': str(number), 'tickers': 'AAPL MSFT NFLX FB PYPL', 'approach': 'integrative',
+                 'portfolio': portfolio, 'initial_weights': current} for number, portfolio in enumerate('1234')]
+
+    serial = run_batch(requests, cache = cache, rf = 0.01, result_cache = ResultCache())
+    pooled = run_batch(requests, cache = cache, rf = 0.01, workers = 2, result_cache = ResultCache())
+
+    assert [result['method'] for result in pooled] == ['qp', 'qp', 'lbfgs', 'qp']
+    for first, second in zip(serial, pooled):
+        assert first['method'] == second['method']
+        assert np.allclose(list(first['weights'].values()), list(second['weights'].values()), atol = 1e-8)
+
+def test_run_batch_applies_portfolio_limits(tmp_path):
+    cache = PriceCache(cache_dir = str(tmp_path), downloader = fake_prices)
+    requests = [{'client_id': '2001', 'tickers': 'AAPL MSFT NFLX FB PYPL', 'approach': 'integrative', 'portfolio': '1',
+                 'max_holdings': '3', 'min_weight': '0.1',
+                 'sectors': '{"AAPL": "TECH", "MSFT": "TECH", "FB": "TECH", "NFLX": "MEDIA", "PYPL": "FINANCE"}',
+                 'sector_caps': '{"TECH": 0.5}'}]
+
+    result = run_batch(requests, cache = cache, rf = 0.01)[0]
+
+    held = {ticker: weight for ticker, weight in result['weights'].items() if weight > 0}
+    assert result['method'] == 'constrained'
+    assert len(held) <= 3 and min(held.values()) >= 0.1 - 1e-6
+    assert sum(held.get(ticker, 0) for ticker in ['AAPL', 'MSFT', 'FB']) <= 0.5 + 1e-6
@@ -0,0 +1,215 @@
+# this is the "app/benchmarks.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import argparse
+import gc
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.covariance import pca_factor_model
+from app.holistic import candidate_impact
+from app.manager import fetch_returns
+from app.optimizer import solve_portfolio
+from app.price_cache import PriceCache
+
+#
+# the default grid: universe sizes (tickers) and history lengths (years of daily data)
+#
+DEFAULT_TICKERS = [10, 100, 500, 2000]
+DEFAULT_YEARS = [1, 5, 20]
+
+#
+# the entry points whose import time is measured by --startup, and the heavy dependencies they should not load
+#
+STARTUP_MODULES = ['app.manager', 'app.batch', 'app.parallel']
+HEAVY_MODULES = ['matplotlib', 'scipy', 'yfinance', 'pandas']
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def synthetic_prices(numOfTickers, years, seed=0):
+    '''
+        Purpose: Generates a reproducible panel of daily prices with a common market factor, so covariance
+                 matrices have realistic structure. No network access is needed.
+
+        Params: The number of tickers, the number of years of daily data and the random 'seed'.
+
+        Returns: A pandas dataframe of prices indexed by business day with one column per ticker.
+    '''
+    rng = np.random.default_rng(seed)
+    numOfDays = 252 * years
+    market = rng.normal(0.0003, 0.009, size = (numOfDays, 1))
+    betas = rng.uniform(0.5, 1.5, size = (1, numOfTickers))
+    drift = rng.normal(0.0002, 0.0002, size = (1, numOfTickers))
+    rets = drift + market * betas + rng.normal(0, 0.012, size = (numOfDays, numOfTickers))
+
+    dates = pd.bdate_range("2000-01-03", periods = numOfDays)
+    tickers = [f"SYN{number:04d}" for number in range(numOfTickers)]
+    return pd.DataFrame(100 * np.exp(np.cumsum(rets, axis = 0)), index = dates, columns = tickers)
+
+def measure(function, repeat=3):
+    '''
+        Purpose: Times a function (best of 'repeat' runs) and records its peak traced memory in a separate run,
+                 so the tracing overhead does not distort the timing.
+
+        Params: A function taking no arguments and the number of timed runs.
+
+        Returns: A tuple of the best wall time in seconds and the peak memory in bytes.
+    '''
+    best = np.inf
+    for run in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+def benchmark_case(numOfTickers, years, repeat=3, max_optimize_tickers=500, seed=0):
+    '''
+        Purpose: Benchmarks the pipeline stages on one synthetic universe: loading prices from the on-disk cache,
+                 returns, covariance, the minimum risk and maximum Sharpe optimizations and the holistic correlation step.
+                 The PCA factor model and the minimum risk optimization on it run for every universe size.
+
+        Params: The number of tickers, the years of daily data, the number of timed runs, the largest universe to
+                optimize (larger ones skip the optimization stages) and the random 'seed'.
+
+        Returns: A list of result dictionaries, one per stage.
+    '''
+    price_data = synthetic_prices(numOfTickers, years, seed)
+    rets = fetch_returns(price_data)
+    mu = (rets.mean() * 252).values
+    VarCov = (rets.cov() * 252).values
+
+    #
+    # the holistic step scores every ticker outside a 10-stock portfolio as a candidate
+    #
+    holdings = rets.columns[:min(10, numOfTickers)]
+    candidates = rets.columns[len(holdings):] if numOfTickers > len(holdings) else rets.columns[:1]
+
+    #
+    # the price cache is filled from the synthetic panel instead of the network
+    #
+    cache_dir = tempfile.TemporaryDirectory()
+    start, end = price_data.index[0], price_data.index[-1] + pd.Timedelta(days = 1)
+    cache = PriceCache(cache_dir = cache_dir.name, downloader = lambda tickers, *window: price_data[tickers])
+    cache.get(list(price_data.columns), start, end)
+
+    stages = {
+        'load_prices': lambda: cache.get(list(price_data.columns), start, end),
+        'fetch_returns': lambda: fetch_returns(price_data),
+        'covariance': lambda: rets.cov() * 252,
+        'holistic_correlation': lambda: candidate_impact(rets[holdings], rets[candidates], 0.01),
+    }
+    factor_VarCov = pca_factor_model(rets, 252)
+    stages['factor_model'] = lambda: pca_factor_model(rets, 252)
+    stages['factor_minimum_risk'] = lambda: solve_portfolio('minimum_risk', mu, factor_VarCov, 0.01)
+    if numOfTickers <= max_optimize_tickers:
+        stages['minimum_risk'] = lambda: solve_portfolio('minimum_risk', mu, VarCov, 0.01)
+        stages['negative_sharpe'] = lambda: solve_portfolio('negative_sharpe', mu, VarCov, 0.01)
+
+    results = []
+    for stage, function in stages.items():
+        seconds, peak = measure(function, repeat)
+        results.append({'stage': stage, 'tickers': numOfTickers, 'years': years, 'seconds': seconds,
+                        'peak_mb': peak / 2**20})
+
+    cache_dir.cleanup()
+
+    return results
+
+def run_benchmarks(tickers=DEFAULT_TICKERS, years=DEFAULT_YEARS, repeat=3, max_optimize_tickers=500, seed=0):
+    '''
+        Purpose: Runs benchmark_case over the grid of universe sizes and history lengths.
+
+        Params: Lists of ticker counts and years, the number of timed runs, the largest universe to optimize and the seed.
+
+        Returns: A pandas dataframe with one row per (stage, tickers, years).
+    '''
+    results = []
+    for numOfTickers in tickers:
+        for numOfYears in years:
+            results.extend(benchmark_case(numOfTickers, numOfYears, repeat, max_optimize_tickers, seed))
+
+    return pd.DataFrame(results)
+
+def startup_time(module, repeat=3):
+    '''
+        Purpose: Measures how long a fresh Python process takes to import a module (best of 'repeat' runs) and which
+                 of the HEAVY_MODULES the import loads.
+
+        Params: The module name (e.g. 'app.manager') and the number of runs.
+
+        Returns: A dictionary with the 'module', its import 'seconds' and the list of 'heavy_modules' loaded.
+    '''
+    script = ("import json, sys, time\n"
+              "started = time.perf_counter()\n"
+              f"import {module}\n"
+              "seconds = time.perf_counter() - started\n"
+              f"print(json.dumps({{'seconds': seconds, 'heavy_modules': [name for name in {HEAVY_MODULES!r} if name in sys.modules]}}))")
+
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", script], capture_output = True, text = True, check = True).stdout
+        runs.append(json.loads(output))
+
+    best = min(runs, key = lambda run: run['seconds'])
+    return {'module': module, 'seconds': best['seconds'], 'heavy_modules': best['heavy_modules']}
+
+def main(argv=None):
+    '''
+        Purpose: Command-line entry point: python -m app.benchmarks [--tickers 10 100] [--years 1 5] [--output results.json]
+
+        Params: An optional list of command-line arguments.
+    '''
+    parser = argparse.ArgumentParser(description = "Benchmark data loading, returns, covariance and optimization offline.")
+    parser.add_argument("--tickers", type = int, nargs = "+", default = DEFAULT_TICKERS, help = "universe sizes")
+    parser.add_argument("--years", type = int, nargs = "+", default = DEFAULT_YEARS, help = "years of daily data")
+    parser.add_argument("--repeat", type = int, default = 3, help = "timed runs per stage (the best is reported)")
+    parser.add_argument("--max-optimize-tickers", type = int, default = 500, help = "skip optimizing larger universes")
+    parser.add_argument("--seed", type = int, default = 0, help = "random seed of the synthetic prices")
+    parser.add_argument("--output", help = "write the results as JSON to this path")
+    parser.add_argument("--startup", action = "store_true", help = "only measure the import time of the entry points")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        results = pd.DataFrame([startup_time(module, args.repeat) for module in STARTUP_MODULES])
+        print(results.to_string(index = False, float_format = lambda value: f"{value:.4f}"))
+        if args.output:
+            with open(args.output, "w") as handle:
+                json.dump(results.to_dict(orient = 'records'), handle, indent = 2)
+        return
+
+    results = run_benchmarks(args.tickers, args.years, args.repeat, args.max_optimize_tickers, args.seed)
+
+    with pd.option_context('display.max_rows', None, 'display.width', 120):
+        print(results.to_string(index = False, float_format = lambda value: f"{value:.4f}"))
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results.to_dict(orient = 'records'), handle, indent = 2)
+
+
+if __name__ == "__main__":
+    main()
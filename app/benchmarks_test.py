@@ -0,0 +1,22 @@
+# import some code we want to test
+
+from app.benchmarks import run_benchmarks, startup_time, synthetic_prices
+
+def test_synthetic_prices_are_reproducible():
+    first = synthetic_prices(5, 1, seed = 3)
+
+    assert first.shape == (252, 5)
+    assert first.equals(synthetic_prices(5, 1, seed = 3))
+
+def test_run_benchmarks_reports_every_stage():
+    results = run_benchmarks(tickers = [12], years = [1], repeat = 1)
+
+    assert set(results['stage']) == {'load_prices', 'fetch_returns', 'covariance', 'holistic_correlation',
+                                     'factor_model', 'factor_minimum_risk', 'minimum_risk', 'negative_sharpe'}
+    assert (results['seconds'] > 0).all() and (results['peak_mb'] >= 0).all()
+
+def test_manager_imports_without_heavy_dependencies():
+    result = startup_time('app.manager', repeat = 1)
+
+    assert result['heavy_modules'] == []
+    assert result['seconds'] > 0
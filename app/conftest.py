@@ -0,0 +1,60 @@
+# this is the "app/conftest.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import numpy as np
+import pandas as pd
+import pytest
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+class RandomUniverse:
+    '''
+        Purpose: Reproducible random inputs for the tests: daily returns of a universe of assets and their annualized
+                 'mu' and 'VarCov'.
+    '''
+
+    def returns(self, numOfAssets, seed=0, numOfDays=500, mean=0.0005, vol=0.01, numOfFactors=0, factor_vol=0.01,
+                drift=0.0, tickers=None):
+        '''
+            Purpose: Daily returns: independent noise of volatility 'vol', plus 'numOfFactors' common factors with
+                     random loadings of scale 'factor_vol', plus the 'mean' return (the same for every asset, or drawn
+                     per asset with a spread of 'drift').
+
+            Params: The number of assets, the random 'seed', the number of days and the options above. The columns
+                    are the 'tickers' (T0, T1, ... by default).
+
+            Returns: A pandas dataframe of returns indexed by business day from 2016-01-01.
+        '''
+        rng = np.random.default_rng(seed)
+
+        rets = np.zeros((numOfDays, numOfAssets))
+        if numOfFactors:
+            loadings = rng.normal(0, factor_vol, size = (numOfAssets, numOfFactors))
+            rets = rng.normal(size = (numOfDays, numOfFactors)) @ loadings.T
+        rets = rets + rng.normal(0, vol, size = (numOfDays, numOfAssets))
+        rets = rets + (rng.normal(mean, drift, size = numOfAssets) if drift else mean)
+
+        if tickers is None:
+            tickers = [f"T{number}" for number in range(numOfAssets)]
+        return pd.DataFrame(rets, index = pd.bdate_range("2016-01-01", periods = numOfDays), columns = tickers)
+
+    def statistics(self, numOfAssets, seed=0, timing=252, **options):
+        '''
+            Purpose: The annualized 'mu' and sample 'VarCov' of the returns above, as numpy arrays.
+
+            Params: The arguments of returns and the 'timing' used to annualize them.
+        '''
+        rets = self.returns(numOfAssets, seed, **options).values
+        return rets.mean(axis = 0) * timing, np.cov(rets, rowvar = False) * timing
+
+
+@pytest.fixture
+def random_universe():
+    return RandomUniverse()
@@ -0,0 +1,400 @@
+# this is the "app/constraints.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import numpy as np
+import pandas as pd
+
+from app.covariance import FactorCovariance
+from app.instrumentation import minimize, stage
+from app.optimizer import (minimum_risk_with_gradient, negative_sharpe_with_gradient, negative_diversification_ratio_with_gradient,
+                           asset_volatilities, conditional_value_at_risk, solve_portfolio)
+
+#
+# weights at or below this are treated as not held
+#
+WEIGHT_TOLERANCE = 1e-6
+
+#
+# the constrained problem of a large universe is solved over this many pre-screened candidates
+#
+SCREEN_SIZE = 150
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+class PortfolioConstraints:
+    '''
+        Purpose: Practical limits on a long-only portfolio, aligned to the optimizer's assets: the maximum number of
+                 holdings, a minimum size for every position held, a maximum weight per asset, caps on the total
+                 weight of each sector and a limit on the one-way turnover from the current weights.
+
+        Params: 'max_holdings' (or None), 'min_weight' and 'max_weight' of a held position, the sector label of every
+                asset ('sectors', or None), the 'sector_caps' (a dictionary of sector to cap, or one cap for every
+                sector), the 'current_weights' of every asset and the 'max_turnover' (one-way, sum |w - w0| / 2).
+    '''
+
+    def __init__(self, max_holdings=None, min_weight=0.0, max_weight=1.0, sectors=None, sector_caps=None,
+                 current_weights=None, max_turnover=None):
+        self.max_holdings = None if max_holdings is None else int(max_holdings)
+        self.min_weight = float(min_weight or 0.0)
+        self.max_weight = 1.0 if max_weight is None else float(max_weight)
+        self.sectors = None if sectors is None else np.asarray(sectors, dtype = object)
+        self.sector_caps = sector_caps
+        self.current_weights = None if current_weights is None else np.asarray(current_weights, dtype = float)
+        self.max_turnover = None if max_turnover is None else float(max_turnover)
+
+        if self.min_weight > self.max_weight:
+            raise ValueError("the minimum position size is above the maximum weight")
+        if self.max_turnover is not None and self.current_weights is None:
+            raise ValueError("a turnover limit needs the current weights")
+        if self.sector_caps is not None and self.sectors is None:
+            raise ValueError("sector caps need the sector of every asset")
+
+    @classmethod
+    def for_tickers(cls, tickers, sectors=None, current_weights=None, **limits):
+        '''
+            Purpose: Builds the constraints of a list of tickers from per-ticker sectors and current weights
+                     (e.g. Holdings.sectors() and an account's weights, see app/holdings.py).
+
+            Params: The optimizer's tickers, optional dictionaries (or pandas series) of sector and current weight by
+                    ticker and the limits of the constructor.
+
+            Returns: A PortfolioConstraints.
+        '''
+        tickers = list(tickers)
+        if sectors is not None:
+            sectors = pd.Series(sectors, dtype = object).reindex(tickers).fillna("UNKNOWN").values
+        if current_weights is not None:
+            current_weights = pd.Series(current_weights, dtype = float).reindex(tickers).fillna(0.0).clip(lower = 0.0).values
+            if current_weights.sum() > 0:
+                current_weights = current_weights / current_weights.sum()
+        return cls(sectors = sectors, current_weights = current_weights, **limits)
+
+    def is_active(self):
+        '''
+            Purpose: Whether any limit beyond long-only and fully invested is set.
+        '''
+        return (self.max_holdings is not None or self.min_weight > 0 or self.max_weight < 1.0
+                or self.sector_caps is not None or self.max_turnover is not None)
+
+    def caps(self, index):
+        '''
+            Purpose: The sector cap rows over a subset of the assets: a sparse sectors x assets membership matrix and
+                     the cap of each sector. Sectors without a cap are left out.
+
+            Params: The integer positions of the assets.
+
+            Returns: A tuple of a scipy sparse matrix and a numpy array of caps.
+        '''
+        import scipy.sparse as sp
+
+        if self.sector_caps is None:
+            return sp.csr_matrix((0, len(index))), np.empty(0)
+
+        labels = self.sectors[index]
+        if isinstance(self.sector_caps, dict):
+            capped = [sector for sector in dict.fromkeys(labels) if sector in self.sector_caps]
+            caps = np.array([self.sector_caps[sector] for sector in capped], dtype = float)
+        else:
+            capped = list(dict.fromkeys(labels))
+            caps = np.full(len(capped), float(self.sector_caps))
+
+        rows = {sector: row for row, sector in enumerate(capped)}
+        members = [(rows[label], column) for column, label in enumerate(labels) if label in rows]
+        matrix = sp.csr_matrix((np.ones(len(members)), ([row for row, _ in members], [column for _, column in members])),
+                               shape = (len(capped), len(index)))
+        return matrix, caps
+
+    def turnover(self, weights):
+        return 0.5 * float(np.abs(np.asarray(weights, dtype = float) - self.current_weights).sum())
+
+    def satisfied(self, weights, tol=1e-6):
+        '''
+            Purpose: Checks a vector of weights against every limit.
+
+            Params: The portfolio weights and the tolerance.
+
+            Returns: True when all the constraints hold.
+        '''
+        weights = np.asarray(weights, dtype = float)
+        held = weights > WEIGHT_TOLERANCE
+
+        if abs(weights.sum() - 1.0) > tol or np.any(weights < -tol) or np.any(weights > self.max_weight + tol):
+            return False
+        if self.max_holdings is not None and held.sum() > self.max_holdings:
+            return False
+        if np.any(weights[held] < self.min_weight - tol):
+            return False
+        matrix, caps = self.caps(np.arange(len(weights)))
+        if np.any(matrix @ weights > caps + tol):
+            return False
+        if self.max_turnover is not None and self.turnover(weights) > self.max_turnover + tol:
+            return False
+        return True
+
+
+def linear_system(constraints, index):
+    '''
+        Purpose: The sparse inequality rows G z <= h of the constrained problem over a subset of the assets. The
+                 variables z are the subset's weights, followed by one turnover variable t_i >= |w_i - w0_i| per asset
+                 when turnover is limited. Assets outside the subset are not held, so their current weights already
+                 count against the turnover budget.
+
+        Params: The PortfolioConstraints and the integer positions of the assets.
+
+        Returns: A tuple of the scipy sparse matrix G, the numpy array h and the number of variables.
+    '''
+    import scipy.sparse as sp
+
+    size = len(index)
+    sector_rows, caps = constraints.caps(index)
+
+    if constraints.max_turnover is None:
+        return sector_rows.tocsr(), caps, size
+
+    current = constraints.current_weights[index]
+    budget = 2 * constraints.max_turnover - (constraints.current_weights.sum() - current.sum())
+    identity = sp.identity(size, format = 'csr')
+
+    G = sp.vstack([
+        sp.hstack([sector_rows, sp.csr_matrix((len(caps), size))]),
+        sp.hstack([identity, -identity]),
+        sp.hstack([-identity, -identity]),
+        sp.hstack([sp.csr_matrix((1, size)), sp.csr_matrix(np.ones((1, size)))]),
+    ], format = 'csr')
+    h = np.concatenate([caps, current, -current, [budget]])
+    return G, h, 2 * size
+
+def subset_covariance(VarCov, index):
+    if isinstance(VarCov, FactorCovariance):
+        return VarCov.subset(index)
+    return VarCov[np.ix_(index, index)]
+
+def cvar_restricted(scenarios, confidence, constraints, index):
+    '''
+        Purpose: The minimum CVaR linear program of min_cvar_weights (app/optimizer.py) over a subset of the assets,
+                 with the sparse sector and turnover rows of linear_system added, solved with HiGHS.
+
+        Params: The T x N return 'scenarios', the 'confidence' level, the PortfolioConstraints and the positions of
+                the assets that may be held.
+
+        Returns: A numpy array of the subset's weights. Raises ValueError when the constraints cannot be satisfied.
+    '''
+    import scipy.sparse as sp
+    from scipy.optimize import linprog
+
+    scenarios = np.asarray(scenarios, dtype = float)[:, index]
+    numOfScenarios, size = scenarios.shape
+    G, h, numOfVariables = linear_system(constraints, index)
+
+    #
+    # variables: the weights, the turnover variables, the VaR level and one shortfall per scenario
+    #
+    cost = np.concatenate([np.zeros(numOfVariables), [1.0], np.full(numOfScenarios, 1.0 / ((1.0 - confidence) * numOfScenarios))])
+    A_ub = sp.vstack([
+        sp.hstack([sp.csr_matrix(-scenarios), sp.csr_matrix((numOfScenarios, numOfVariables - size)),
+                   sp.csr_matrix(-np.ones((numOfScenarios, 1))), -sp.identity(numOfScenarios, format = 'csr')]),
+        sp.hstack([G, sp.csr_matrix((G.shape[0], 1 + numOfScenarios))]),
+    ], format = 'csr')
+    b_ub = np.concatenate([np.zeros(numOfScenarios), h])
+    A_eq = sp.csr_matrix(np.concatenate([np.ones(size), np.zeros(numOfVariables - size + 1 + numOfScenarios)])[None, :])
+    bounds = ([(0, constraints.max_weight)] * size + [(0, None)] * (numOfVariables - size) + [(None, None)]
+              + [(0, None)] * numOfScenarios)
+
+    result = linprog(cost, A_ub = A_ub, b_ub = b_ub, A_eq = A_eq, b_eq = [1.0], bounds = bounds, method = 'highs-ipm')
+    if result.status != 0:
+        raise ValueError("the portfolio constraints cannot be satisfied")
+
+    return np.clip(result.x[:size], 0.0, None)
+
+def solve_restricted(objective, mu, VarCov, rf, constraints, index, start=None, scenarios=None, confidence=0.95):
+    '''
+        Purpose: Solves the continuous constrained problem over a subset of the assets: minimum CVaR as a linear
+                 program (cvar_restricted), the other objectives with SLSQP and the analytic gradients of
+                 app/optimizer.py. The sector and turnover rows form one sparse system, passed to SLSQP as a single
+                 sparse LinearConstraint.
+
+        Params: The objective name, the universe 'mu' and 'VarCov', the risk-free rate 'rf', the PortfolioConstraints,
+                the positions of the assets that may be held, an optional starting point over them and, for minimum
+                CVaR, the return 'scenarios' and 'confidence' level.
+
+        Returns: A numpy array of the subset's weights. Raises ValueError when the constraints cannot be satisfied.
+    '''
+    from scipy.optimize import LinearConstraint
+
+    if objective == 'minimum_cvar':
+        return cvar_restricted(scenarios, confidence, constraints, index)
+
+    size = len(index)
+    subsetCov = subset_covariance(VarCov, index)
+    subsetMu = mu[index]
+    G, h, numOfVariables = linear_system(constraints, index)
+
+    if objective == 'minimum_risk':
+        gradient_of = lambda weights: minimum_risk_with_gradient(weights, subsetCov)
+    elif objective == 'maximum_diversification':
+        gradient_of = lambda weights: negative_diversification_ratio_with_gradient(weights, subsetCov)
+    else:
+        gradient_of = lambda weights: negative_sharpe_with_gradient(weights, subsetMu, subsetCov, rf)
+
+    def fun(z):
+        value, gradient = gradient_of(z[:size])
+        return value, np.concatenate([gradient, np.zeros(numOfVariables - size)])
+
+    sum_to_one = np.concatenate([np.ones(size), np.zeros(numOfVariables - size)])
+    system = [{'type': 'eq', 'fun': lambda z: np.dot(sum_to_one, z) - 1, 'jac': lambda z: sum_to_one}]
+    if len(h):
+        system.append(LinearConstraint(G, -np.inf, h))
+
+    bounds = [(0.0, constraints.max_weight)] * size + [(0.0, None)] * (numOfVariables - size)
+
+    weights = np.full(size, 1 / size) if start is None else np.asarray(start, dtype = float)
+    z0 = np.concatenate([weights, np.zeros(numOfVariables - size)])
+    if numOfVariables > size:
+        z0[size:] = np.abs(weights - constraints.current_weights[index])
+
+    result = minimize(fun, z0, jac=True, method='SLSQP', bounds=bounds, constraints=system,
+                      options={'ftol': 1e-12, 'maxiter': 1000})
+
+    weights = np.clip(result.x[:size], 0.0, None)
+    violation = max(abs(weights.sum() - 1.0), float(np.max(G @ result.x - h, initial = 0.0)))
+    if violation > 1e-6:
+        raise ValueError("the portfolio constraints cannot be satisfied")
+
+    return weights
+
+def screen_candidates(objective, mu, VarCov, rf, constraints, scenarios=None, confidence=0.95):
+    '''
+        Purpose: Narrows a large universe to a pool of candidates for the constrained solve: SCREEN_SIZE assets, or
+                 five times the maximum number of holdings (at least 50) when that is smaller. Half of the pool goes to
+                 the largest positions of the unconstrained optimum, then the assets currently held (largest first), and
+                 the rest to the best assets of every sector in turn (by excess return per unit of volatility for
+                 maximum Sharpe, by lowest volatility otherwise), so a sector cap always leaves other sectors to invest in.
+                 Under a turnover limit every current holding is in the pool (which then grows by half a screen for
+                 new candidates), since selling a holding left outside it would count against the turnover budget.
+
+        Params: The objective name, 'mu', 'VarCov', 'rf', the PortfolioConstraints and, for minimum CVaR, the
+                return 'scenarios' and 'confidence' level.
+
+        Returns: A sorted numpy array of asset positions.
+    '''
+    numOfAssets = len(mu)
+    size = SCREEN_SIZE if constraints.max_holdings is None else min(SCREEN_SIZE, max(5 * constraints.max_holdings, 50))
+
+    held = np.array([], dtype = int)
+    if constraints.current_weights is not None:
+        held = np.argsort(-constraints.current_weights, kind = 'stable')
+        held = held[constraints.current_weights[held] > 0]
+
+    chosen = {}
+    if constraints.max_turnover is not None:
+        chosen = dict.fromkeys(held)
+        size = max(size, len(held) + size // 2)
+
+    if numOfAssets <= size:
+        return np.arange(numOfAssets)
+
+    unconstrained = solve_portfolio(objective, mu, VarCov, rf, scenarios = scenarios, confidence = confidence)['x']
+    largest = np.argsort(-unconstrained, kind = 'stable')
+    top = largest[:size // 2][unconstrained[largest[:size // 2]] > WEIGHT_TOLERANCE]
+    chosen.update(dict.fromkeys(top[:size - len(chosen)]))
+    chosen.update(dict.fromkeys(held[:max(size - len(chosen), 0)]))
+
+    volatilities = asset_volatilities(VarCov)
+    score = (mu - rf) / volatilities if objective == 'negative_sharpe' else -volatilities
+    labels = constraints.sectors if constraints.sectors is not None else np.zeros(numOfAssets)
+
+    queues = {}
+    for position in np.argsort(-score, kind = 'stable'):
+        queues.setdefault(labels[position], []).append(position)
+    queues = [iter(queue) for queue in queues.values()]
+
+    while len(chosen) < size and queues:
+        for queue in list(queues):
+            position = next(queue, None)
+            if position is None:
+                queues.remove(queue)
+            elif len(chosen) < size:
+                chosen.setdefault(position)
+
+    return np.sort(np.array(list(chosen), dtype = int))
+
+def constrained_weights(objective, mu, VarCov, rf, constraints, scenarios=None, confidence=0.95):
+    '''
+        Purpose: The constrained portfolio. The continuous problem (weight bounds, sector
+                 caps, turnover) is solved exactly by solve_restricted; the maximum number of holdings and the minimum
+                 position size are reached greedily: assets the solution does not hold are dropped, then the smallest
+                 positions (half of the excess holdings at a time, or half of the positions below the minimum size)
+                 and the problem is solved again over the rest, warm-started from the previous weights.
+
+        Params: The objective name, 'mu', 'VarCov', 'rf', the PortfolioConstraints and, for minimum CVaR, the
+                return 'scenarios' and 'confidence' level.
+
+        Returns: A tuple of the weights of every asset and the number of solves.
+    '''
+    index = screen_candidates(objective, mu, VarCov, rf, constraints, scenarios, confidence)
+    start = None
+    solves = 0
+
+    while True:
+        weights = solve_restricted(objective, mu, VarCov, rf, constraints, index, start, scenarios, confidence)
+        solves += 1
+
+        held = weights > WEIGHT_TOLERANCE
+        small = held & (weights < constraints.min_weight - WEIGHT_TOLERANCE)
+        excess = held.sum() - constraints.max_holdings if constraints.max_holdings is not None else 0
+        if excess <= 0 and not small.any():
+            break
+
+        keep = held.copy()
+        order = np.argsort(np.where(held, weights, np.inf), kind = 'stable')
+        if excess > 0:
+            keep[order[:max(1, (excess + 1) // 2)]] = False
+        else:
+            keep[order[:max(1, small.sum() // 2)]] = False
+
+        index, start = index[keep], weights[keep] / weights[keep].sum()
+        if len(index) == 0:
+            raise ValueError("the portfolio constraints cannot be satisfied")
+
+    full = np.zeros(len(mu))
+    full[index[held]] = weights[held]
+    return full / full.sum(), solves
+
+def constrained_solve(objective, mu, VarCov, rf, constraints, scenarios=None, confidence=0.95):
+    '''
+        Purpose: The constrained counterpart of solve_portfolio (which calls it when constraints are given).
+
+        Params: The arguments of solve_portfolio and the PortfolioConstraints.
+
+        Returns: A scipy OptimizeResult; the weights are in 'x' and the solver used is in 'method'.
+    '''
+    from scipy.optimize import OptimizeResult
+
+    if objective == 'risk_parity':
+        raise ValueError("the risk parity construction does not support portfolio constraints")
+
+    if objective == 'minimum_cvar' and scenarios is None:
+        raise ValueError("the minimum CVaR construction needs return scenarios")
+
+    with stage('constrained', objective = objective, assets = len(mu)) as event:
+        weights, solves = constrained_weights(objective, mu, VarCov, rf, constraints, scenarios, confidence)
+        event['nit'] = solves
+
+    if objective == 'minimum_cvar':
+        fun = conditional_value_at_risk(weights, scenarios, confidence)
+    elif objective == 'minimum_risk':
+        fun = minimum_risk_with_gradient(weights, VarCov)[0]
+    elif objective == 'maximum_diversification':
+        fun = negative_diversification_ratio_with_gradient(weights, VarCov)[0]
+    else:
+        fun = negative_sharpe_with_gradient(weights, mu, VarCov, rf)[0]
+
+    return OptimizeResult(x=weights, fun=fun, success=True, nit=solves, method='constrained',
+                          message='Constrained solution found with greedy holdings reduction')
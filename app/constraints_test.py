@@ -0,0 +1,67 @@
+# import some code we want to test
+
+import numpy as np
+import pytest
+
+from app import constraints as constraints_module
+from app.constraints import PortfolioConstraints
+from app.optimizer import solve_portfolio, conditional_value_at_risk
+
+def sample_universe(random_universe, numOfAssets = 40, numOfScenarios = 600, seed = 4):
+    scenarios = random_universe.returns(numOfAssets, seed, numOfDays = numOfScenarios, mean = 0.0004, drift = 0.0003,
+                                        numOfFactors = 2).values
+    sectors = np.array([f"SECTOR{position % 4}" for position in range(numOfAssets)])
+    return scenarios, scenarios.mean(axis = 0) * 252, np.cov(scenarios, rowvar = False) * 252, sectors
+
+def test_cardinality_position_size_and_sector_caps(monkeypatch, random_universe):
+    scenarios, mu, VarCov, sectors = sample_universe(random_universe)
+    #
+    # a small screening pool exercises the large-universe path
+    #
+    monkeypatch.setattr(constraints_module, 'SCREEN_SIZE', 25)
+    limits = PortfolioConstraints(max_holdings = 6, min_weight = 0.05, max_weight = 0.3, sectors = sectors, sector_caps = 0.35)
+
+    for objective in ['minimum_risk', 'negative_sharpe', 'maximum_diversification', 'minimum_cvar']:
+        result = solve_portfolio(objective, mu, VarCov, 0.01, scenarios = scenarios, constraints = limits)
+
+        assert result['method'] == 'constrained'
+        assert limits.satisfied(result['x'])
+        assert (result['x'] > 0).sum() <= 6
+
+    unconstrained = solve_portfolio('minimum_cvar', mu, VarCov, 0.01, scenarios = scenarios)
+    assert result['fun'] >= unconstrained['fun'] - 1e-12
+    assert np.isclose(result['fun'], conditional_value_at_risk(result['x'], scenarios))
+
+def test_turnover_limit_against_current_weights(random_universe):
+    _, mu, VarCov, sectors = sample_universe(random_universe, numOfAssets = 12)
+    current = {f"T{position}": 0.25 for position in range(4)}
+    tickers = [f"T{position}" for position in range(12)]
+
+    limits = PortfolioConstraints.for_tickers(tickers, current_weights = current, max_turnover = 0.1)
+    result = solve_portfolio('minimum_risk', mu, VarCov, 0.01, constraints = limits)
+    free = solve_portfolio('minimum_risk', mu, VarCov, 0.01)
+
+    assert limits.turnover(result['x']) <= 0.1 + 1e-6
+    assert limits.turnover(free['x']) > 0.1
+    assert free['fun'] <= result['fun'] <= np.sqrt(limits.current_weights @ VarCov @ limits.current_weights)
+
+def test_infeasible_limits_raise(random_universe):
+    _, mu, VarCov, sectors = sample_universe(random_universe, numOfAssets = 8)
+    limits = PortfolioConstraints(max_holdings = 2, max_weight = 0.4)
+
+    with pytest.raises(ValueError):
+        solve_portfolio('minimum_risk', mu, VarCov, 0.01, constraints = limits)
+
+def test_turnover_limit_keeps_holdings_beyond_the_screen(monkeypatch, random_universe):
+    scenarios, mu, VarCov, sectors = sample_universe(random_universe, numOfAssets = 80)
+    monkeypatch.setattr(constraints_module, 'SCREEN_SIZE', 25)
+    current = np.zeros(80)
+    current[::2] = np.random.default_rng(7).dirichlet(np.ones(40))
+
+    #
+    # more assets are held than the screen keeps; keeping the current weights is always feasible
+    #
+    limits = PortfolioConstraints(current_weights = current, max_turnover = 0.2)
+    for objective in ['minimum_risk', 'negative_sharpe', 'maximum_diversification', 'minimum_cvar']:
+        result = solve_portfolio(objective, mu, VarCov, 0.01, scenarios = scenarios, constraints = limits)
+        assert limits.satisfied(result['x'])
@@ -0,0 +1,263 @@
+# this is the "app/covariance.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import numpy as np
+import pandas as pd
+
+from app.instrumentation import stage
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+#
+# the shrinkage and factor estimators need complete observations, so rows with a missing return
+# (e.g. the first row of fetch_returns) are dropped before estimating
+#
+
+def demeaned_returns(rets):
+    '''
+        Purpose: The complete rows of a return panel with each column's mean removed.
+
+        Params: A pandas dataframe of returns.
+
+        Returns: A T x N numpy array.
+    '''
+    values = rets.dropna(how = 'any').values.astype(float)
+    if len(values) < 2:
+        raise ValueError("At least two complete return observations are needed to estimate a covariance matrix.")
+    return values - values.mean(axis = 0)
+
+def sample_covariance(rets, timing=252):
+    '''
+        Purpose: The annualized sample covariance matrix (pairwise complete observations, as before).
+
+        Params: A pandas dataframe of returns and the 'timing' used to annualize.
+
+        Returns: A pandas dataframe.
+    '''
+    return rets.cov() * timing
+
+def ledoit_wolf(rets, timing=252):
+    '''
+        Purpose: Ledoit-Wolf (2004) shrinkage of the sample covariance towards a scaled identity matrix, with the
+                 optimal shrinkage intensity. The result is well conditioned even with fewer observations than tickers.
+
+        Params: A pandas dataframe of returns and the 'timing' used to annualize.
+
+        Returns: A pandas dataframe.
+    '''
+    X = demeaned_returns(rets)
+    numOfObservations, numOfAssets = X.shape
+    sample = X.T @ X / numOfObservations
+    target = np.trace(sample) / numOfAssets
+
+    #
+    # distance of the sample from the target and the estimated error of the sample, both per asset;
+    # sum_t ||x_t x_t' - S||^2 = sum_t ||x_t||^4 - T ||S||^2 avoids forming any T x N x N product
+    #
+    distance = (np.sum(sample**2) - 2 * target * np.trace(sample) + numOfAssets * target**2) / numOfAssets
+    error = (np.sum(np.sum(X**2, axis = 1)**2) - numOfObservations * np.sum(sample**2)) / numOfObservations**2 / numOfAssets
+    shrinkage = min(error, distance) / distance if distance > 0 else 1.0
+
+    VarCov = (1 - shrinkage) * sample
+    VarCov[np.diag_indices(numOfAssets)] += shrinkage * target
+    return pd.DataFrame(VarCov * timing, index = rets.columns, columns = rets.columns)
+
+def constant_correlation(rets, timing=252):
+    '''
+        Purpose: Ledoit-Wolf (2003) shrinkage of the sample covariance towards the constant correlation matrix
+                 (every pair of tickers has the average sample correlation), with the optimal shrinkage intensity.
+
+        Params: A pandas dataframe of returns and the 'timing' used to annualize.
+
+        Returns: A pandas dataframe.
+    '''
+    X = demeaned_returns(rets)
+    numOfObservations, numOfAssets = X.shape
+    sample = X.T @ X / numOfObservations
+    variances = np.diag(sample).copy()
+    deviations = np.sqrt(variances)
+
+    correlation = sample / np.outer(deviations, deviations)
+    averageCorrelation = (correlation.sum() - numOfAssets) / (numOfAssets * (numOfAssets - 1))
+    target = averageCorrelation * np.outer(deviations, deviations)
+    target[np.diag_indices(numOfAssets)] = variances
+
+    #
+    # pi: asymptotic variance of the sample entries, rho: their covariance with the target, gamma: misspecification
+    #
+    squares = X**2
+    pi = squares.T @ squares / numOfObservations - sample**2
+    theta = (X**3).T @ X / numOfObservations - variances[:, None] * sample
+    theta[np.diag_indices(numOfAssets)] = 0.0
+    rho = np.trace(pi) + averageCorrelation * np.sum(np.outer(1 / deviations, deviations) * theta)
+    gamma = np.sum((target - sample)**2)
+
+    shrinkage = max(0.0, min(1.0, (pi.sum() - rho) / gamma / numOfObservations)) if gamma > 0 else 1.0
+
+    VarCov = shrinkage * target + (1 - shrinkage) * sample
+    return pd.DataFrame(VarCov * timing, index = rets.columns, columns = rets.columns)
+
+
+class FactorCovariance:
+    '''
+        Purpose: A low-rank plus diagonal covariance matrix  VarCov = B diag(f) B' + diag(d)  stored as its N x K loadings
+                 'B', K factor variances 'f' and N specific variances 'd'. Products with a weight vector cost O(NK) and
+                 linear solves use the Woodbury identity, so the dense N x N matrix is never formed. It supports the
+                 '@' operator, so the objective functions of app/optimizer.py accept it in place of a numpy matrix.
+
+        Params: The 'loadings', 'factor_variances' and 'specific_variances', and optionally the tickers they describe.
+    '''
+
+    def __init__(self, loadings, factor_variances, specific_variances, tickers=None):
+        self.loadings = np.asarray(loadings, dtype = float)
+        self.factor_variances = np.asarray(factor_variances, dtype = float)
+        self.specific_variances = np.asarray(specific_variances, dtype = float)
+        self.tickers = list(tickers) if tickers is not None else None
+
+    def __len__(self):
+        return len(self.specific_variances)
+
+    @property
+    def shape(self):
+        return (len(self), len(self))
+
+    def __matmul__(self, weights):
+        weights = np.asarray(weights, dtype = float)
+        exposures = self.loadings.T @ weights
+        if weights.ndim == 1:
+            return self.loadings @ (self.factor_variances * exposures) + self.specific_variances * weights
+        return self.loadings @ (self.factor_variances[:, None] * exposures) + self.specific_variances[:, None] * weights
+
+    def __rmatmul__(self, weights):
+        weights = np.asarray(weights, dtype = float)
+        return (self @ weights.T).T
+
+    def __array__(self, dtype=None, copy=None):
+        return self.to_dense().astype(dtype) if dtype is not None else self.to_dense()
+
+    def to_dense(self):
+        '''
+            Purpose: The dense N x N covariance matrix (O(N^2) memory, for small universes and checks).
+        '''
+        VarCov = (self.loadings * self.factor_variances) @ self.loadings.T
+        VarCov[np.diag_indices(len(self))] += self.specific_variances
+        return VarCov
+
+    def diagonal(self):
+        return np.einsum('nk,k,nk->n', self.loadings, self.factor_variances, self.loadings) + self.specific_variances
+
+    def subset(self, index):
+        '''
+            Purpose: The covariance of a subset of the assets, still in factor form.
+
+            Params: Integer positions of the assets.
+
+            Returns: A FactorCovariance.
+        '''
+        tickers = [self.tickers[position] for position in index] if self.tickers is not None else None
+        return FactorCovariance(self.loadings[index], self.factor_variances, self.specific_variances[index], tickers)
+
+    def solve(self, rhs):
+        '''
+            Purpose: Solves VarCov x = rhs in O(NK^2) with the Woodbury identity.
+
+            Params: A vector (or N x m matrix) 'rhs'.
+
+            Returns: The solution 'x'.
+        '''
+        rhs = np.asarray(rhs, dtype = float)
+        inverse_specific = 1 / self.specific_variances
+        if rhs.ndim == 1:
+            scaled = inverse_specific * rhs
+        else:
+            scaled = inverse_specific[:, None] * rhs
+
+        weighted_loadings = self.loadings * inverse_specific[:, None]
+        capacitance = np.diag(1 / self.factor_variances) + self.loadings.T @ weighted_loadings
+        return scaled - weighted_loadings @ np.linalg.solve(capacitance, self.loadings.T @ scaled)
+
+    def to_frame(self):
+        return pd.DataFrame(self.to_dense(), index = self.tickers, columns = self.tickers)
+
+def leading_components(X, numOfComponents, oversampling=10, power_iterations=4, seed=0):
+    '''
+        Purpose: The leading right singular vectors of a T x N matrix. Small problems use a full SVD; otherwise a
+                 randomized range finder with power iterations costs O(TNK) instead of O(TN min(T, N)).
+
+        Params: The matrix 'X', the number of components K, and the oversampling, power iterations and random seed
+                of the randomized method.
+
+        Returns: A tuple of the K largest singular values and the K x N components, in decreasing order.
+    '''
+    size = numOfComponents + oversampling
+    if size >= min(X.shape) // 2:
+        _, singular_values, components = np.linalg.svd(X, full_matrices = False)
+        return singular_values[:numOfComponents], components[:numOfComponents]
+
+    rng = np.random.default_rng(seed)
+    basis, _ = np.linalg.qr(X @ rng.standard_normal((X.shape[1], size)))
+    for iteration in range(power_iterations):
+        basis, _ = np.linalg.qr(X.T @ basis)
+        basis, _ = np.linalg.qr(X @ basis)
+
+    _, singular_values, components = np.linalg.svd(basis.T @ X, full_matrices = False)
+    return singular_values[:numOfComponents], components[:numOfComponents]
+
+def pca_factor_model(rets, timing=252, numOfFactors=10):
+    '''
+        Purpose: A statistical factor model: the leading principal components of the returns are the factors and the
+                 variance they do not explain is kept as each ticker's specific variance.
+
+        Params: A pandas dataframe of returns, the 'timing' used to annualize and the number of factors K.
+
+        Returns: A FactorCovariance whose diagonal equals the sample variances.
+    '''
+    X = demeaned_returns(rets)
+    numOfObservations, numOfAssets = X.shape
+    numOfFactors = max(1, min(numOfFactors, numOfObservations - 1, numOfAssets - 1))
+
+    singular_values, components = leading_components(X, numOfFactors)
+    loadings = components.T
+    factor_variances = singular_values**2 / (numOfObservations - 1)
+
+    #
+    # the specific variance is what the factors leave unexplained, floored so the matrix stays positive definite
+    #
+    variances = np.sum(X**2, axis = 0) / (numOfObservations - 1)
+    explained = np.einsum('nk,k,nk->n', loadings, factor_variances, loadings)
+    specific_variances = np.maximum(variances - explained, 1e-6 * variances.mean())
+
+    return FactorCovariance(loadings, factor_variances * timing, specific_variances * timing, rets.columns)
+
+#
+# covariance estimators selectable by name, e.g. annualized_statistics(rets, timing, estimator = 'ledoit_wolf')
+#
+COVARIANCE_ESTIMATORS = {
+    'sample': sample_covariance,
+    'ledoit_wolf': ledoit_wolf,
+    'constant_correlation': constant_correlation,
+    'pca': pca_factor_model,
+}
+
+def estimate_covariance(rets, timing=252, estimator='sample', **options):
+    '''
+        Purpose: Estimates an annualized covariance matrix with one of the COVARIANCE_ESTIMATORS.
+
+        Params: A pandas dataframe of returns, the 'timing' used to annualize, the 'estimator' name (or any function of
+                (rets, timing)) and options of the estimator (e.g. numOfFactors for 'pca').
+
+        Returns: A pandas dataframe, or a FactorCovariance for 'pca'.
+    '''
+    if not callable(estimator) and estimator not in COVARIANCE_ESTIMATORS:
+        raise ValueError(f"Unknown covariance estimator '{estimator}'.")
+
+    function = estimator if callable(estimator) else COVARIANCE_ESTIMATORS[estimator]
+    with stage('covariance', estimator = getattr(function, '__name__', str(estimator)), tickers = rets.shape[1]):
+        return function(rets, timing, **options)
@@ -0,0 +1,40 @@
+# import some code we want to test
+
+import numpy as np
+
+from app.benchmarks import synthetic_prices
+from app.covariance import estimate_covariance, pca_factor_model
+from app.manager import fetch_returns
+from app.optimizer import solve_portfolio
+
+def test_shrinkage_is_well_conditioned_with_few_observations():
+    #
+    # fewer observations than tickers: the sample covariance is singular
+    #
+    rets = fetch_returns(synthetic_prices(40, 1, seed = 2)).iloc[:31]
+    assert np.linalg.eigvalsh(rets.cov().values).min() < 1e-12
+
+    for estimator in ['ledoit_wolf', 'constant_correlation']:
+        VarCov = estimate_covariance(rets, 12, estimator)
+        assert list(VarCov.columns) == list(rets.columns)
+        assert np.allclose(VarCov.values, VarCov.values.T)
+        assert np.linalg.eigvalsh(VarCov.values).min() > 0
+
+def test_factor_model_products_and_optimization():
+    rets = fetch_returns(synthetic_prices(60, 2, seed = 5))
+    VarCov = pca_factor_model(rets, 252, numOfFactors = 5)
+    dense = VarCov.to_dense()
+    weights = np.random.default_rng(0).dirichlet(np.ones(60))
+
+    assert np.allclose(VarCov @ weights, dense @ weights)
+    assert np.allclose(VarCov.solve(weights), np.linalg.solve(dense, weights))
+    assert np.allclose(np.diag(dense), rets.var().values * 252)
+
+    #
+    # the active-set QP on the factor form should find the same portfolio as on the dense matrix
+    #
+    mu = (rets.mean() * 252).values
+    for objective in ['minimum_risk', 'negative_sharpe']:
+        factor = solve_portfolio(objective, mu, VarCov, 0.01)
+        assert factor['method'] == 'qp'
+        assert np.allclose(factor['x'], solve_portfolio(objective, mu, dense, 0.01)['x'], atol = 1e-6)
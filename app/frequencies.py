@@ -0,0 +1,25 @@
+# this is the "app/frequencies.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+#
+# the return frequencies shared by the interactive program, the batch runner, the return panels and the backtester;
+# kept free of imports so any module (and the manager's fast startup) can use them
+#
+
+#
+# each frequency: the answers accepted for it and the number of periods per year used to annualize returns
+#
+FREQUENCIES = {
+    'daily': (["daily", "day", "d"], 252),
+    'monthly': (["monthly", "month", "m"], 12),
+    'quarterly': (["quarterly", "quarter", "q"], 4),
+}
+
+#
+# resampling rules for the non-daily frequencies (period end labels); the 'ME' / 'QE' aliases need pandas 2.2
+#
+RESAMPLE_RULES = {'monthly': 'ME', 'quarterly': 'QE'}
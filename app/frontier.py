@@ -0,0 +1,158 @@
+# this is the "app/frontier.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.instrumentation import minimize
+from app.optimizer import active_set_qp, min_variance_weights, minimum_risk_with_gradient, SUM_TO_ONE
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def frontier_dtype(numOfAssets):
+    '''
+        Purpose: The record layout of one efficient frontier point: its return, volatility and weights.
+
+        Params: The number of assets.
+    '''
+    return np.dtype([('return', 'f8'), ('vol', 'f8'), ('weights', 'f8', (numOfAssets,))])
+
+def step_towards(weights, mu, target):
+    '''
+        Purpose: A feasible warm start for a higher target return: the previous point's weights moved towards
+                 the highest-returning asset just far enough to earn the target.
+
+        Params: The previous point's 'weights', expected returns 'mu' and the new 'target' return.
+
+        Returns: Long-only weights summing to one with expected return 'target'.
+    '''
+    best = int(np.argmax(mu))
+    current = np.dot(weights, mu)
+    if target <= current:
+        return weights.copy()
+
+    share = min(1.0, (target - current) / (mu[best] - current))
+    start = (1 - share) * weights
+    start[best] += share
+    return start
+
+def slsqp_target_return(mu, VarCov, target, initial_guess):
+    '''
+        Purpose: Minimum risk for a target return with SLSQP, warm-started from 'initial_guess'.
+                 Used when the active-set QP cannot be applied to a frontier point.
+
+        Params: Expected returns 'mu', the covariance matrix 'VarCov', the 'target' return and the initial guess.
+
+        Returns: The portfolio weights. Raises RuntimeError when SLSQP does not converge.
+    '''
+    target_return = {'type': 'eq', 'fun': lambda weights: np.dot(weights, mu) - target, 'jac': lambda weights: mu}
+    bnds = tuple((0,1) for x in range(len(mu)))
+
+    opt = minimize(minimum_risk_with_gradient, initial_guess, args=(VarCov,), jac=True, bounds=bnds,
+                       constraints=(SUM_TO_ONE, target_return))
+    if not opt['success']:
+        raise RuntimeError(f"SLSQP did not reach the target return {target:.4f}: {opt['message']}")
+    return opt['x']
+
+def sweep_frontier(mu, VarCov, targets, weights):
+    '''
+        Purpose: Traces the frontier over increasing target returns. Each solve starts from the previous point's
+                 weights (and therefore its set of held assets), so most points need only a few active-set iterations.
+
+        Params: Expected returns 'mu', the covariance matrix 'VarCov', the increasing 'targets' and feasible starting
+                'weights' whose return is at most the first target.
+
+        Returns: A structured array of (return, vol, weights) records. A point no solver could reach is marked as
+                 failed with NaN values, and the sweep carries on from the last point solved.
+    '''
+    mu = np.asarray(mu, dtype = float)
+    VarCov = np.asarray(VarCov, dtype = float)
+    constraints = np.vstack([np.ones(len(mu)), mu])
+
+    frontier = np.zeros(len(targets), dtype = frontier_dtype(len(mu)))
+    for point, target in enumerate(targets):
+        start = step_towards(weights, mu, target)
+
+        if np.count_nonzero(start) == 1:
+            #
+            # a single asset earning the target is the only feasible portfolio
+            #
+            weights = start
+        else:
+            try:
+                weights, _ = active_set_qp(VarCov, constraints, [1.0, target], start)
+            except (np.linalg.LinAlgError, RuntimeError):
+                try:
+                    weights = slsqp_target_return(mu, VarCov, target, start)
+                except RuntimeError:
+                    frontier[point] = (np.nan, np.nan, np.full(len(mu), np.nan))
+                    continue
+
+        frontier[point] = (np.dot(weights, mu), np.sqrt(np.dot(weights, VarCov @ weights)), weights)
+
+    return frontier
+
+def efficient_frontier(mu, VarCov, numOfPoints=100, max_workers=1):
+    '''
+        Purpose: Computes the long-only efficient frontier between the minimum variance portfolio and the
+                 highest-returning asset by sweeping target returns with warm-started solves.
+
+        Params: Expected returns 'mu', the covariance matrix 'VarCov', the number of frontier points and the number of
+                worker processes. With several workers the targets are split into contiguous segments that are swept in parallel.
+
+        Returns: A structured array of (return, vol, weights) records ordered by return (NaN for a point that could not
+                 be solved, see sweep_frontier).
+    '''
+    mu = np.asarray(mu, dtype = float)
+    VarCov = np.asarray(VarCov, dtype = float)
+
+    min_variance, _ = min_variance_weights(VarCov)
+    targets = np.linspace(np.dot(min_variance, mu), np.max(mu), numOfPoints)
+
+    if max_workers <= 1:
+        return sweep_frontier(mu, VarCov, targets, min_variance)
+
+    segments = np.array_split(targets, max_workers)
+    segments = [segment for segment in segments if len(segment)]
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        parts = list(executor.map(sweep_frontier, [mu] * len(segments), [VarCov] * len(segments), segments,
+                                  [min_variance] * len(segments)))
+
+    return np.concatenate(parts)
+
+def plot_frontier(frontier, filePath=None, ax=None):
+    '''
+        Purpose: Plots the efficient frontier (volatility against return) with matplotlib.
+
+        Params: The structured array produced by efficient_frontier, an optional path to save the figure to
+                and an optional matplotlib axes to draw on.
+
+        Returns: The matplotlib axes.
+    '''
+    if ax is None and filePath is not None:
+        #
+        # a standalone figure can be saved without selecting a pyplot backend
+        #
+        from matplotlib.figure import Figure
+        ax = Figure().subplots()
+    elif ax is None:
+        import matplotlib.pyplot as plt
+        _, ax = plt.subplots()
+
+    ax.plot(frontier['vol'], frontier['return'], marker = '.', linestyle = '-')
+    ax.set_xlabel("Expected Volatility")
+    ax.set_ylabel("Expected Return")
+    ax.set_title("Efficient Frontier")
+
+    if filePath is not None:
+        ax.figure.savefig(filePath)
+
+    return ax
@@ -0,0 +1,60 @@
+# import some code we want to test
+
+import numpy as np
+
+from app.frontier import efficient_frontier, plot_frontier, slsqp_target_return
+from app.optimizer import solve_portfolio
+
+def test_frontier_spans_min_variance_to_max_return(random_universe):
+    mu, VarCov = random_universe.statistics(15, seed = 21, numOfDays = 600, vol = 0.012)
+    frontier = efficient_frontier(mu, VarCov, numOfPoints = 40)
+
+    assert len(frontier) == 40
+    assert np.isclose(frontier['vol'][0], solve_portfolio('minimum_risk', mu, VarCov, 0)['fun'])
+    assert np.isclose(frontier['return'][-1], mu.max())
+    assert np.all(np.diff(frontier['vol']) >= -1e-10)
+    assert np.allclose(frontier['weights'].sum(axis = 1), 1) and frontier['weights'].min() >= 0
+
+    #
+    # every point should be at least as good as a cold-started SLSQP solve for the same target
+    #
+    for point in [5, 20, 35]:
+        weights = slsqp_target_return(mu, VarCov, frontier['return'][point], np.ones(len(mu)) / len(mu))
+        assert frontier['vol'][point] <= np.sqrt(weights @ VarCov @ weights) + 1e-6
+
+def test_parallel_frontier_and_plot(tmp_path, random_universe):
+    mu, VarCov = random_universe.statistics(15, seed = 21, numOfDays = 600, vol = 0.012)
+    serial = efficient_frontier(mu, VarCov, numOfPoints = 20)
+    parallel = efficient_frontier(mu, VarCov, numOfPoints = 20, max_workers = 2)
+
+    assert np.allclose(serial['vol'], parallel['vol'])
+
+    plot_frontier(parallel, filePath = str(tmp_path / "frontier.png"))
+    assert (tmp_path / "frontier.png").exists()
+
+def test_failed_slsqp_points_are_not_reported_as_optimal(monkeypatch, random_universe):
+    import pytest
+    from scipy.optimize import OptimizeResult
+
+    from app import frontier, optimizer
+
+    def no_qp(*args, **kwargs):
+        raise RuntimeError("active set cycling")
+
+    def stalled(fun, x0, **options):
+        return OptimizeResult(x = np.asarray(x0, dtype = float), fun = 0.0, success = False,
+                              message = "Iteration limit reached")
+
+    mu, VarCov = random_universe.statistics(15, seed = 21, numOfDays = 600, vol = 0.012)
+    monkeypatch.setattr(frontier, 'active_set_qp', no_qp)
+    monkeypatch.setattr(frontier, 'minimize', stalled)
+    monkeypatch.setattr(optimizer, 'minimize', stalled)
+
+    points = efficient_frontier(mu, VarCov, numOfPoints = 5)
+    #
+    # only the last point (all in the highest-returning asset) needs no solver
+    #
+    assert np.isnan(points['vol'][:-1]).all() and np.isclose(points['return'][-1], mu.max())
+
+    with pytest.raises(ValueError, match = "did not converge"):
+        solve_portfolio('negative_sharpe', mu, VarCov, 0.01, method = 'slsqp')
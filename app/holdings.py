@@ -0,0 +1,216 @@
+# this is the "app/holdings.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import numpy as np
+import pandas as pd
+
+#
+# accepted header names (case-insensitive) of each holdings column; only 'ticker' is required
+#
+HOLDINGS_COLUMNS = {
+    'ticker': ["ticker", "symbol"],
+    'account': ["account", "account_id", "account id", "accountid"],
+    'sector': ["sector"],
+    'quantity': ["quantity", "shares", "qty"],
+    'weight': ["weight", "weights", "allocation"],
+}
+
+#
+# stock symbols as Yahoo! Finance writes them, e.g. AAPL, BRK-B, BRK.B, ^IRX or EURUSD=X
+#
+SYMBOL_PATTERN = r"\^?[A-Z0-9][A-Z0-9.\-=]{0,11}"
+
+DEFAULT_ACCOUNT = "default"
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def holdings_columns(filePath):
+    '''
+        Purpose: Maps the header of a holdings file onto the HOLDINGS_COLUMNS it contains.
+
+        Params: A string containing the path to the CSV file.
+
+        Returns: A dictionary of file column name to holdings column. Raises ValueError without a ticker column.
+    '''
+    header = pd.read_csv(filePath, nrows = 0).columns
+
+    columns = {}
+    for column in header:
+        for name, aliases in HOLDINGS_COLUMNS.items():
+            if column.strip().lower() in aliases and name not in columns.values():
+                columns[column] = name
+
+    if 'ticker' not in columns.values():
+        raise ValueError("The holdings file needs a 'Ticker' (or 'Symbol') column.")
+
+    return columns
+
+def parse_numbers(values):
+    '''
+        Purpose: Parses a column of numbers that may be written as percentages ('25%') or with thousands separators.
+
+        Params: A pandas series of strings.
+
+        Returns: A pandas series of floats (NaN where missing or invalid).
+    '''
+    text = values.str.strip().str.replace(",", "", regex = False)
+    percent = text.str.endswith("%").fillna(False)
+    numbers = pd.to_numeric(text.str.rstrip("%"), errors = 'coerce')
+    return numbers.where(~percent, numbers / 100)
+
+def read_holdings(filePath, chunksize=100000):
+    '''
+        Purpose: Streams a holdings CSV in chunks, so the file never has to fit in memory at once. Symbols are
+                 cleaned and validated with vectorized string operations, and rows of the same account and ticker
+                 are added together (not dropped).
+
+        Params: A string containing the path to the CSV file and the number of rows read per chunk.
+
+        Returns: A Holdings instance.
+    '''
+    columns = holdings_columns(filePath)
+
+    aggregated = []
+    invalid = []
+    for chunk in pd.read_csv(filePath, usecols = list(columns), dtype = str, chunksize = chunksize, keep_default_na = False):
+        chunk = chunk.rename(columns = columns)
+
+        tickers = chunk['ticker'].str.strip().str.upper()
+        valid = tickers.str.fullmatch(SYMBOL_PATTERN)
+        invalid.extend(tickers[~valid & (tickers != "")].tolist())
+
+        positions = pd.DataFrame({'ticker': tickers[valid]})
+        positions['account'] = chunk['account'][valid].str.strip().replace("", DEFAULT_ACCOUNT) if 'account' in chunk else DEFAULT_ACCOUNT
+        positions['sector'] = chunk['sector'][valid].str.strip().str.upper().replace("", np.nan) if 'sector' in chunk else np.nan
+        positions['quantity'] = parse_numbers(chunk['quantity'][valid]) if 'quantity' in chunk else np.nan
+        positions['weight'] = parse_numbers(chunk['weight'][valid]) if 'weight' in chunk else np.nan
+
+        aggregated.append(aggregate_positions(positions))
+
+    positions = aggregate_positions(pd.concat(aggregated, ignore_index = True)) if aggregated else \
+        pd.DataFrame(columns = ['account', 'ticker', 'sector', 'quantity', 'weight'])
+
+    return Holdings(positions, list(dict.fromkeys(invalid)))
+
+def aggregate_positions(positions):
+    '''
+        Purpose: Adds up the quantities and weights of rows with the same account and ticker, keeping file order.
+
+        Params: A pandas dataframe with 'account', 'ticker', 'sector', 'quantity' and 'weight' columns.
+
+        Returns: A pandas dataframe with one row per (account, ticker).
+    '''
+    grouped = positions.groupby(['account', 'ticker'], sort = False)
+    aggregated = grouped[['quantity', 'weight']].sum(min_count = 1)
+    aggregated.insert(0, 'sector', grouped['sector'].first())
+    return aggregated.reset_index()
+
+
+class Holdings:
+    '''
+        Purpose: The positions of one or more accounts, as read by read_holdings.
+
+        Params: A pandas dataframe of positions ('account', 'ticker', 'sector', 'quantity', 'weight') and the list of
+                'invalid' symbols that were skipped.
+    '''
+
+    def __init__(self, positions, invalid=None):
+        self.positions = positions
+        self.invalid = invalid or []
+
+    def tickers(self, account=None):
+        '''
+            Purpose: The distinct tickers held (by one account, or by any), in file order.
+        '''
+        positions = self.positions if account is None else self.positions[self.positions['account'] == account]
+        return positions['ticker'].drop_duplicates().tolist()
+
+    def accounts(self):
+        return self.positions['account'].drop_duplicates().tolist()
+
+    def sectors(self):
+        '''
+            Purpose: The sector of each ticker, as given by the first row that names one.
+
+            Returns: A pandas series indexed by ticker.
+        '''
+        return self.positions.dropna(subset = ['sector']).drop_duplicates('ticker').set_index('ticker')['sector']
+
+    def weights(self, price_data=None):
+        '''
+            Purpose: The current weights of every account, decided account by account: an account that gives
+                     weights uses them as they are; otherwise its quantities are valued at the last available price in
+                     'price_data'; otherwise it is equally weighted. Each account's weights are scaled to sum to one.
+
+            Params: An optional pandas dataframe of prices (needed to value quantities).
+
+            Returns: A pandas dataframe with one row per account and one column per ticker.
+        '''
+        positions = self.positions
+        accounts = positions['account']
+        weighted = positions['weight'].notna().groupby(accounts).transform('any')
+        counted = positions['quantity'].notna().groupby(accounts).transform('any')
+
+        values = pd.Series(1.0, index = positions.index)
+        if price_data is not None:
+            lastPrices = price_data.ffill().iloc[-1]
+            valued = positions['quantity'] * positions['ticker'].map(lastPrices)
+            values = values.mask(counted, valued)
+        values = values.mask(weighted, positions['weight'])
+
+        table = pd.DataFrame({'account': positions['account'], 'ticker': positions['ticker'], 'value': values.fillna(0.0)})
+        table = table.pivot_table(index = 'account', columns = 'ticker', values = 'value', aggfunc = 'sum', fill_value = 0.0, sort = False)
+        table = table.reindex(index = self.accounts(), columns = self.tickers())
+
+        totals = table.sum(axis = 1)
+        return table.div(totals.where(totals > 0), axis = 0).fillna(0.0)
+
+    def requests(self, approach='integrative', portfolio='1', frequency='daily', price_data=None):
+        '''
+            Purpose: One client request per account (see app/batch.py), carrying the account's current weights so the
+                     optimizer can start from them (and turnover can be limited against them) and the sectors of its
+                     tickers for sector caps.
+
+            Params: The 'approach', 'portfolio' and 'frequency' of every request and optional prices to value quantities.
+
+            Returns: A list of request dictionaries.
+        '''
+        weights = self.weights(price_data)
+        sectors = self.sectors()
+        requests = []
+        for account in self.accounts():
+            current = weights.loc[account]
+            current = current[current > 0]
+            tickers = self.tickers(account)
+            request = {'client_id': account, 'tickers': tickers, 'approach': approach,
+                       'portfolio': portfolio, 'frequency': frequency,
+                       'initial_weights': {ticker: float(weight) for ticker, weight in current.items()}}
+            if not sectors.empty:
+                held = set(tickers)
+                request['sectors'] = {ticker: sector for ticker, sector in sectors.items() if ticker in held}
+            requests.append(request)
+        return requests
+
+def initial_guess(weights, tickers):
+    '''
+        Purpose: Current weights arranged as an optimizer starting point for a list of tickers.
+
+        Params: The current weights (a dictionary or pandas series keyed by ticker) and the optimizer's tickers.
+
+        Returns: A numpy array of long-only weights summing to one, or None when no ticker has a positive weight.
+    '''
+    if weights is None:
+        return None
+
+    guess = pd.Series(weights, dtype = float).reindex(list(tickers)).fillna(0.0).clip(lower = 0.0).values
+    if guess.sum() <= 0:
+        return None
+
+    return guess / guess.sum()
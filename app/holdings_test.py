@@ -0,0 +1,69 @@
+# import some code we want to test
+
+import numpy as np
+import pandas as pd
+
+from app.holdings import initial_guess, read_holdings
+from app.optimizer import solve_portfolio
+
+def write_holdings(tmp_path):
+    path = tmp_path / "holdings.csv"
+    path.write_text(
+        "Account,Symbol,Sector,Shares\n"
+        "A1, aapl ,Technology,10\n"
+        "A1,MSFT,Technology,5\n"
+        "A1,AAPL,Technology,5\n"
+        "B2,NFLX,Communication,3\n"
+        "B2,bad sym!,Other,1\n"
+        "B2,BRK-B,,2\n"
+    )
+    return str(path)
+
+def test_chunked_holdings_are_validated_and_aggregated(tmp_path):
+    holdings = read_holdings(write_holdings(tmp_path), chunksize = 2)
+
+    assert holdings.invalid == ["BAD SYM!"]
+    assert holdings.accounts() == ["A1", "B2"]
+    assert holdings.tickers() == ["AAPL", "MSFT", "NFLX", "BRK-B"]
+    assert holdings.positions.set_index(['account', 'ticker']).loc[('A1', 'AAPL'), 'quantity'] == 15
+    assert holdings.sectors().to_dict() == {"AAPL": "TECHNOLOGY", "MSFT": "TECHNOLOGY", "NFLX": "COMMUNICATION"}
+
+    prices = pd.DataFrame({"AAPL": [100, 110], "MSFT": [200, 220], "NFLX": [50, np.nan], "BRK-B": [300, 300]})
+    weights = holdings.weights(prices)
+    assert np.allclose(weights.loc["A1", ["AAPL", "MSFT"]], [0.6, 0.4])
+    assert np.allclose(weights.loc["B2", ["NFLX", "BRK-B"]], [0.2, 0.8])
+
+    requests = holdings.requests(portfolio = '2', price_data = prices)
+    assert [request['client_id'] for request in requests] == ["A1", "B2"]
+    assert requests[1]['initial_weights'] == {"NFLX": 0.2, "BRK-B": 0.8}
+
+def test_current_weights_seed_the_optimizer(random_universe):
+    mu, VarCov = random_universe.statistics(8, seed = 3, numOfDays = 400)
+    tickers = [f"T{number}" for number in range(8)]
+
+    cold = solve_portfolio('minimum_risk', mu, VarCov, 0.01)
+    guess = initial_guess(dict(zip(tickers, cold['x'])), tickers)
+    warm = solve_portfolio('minimum_risk', mu, VarCov, 0.01, initial_guess = guess)
+
+    assert np.allclose(warm['x'], cold['x'], atol = 1e-8)
+    assert warm['nit'] <= cold['nit']
+    assert initial_guess({"OTHER": 1.0}, tickers) is None
+
+def test_weights_are_decided_per_account(tmp_path):
+    path = tmp_path / "mixed.csv"
+    path.write_text(
+        "Account,Ticker,Weight,Quantity\n"
+        "A1,AAPL,0.25,\n"
+        "A1,MSFT,0.75,\n"
+        "B2,AAPL,,10\n"
+        "B2,NFLX,,20\n"
+    )
+    holdings = read_holdings(str(path))
+    prices = pd.DataFrame({"AAPL": [100.0], "MSFT": [200.0], "NFLX": [50.0]})
+
+    weights = holdings.weights(prices)
+    assert np.allclose(weights.loc["A1", ["AAPL", "MSFT", "NFLX"]], [0.25, 0.75, 0.0])
+    assert np.allclose(weights.loc["B2", ["AAPL", "MSFT", "NFLX"]], [0.5, 0.0, 0.5])
+
+    unpriced = holdings.weights()
+    assert np.allclose(unpriced.loc["B2", ["AAPL", "NFLX"]], [0.5, 0.5])
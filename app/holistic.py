@@ -0,0 +1,105 @@
+# this is the "app/holistic.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import numpy as np
+import pandas as pd
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def correlations_with(series, candidates):
+    '''
+        Purpose: Correlation and covariance of every candidate column with one return series, over the dates both have
+                 data, using a single matrix product for all candidates.
+
+        Params: A numpy array 'series' of T returns and a T x K numpy array of 'candidates' returns (NaN where missing).
+
+        Returns: A tuple of the K correlations and the K covariances.
+    '''
+    valid = np.isfinite(candidates) & np.isfinite(series)[:, None]
+    mask = valid.astype(float)
+    filled = np.where(valid, candidates, 0.0)
+    series = np.where(np.isfinite(series), series, 0.0)
+
+    count = mask.sum(axis = 0)
+    sum_series = series @ mask
+    sum_candidates = filled.sum(axis = 0)
+    sum_squares_series = (series**2) @ mask
+    sum_squares_candidates = (filled**2).sum(axis = 0)
+    sum_products = series @ filled
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        covariance = (sum_products - sum_series * sum_candidates / count) / (count - 1)
+        variance_series = (sum_squares_series - sum_series**2 / count) / (count - 1)
+        variance_candidates = (sum_squares_candidates - sum_candidates**2 / count) / (count - 1)
+        correlation = covariance / np.sqrt(variance_series * variance_candidates)
+
+    return correlation, covariance
+
+def candidate_impact(rets, candidate_rets, rf, timing=252, statistics=None):
+    '''
+        Purpose: Scores many candidate additions against an equally-weighted portfolio at once. Candidates are joined
+                 to the portfolio by date, so histories of different lengths are compared over their common dates.
+
+        Params: A pandas dataframe of the current portfolio's returns 'rets', a dataframe with one column per candidate
+                'candidate_rets', the risk-free rate 'rf', the 'timing' used to annualize returns and optionally
+                precomputed universe 'statistics' (app/stats_cache.py) containing both.
+
+        Returns: A tuple of the portfolio's Sharpe ratio and a pandas dataframe indexed by candidate with its
+                 'annual_return', 'volatility', 'sharpe_ratio', 'correlation' and 'beta' to the portfolio, its
+                 'marginal_sharpe' (change in the portfolio Sharpe ratio per unit of weight moved into it) and
+                 whether it 'improves' the portfolio.
+    '''
+    candidates = list(candidate_rets.columns)
+
+    if statistics is not None:
+        mu, VarCov = statistics.subset(rets.columns)
+        candidate_mu, candidate_VarCov = statistics.subset(candidates)
+        candidate_var = np.diag(candidate_VarCov.values)
+    else:
+        mu, VarCov = rets.mean() * timing, rets.cov() * timing
+        candidate_mu = candidate_rets.mean() * timing
+        #
+        # the sample variance (ddof = 1), the diagonal of rets.cov() as on the 'statistics' path
+        #
+        candidate_var = candidate_rets.var(ddof = 1).values * timing
+
+    #
+    # assuming equal weighted portfolio to reduce complexity
+    #
+    numOfAssets = len(rets.columns)
+    weights = np.full(numOfAssets, 1 / numOfAssets)
+    pret = np.dot(weights, mu.values)
+    pvol = np.sqrt(np.dot(weights, VarCov.values @ weights))
+    sharpeRatio = (pret - rf) / pvol
+
+    #
+    # join the candidates to the portfolio's return series by date (no tail trimming)
+    #
+    portfolio_series = rets.mean(axis = 1)
+    aligned = candidate_rets.reindex(portfolio_series.index)
+    correlation, covariance = correlations_with(portfolio_series.values, aligned.values)
+
+    candidate_mu = candidate_mu.values
+    candidate_vol = np.sqrt(candidate_var)
+    beta = covariance * timing / pvol**2
+    candidate_sharpe = (candidate_mu - rf) / candidate_vol
+    marginal_sharpe = (candidate_mu - rf - beta * (pret - rf)) / pvol
+
+    impact = pd.DataFrame({
+        'annual_return': candidate_mu,
+        'volatility': candidate_vol,
+        'sharpe_ratio': candidate_sharpe,
+        'correlation': correlation,
+        'beta': beta,
+        'marginal_sharpe': marginal_sharpe,
+        'improves': np.round(candidate_sharpe, 2) >= np.round(sharpeRatio, 2) * correlation,
+    }, index = pd.Index(candidates, name = 'ticker'))
+
+    return float(sharpeRatio), impact
@@ -0,0 +1,57 @@
+# import some code we want to test
+
+import numpy as np
+import pandas as pd
+
+from app.holistic import candidate_impact
+
+def sample_returns(random_universe):
+    rets = random_universe.returns(43, seed = 5, mean = 0.0004, vol = 0.008, numOfFactors = 1, factor_vol = 0.008)
+    portfolio = rets.iloc[:, :3].set_axis(['AAPL', 'MSFT', 'FB'], axis = 1)
+    candidates = rets.iloc[:, 3:].set_axis([f"C{number}" for number in range(40)], axis = 1)
+    return portfolio, candidates
+
+def test_correlations_are_aligned_by_date(random_universe):
+    portfolio, candidates = sample_returns(random_universe)
+
+    #
+    # candidates with shorter or gappy histories
+    #
+    candidates = candidates.iloc[30:].copy()
+    candidates.iloc[:100, 0] = np.nan
+    candidates.iloc[::7, 1] = np.nan
+
+    _, impact = candidate_impact(portfolio, candidates, 0.01)
+
+    expected = candidates.corrwith(portfolio.mean(axis = 1))
+    assert np.allclose(impact['correlation'].values, expected.values)
+    assert list(impact.index) == list(candidates.columns)
+
+def test_marginal_sharpe_matches_small_reallocation(random_universe):
+    portfolio, candidates = sample_returns(random_universe)
+    rf = 0.01
+    sharpeRatio, impact = candidate_impact(portfolio, candidates, rf)
+
+    def sharpe_of(series):
+        return (series.mean() * 252 - rf) / (series.std() * np.sqrt(252))
+
+    epsilon = 1e-6
+    base = portfolio.mean(axis = 1)
+    for candidate in ['C0', 'C7', 'C21']:
+        shifted = (1 - epsilon) * base + epsilon * candidates[candidate]
+        numeric = (sharpe_of(shifted) - sharpe_of(base)) / epsilon
+        assert np.isclose(impact.loc[candidate, 'marginal_sharpe'], numeric, rtol = 1e-3)
+
+    assert np.isclose(sharpeRatio, sharpe_of(base))
+
+def test_universe_statistics_give_the_same_scores(random_universe):
+    from app.stats_cache import UniverseStatistics
+
+    portfolio, candidates = sample_returns(random_universe)
+    statistics = UniverseStatistics(pd.concat([portfolio, candidates], axis = 1), 252)
+
+    plain = candidate_impact(portfolio, candidates, 0.01)
+    shared = candidate_impact(portfolio, candidates, 0.01, statistics = statistics)
+
+    assert np.isclose(plain[0], shared[0])
+    pd.testing.assert_frame_equal(plain[1], shared[1])
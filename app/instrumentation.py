@@ -0,0 +1,221 @@
+# this is the "app/instrumentation.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+#
+# the active trace, or None while instrumentation is disabled (the default); every hook checks this one
+# global first, so a disabled run only pays for a function call and a comparison
+#
+_trace = None
+
+#
+# event fields that are totalled per stage in a trace summary (other details, e.g. 'tickers', describe one event);
+# 'hits' / 'misses' are the lookups of the optimizer result cache
+#
+COUNTERS = ('nit', 'nfev', 'njev', 'hits', 'misses')
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+class Trace:
+    '''
+        Purpose: The timing events recorded while instrumentation is enabled, optionally with a cProfile profile.
+
+        Params: Whether to run cProfile alongside the trace ('profile').
+    '''
+
+    def __init__(self, profile=False):
+        self.events = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.profiler = None
+
+        if profile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def add(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def summary(self):
+        '''
+            Purpose: Totals per stage: the number of calls, the wall time and any counters (e.g. 'nfev', 'nit'), with the
+                     'hit_rate' of stages that count cache hits.
+
+            Returns: A dictionary keyed by stage name.
+        '''
+        totals = {}
+        for event in self.events:
+            total = totals.setdefault(event['stage'], {'calls': 0, 'seconds': 0.0})
+            total['calls'] += 1
+            total['seconds'] += event['seconds']
+            for name in COUNTERS:
+                if name in event:
+                    total[name] = total.get(name, 0) + event[name]
+
+        for total in totals.values():
+            if 'hits' in total:
+                total['hit_rate'] = total['hits'] / max(total['hits'] + total.get('misses', 0), 1)
+        return totals
+
+    def to_dict(self):
+        return {'seconds': time.perf_counter() - self.started, 'summary': self.summary(), 'events': list(self.events)}
+
+
+def enable(profile=False):
+    '''
+        Purpose: Starts recording a new trace (and a cProfile profile when 'profile' is True).
+
+        Params: Whether to profile with cProfile as well.
+
+        Returns: The Trace.
+    '''
+    global _trace
+    _trace = Trace(profile)
+    return _trace
+
+def disable():
+    '''
+        Purpose: Stops recording.
+
+        Returns: The finished Trace, or None if instrumentation was not enabled.
+    '''
+    global _trace
+    trace, _trace = _trace, None
+    if trace is not None and trace.profiler is not None:
+        trace.profiler.disable()
+    return trace
+
+def is_enabled():
+    return _trace is not None
+
+def write_trace(trace, tracePath=None, profilePath=None):
+    '''
+        Purpose: Writes a finished trace as JSON and its cProfile statistics (readable with pstats or snakeviz).
+
+        Params: The Trace and the output paths (either may be None).
+    '''
+    if tracePath is not None:
+        with open(tracePath, "w") as handle:
+            json.dump(trace.to_dict(), handle, indent = 2, default = str)
+
+    if profilePath is not None and trace.profiler is not None:
+        trace.profiler.dump_stats(profilePath)
+
+@contextmanager
+def instrumented(tracePath=None, profilePath=None):
+    '''
+        Purpose: Records everything run inside the 'with' block and writes the trace when it ends.
+
+        Params: Where to write the JSON trace and the cProfile statistics (profiling only runs if a path is given).
+
+        Returns: The Trace (as the 'with' target).
+    '''
+    trace = enable(profile = profilePath is not None)
+    try:
+        yield trace
+    finally:
+        disable()
+        write_trace(trace, tracePath, profilePath)
+
+def enable_from_environment():
+    '''
+        Purpose: Turns instrumentation on for a whole run when PORTFOLIO_TRACE (a JSON trace path) or
+                 PORTFOLIO_PROFILE (a cProfile output path) is set; the files are written when the program exits.
+
+        Params: None
+    '''
+    tracePath = os.environ.get("PORTFOLIO_TRACE")
+    profilePath = os.environ.get("PORTFOLIO_PROFILE")
+    if not tracePath and not profilePath:
+        return
+
+    enable(profile = bool(profilePath))
+
+    def finish():
+        trace = disable()
+        if trace is not None:
+            write_trace(trace, tracePath or None, profilePath or None)
+
+    atexit.register(finish)
+
+@contextmanager
+def stage(name, **details):
+    '''
+        Purpose: Times a block of code as one event of the trace. Does nothing while instrumentation is disabled.
+
+        Params: The stage 'name' and any details to store with the event (e.g. the number of tickers).
+
+        Returns: A dictionary (as the 'with' target) to which counters can be added inside the block.
+    '''
+    trace = _trace
+    if trace is None:
+        yield {}
+        return
+
+    depth = getattr(trace._local, 'depth', 0)
+    trace._local.depth = depth + 1
+    event = {'stage': name, 'depth': depth, 'thread': threading.current_thread().name}
+    event.update(details)
+    started = time.perf_counter()
+    try:
+        yield event
+    finally:
+        trace._local.depth = depth
+        event['start'] = started - trace.started
+        event['seconds'] = time.perf_counter() - started
+        trace.add(event)
+
+def timed(name):
+    '''
+        Purpose: A decorator recording every call of a function as a stage of the trace.
+
+        Params: The stage 'name'.
+    '''
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _trace is None:
+                return function(*args, **kwargs)
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def minimize(fun, x0, **options):
+    '''
+        Purpose: scipy.optimize.minimize, recorded as an 'sco.minimize' stage with its iteration ('nit'), objective
+                 evaluation ('nfev') and gradient evaluation ('njev') counts.
+
+        Params: The same arguments as scipy.optimize.minimize.
+
+        Returns: The scipy OptimizeResult.
+    '''
+    import scipy.optimize as sco
+
+    if _trace is None:
+        return sco.minimize(fun, x0, **options)
+
+    with stage('sco.minimize', method = options.get('method') or 'default', assets = len(x0)) as event:
+        result = sco.minimize(fun, x0, **options)
+        for counter in ('nit', 'nfev', 'njev'):
+            if counter in result:
+                event[counter] = int(result[counter])
+        event['success'] = bool(result.get('success', False))
+    return result
@@ -0,0 +1,37 @@
+# import some code we want to test
+
+import json
+
+from app import instrumentation
+from app.instrumentation import instrumented, stage, timed
+from app.optimizer import solve_portfolio
+
+def test_disabled_records_nothing():
+    @timed('square')
+    def square(x):
+        return x * x
+
+    assert not instrumentation.is_enabled()
+    with stage('outer') as event:
+        event['counter'] = 1
+    assert square(3) == 9
+    assert instrumentation.disable() is None
+
+def test_trace_records_solver_counters(tmp_path, random_universe):
+    mu, VarCov = random_universe.statistics(5, seed = 11, numOfDays = 250)
+    tracePath = tmp_path / "trace.json"
+
+    with instrumented(str(tracePath)) as trace:
+        with stage('analysis', tickers = len(mu)):
+            solve_portfolio('negative_sharpe', mu, VarCov, 0.01, method = 'slsqp')
+            solve_portfolio('minimum_risk', mu, VarCov, 0.01, method = 'qp')
+
+    assert not instrumentation.is_enabled()
+    stages = {event['stage']: event for event in trace.events}
+    assert stages['sco.minimize']['nfev'] > 0 and stages['sco.minimize']['depth'] == 1
+    assert stages['active_set_qp']['nit'] >= 1
+    assert stages['analysis']['depth'] == 0 and stages['analysis']['tickers'] == 5
+
+    written = json.loads(tracePath.read_text())
+    assert written['summary']['sco.minimize']['calls'] == 1
+    assert len(written['events']) == 3
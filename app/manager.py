@@ -5,31 +5,24 @@
 #**************************************************************************
 #**************************************************************************
 
-# the following code is for importing some plotting libraries for later use
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-mpl.rcParams['font.family'] = 'serif'
-
 #
-# scipy.optimize is the set of optimization functions that would be useful for portfolio optimization
+# importing this module only loads numpy and the standard library: pandas, scipy.optimize, yfinance and the
+# app modules built on them (the price cache, the optimizer, the covariance estimators, the speculative and
+# holistic analyses and the holdings loader) are imported inside the functions that use them, so the CLI, the
+# batch worker processes and the tests start quickly (see app/benchmarks.py --startup)
 #
-import scipy.optimize as sco
-
-# now we import numpy and pandas libraries
 # numpy is going to be very helpful when we deal with a large number of assets through vector/matrix algebra
 import numpy as np
-import pandas as pd
+
 #
-# pd.options.display customizes the display options for datasets
+# opt-in timing of the pipeline stages (disabled unless PORTFOLIO_TRACE / PORTFOLIO_PROFILE is set)
 #
-pd.options.display.max_seq_items = 10
-pd.options.display.max_rows = 10
+from app.instrumentation import timed, enable_from_environment
 
 #
-# yfinance is a third party package that allows downloading some data from Yahoo Finance firectly;
-# you need to install this package first before you are able to use the functions inside this package
-# 
-import yfinance as yf
+# the return frequencies and their resampling rules (period end labels, as in timeframe_selection)
+#
+from app.frequencies import FREQUENCIES, RESAMPLE_RULES
 
 #**************************************************************************
 #***********    Custom Functions (Modular Program Approach)    ************
@@ -46,51 +39,26 @@ def to_Percentage(num):
     toString = str(newNum) + "%"
     return toString
 
-def negative_sharpe(weights):
-    '''
-        Purpose: To construct a portfolio which maximizes the Sharpe ratio (or, more precisely, minimizes the negative Sharpe ratio) of a portfolio.
-
-        Params: A numpy array containing portfolio 'weights'.
-    '''
-    weights = np.array(weights)
-    pret = np.dot(weights, mu)
-    pvol = np.sqrt(np.dot(weights, np.dot(VarCov, weights.T)))
-    return -(pret-rf)/pvol
-
-def minimum_risk(weights):
-    '''
-        Purpose: To construct a portfolio which minimizes the risk of a portfolio.
-
-        Params: A numpy array containing portfolio 'weights'.
-    '''
-    weights = np.array(weights)
-    pvol = np.sqrt(np.dot(weights, np.dot(VarCov, weights.T)))
-    return pvol
-
 def from_CSV(filePath):
     '''
         Purpose: Reads a CSV from a user local drive at a path they have specified.
 
         Parameters: A string containing complete path to CSV file. Stocks must be indicated 
-                    by their ticker within CSV must be under the header 'Ticker'
+                    by their ticker within CSV must be under the header 'Ticker' (or 'Symbol')
 
-        Returns: A list variable containing series of stock tickers.
+        Returns: A list variable containing series of stock tickers, without duplicates.
     '''
 
     #
-    # read the stock data, portfolio_stocks.csv, into Python and store it in a variable "stocks"
+    # the holdings loader streams the file in chunks and validates every symbol at once (see app/holdings.py)
     #
-    stocks = pd.read_csv(filePath)
+    from app.holdings import read_holdings
 
-# creating dictionary with which to store raw company data
-    symbols = {}
-    index = 0
-    for company in stocks["Ticker"]:
-        symbols[company] = stocks["Ticker"][index]
-        index += 1
+    holdings = read_holdings(filePath)
+    if holdings.invalid:
+        print("WARNING: Skipping invalid stock symbols:", ", ".join(holdings.invalid))
 
-    numOfAssets = len(symbols)
-    tickers = list(symbols.values())
+    tickers = holdings.tickers()
 
     return tickers
 
@@ -144,6 +112,45 @@ def premature_quit(str):
         print("Exiting program now. Please come back soon! Goodbye...\n")
         quit()
 
+def constraint_entry():
+    '''
+        Purpose: Asks for the optional limits of an integrative portfolio: the most stocks to hold and the smallest
+                 position worth holding, so the optimizer does not return dozens of tiny positions.
+
+        Params: None
+
+        Returns: PortfolioConstraints (app/constraints.py), or None when no limit is entered.
+    '''
+    limits = {}
+    #
+    # each limit: its name, the prompt, how to read the answer and the largest valid value
+    #
+    prompts = [('max_holdings', "Maximum number of stocks to hold (press Enter for no limit): ", int, None),
+               ('min_weight', "Minimum position size in percent, e.g. 2 (press Enter for none): ",
+                lambda answer: float(answer) / 100, 1.0)]
+
+    for name, prompt, parse, upper in prompts:
+        while True:
+            answer = input(prompt).strip()
+            premature_quit(answer)
+            if not answer:
+                break
+            try:
+                value = parse(answer)
+            except ValueError:
+                value = 0
+            if value > 0 and (upper is None or value <= upper):
+                limits[name] = value
+                break
+            print("\nINVALID ENTRY! Please enter a positive number or press Enter.")
+
+    if not limits:
+        return None
+
+    from app.constraints import PortfolioConstraints
+
+    return PortfolioConstraints(**limits)
+
 def stock_entry(comparison):
         '''
             Purpose: Provides a framework for the manual entry of stock symbols.
@@ -208,57 +215,63 @@ def stock_entry(comparison):
             
         return tickers
 
-def stock_data_retrieval(list):
+@timed('stock_data_retrieval')
+def stock_data_retrieval(list, start = "2016-01-01", end = "2018-12-31", cache = None, panel = False):
     '''
         Purpose: Uses the Yahoo! Finance API to fetch historical stock data over a specified period of time.
+                 Prices are kept in a local on-disk cache, so repeat runs only download missing ticker/date gaps.
 
-        Parameters: A list containing stock symbols of companies.
+        Parameters: A list containing stock symbols of companies, the 'start' / 'end' dates of the window,
+                    an optional PriceCache (defaults to the application cache) and whether to return a compact
+                    float32 PricePanel (app/price_panel.py) instead of a dataframe, for universe-scale runs.
 
-        Returns: A pandas dataframe of historical adjusted close prices for the specified companies.
+        Returns: A pandas dataframe (or PricePanel) of historical adjusted close prices for the specified companies.
     '''
 
     #
-    # yf.download function retrieves daily prices for a list of securities in a batch and convert that to a Dataframe
-    # here the resulting variable stores the information
+    # the price cache reads whatever it already has from disk and downloads the rest in a batch
     #
-    raw = yf.download(list, start = "2016-01-01", end = "2018-12-31")
+    if cache is None:
+        from app.price_cache import default_cache
+        cache = default_cache()
+
+    if panel:
+        #
+        # the cache fills the panel straight from its per-ticker files, without a float64 dataframe in between
+        #
+        if hasattr(cache, 'get_panel'):
+            return cache.get_panel(list, start, end)
+
+        from app.price_panel import PricePanel
+        return PricePanel.from_frame(cache.get(list, start, end).sort_index())
 
     # extract the adjusted closing prices and store them in a variable named price_data
-    price_data = raw['Adj Close']
+    price_data = cache.get(list, start, end)
 
     # sort price_data by date in case the price_data was not sorted properly by date
-    price_data.sort_index()
+    price_data = price_data.sort_index()
 
     return price_data
 
-def timeframe_selection(price_data):
+def timeframe_selection(price_data, panels = None):
     '''
         Purpose: Allows the user to specify the intervals with which to construct the returns analysis (daily, monthly, quarterly). Refactors price data accordingly.
 
-        Params: A pandas variable 'price_data' containing historical prices.
+        Params: A pandas variable 'price_data' containing historical prices and optionally its precomputed
+                ReturnPanels (app/panels.py), from which the chosen frequency's returns are looked up.
 
-        Returns: A string variable 'timing' which is incorprated into the analysis.
+        Returns: A tuple of the returns at the chosen frequency and the 'timing' used to annualize them.
     '''
 
+    frequency = 'daily'
     attempts = 0
     while attempts < 4:
         timingChoice = input("\nConstruct portfolio using daily, monthly, or quarterly: ")
         timingChoice = timingChoice.lower()
 
-        byDay = ["daily", "day", "d"]
-        byMonth = ["monthly", "month", "m"]
-        byQuarter = ["quarterly", "quarter", "q"]
-
-        if timingChoice in byDay:
-            timing = 252
-            break
-        elif timingChoice in byMonth:
-            timing = 12
-            price_data = price_data.resample(rule = 'm', label = 'right').last()
-            break
-        elif timingChoice in byQuarter:
-            timing = 4
-            price_data = price_data.resample(rule = 'q', label = 'right').last()
+        matches = [name for name, (aliases, _) in FREQUENCIES.items() if timingChoice in aliases]
+        if matches:
+            frequency = matches[0]
             break
         else:
             print("\nERROR: Invalid Entry. Please enter 'daily', 'monthly', or 'quarterly': ")
@@ -266,11 +279,15 @@ def timeframe_selection(price_data):
 
         if (attempts == 4):
             print("\nMaximum Attempts Reached: Defaulting to daily returns.")
-            timing = 252
             break
 
-    return timing
+    timing = FREQUENCIES[frequency][1]
+    if panels is not None:
+        return panels.returns(frequency), timing
 
+    return frequency_returns(price_data, frequency), timing
+
+@timed('fetch_returns')
 def fetch_returns(price_data):
     '''
         Purpose: To calculate historical stock returns.
@@ -286,25 +303,226 @@ def fetch_returns(price_data):
 
     return rets
 
-def fetch_RiskFreeRate():
+def frequency_returns(price_data, frequency):
+    '''
+        Purpose: To calculate historical stock returns at the requested frequency.
+
+        Params: A pandas dataframe of historical prices and the 'frequency' ('daily', 'monthly' or 'quarterly').
+
+        Returns: A pandas variable contain stock returns.
+    '''
+    if frequency in RESAMPLE_RULES:
+        price_data = price_data.resample(rule = RESAMPLE_RULES[frequency], label = 'right').last()
+
+    return fetch_returns(price_data)
+
+@timed('fetch_RiskFreeRate')
+def fetch_RiskFreeRate(start = "2016-01-01", end = "2018-12-31", service = None):
     '''
         Purpose: Dynamically setting the risk-free rate. To be used in portfolio construction.
 
-        Params: None
+        Params: The 'start' / 'end' dates of the window (the same default window as stock_data_retrieval) and an
+                optional RiskFreeService (defaults to the application's shared service, see app/risk_free.py).
 
         Returns: The Risk Free Rate.
     '''
+    if service is None:
+        from app.risk_free import default_risk_free
+        service = default_risk_free()
 
-    riskFree = yf.download("^IRX", start = "2015-01-01", end = "2018-12-31")
-    rf_prices = riskFree["Adj Close"]
-    averageRF = rf_prices.mean()
-    rf = averageRF/100
+    #
+    # the 13-week Treasury bill yield (^IRX) is cached locally and averaged over the window
+    #
+    rf = service.annual_rate(start, end)
 
     return rf
 
 
+
+#**************************************************************************
+#***********     Portfolio Analyses (Programmatic / Headless API)     *****
+#**************************************************************************
+#**************************************************************************
+
+#
+# the menu choices of the interactive program, shared with the batch engine (app/batch.py)
+#
+APPROACHES = {
+    'integrative': ['integrative', 'int', 'i'],
+    'speculative': ['speculative', 'spec', 's'],
+    'holistic': ['holistic', 'hol', 'h'],
+}
+
+RISK_TOLERANCES = {
+    'aggressive': ['aggressive', 'a'],
+    'moderate': ['moderate', 'm'],
+    'conservative': ['conservative', 'c'],
+}
+
+PORTFOLIO_OBJECTIVES = {
+    '1': 'minimum_risk',
+    '2': 'negative_sharpe',
+    '3': 'risk_parity',
+    '4': 'maximum_diversification',
+    '5': 'minimum_cvar',
+}
+
+PORTFOLIO_TITLES = {
+    '1': "MINIMUM RISK",
+    '2': "MAXIMUM RISK-RETURN",
+    '3': "RISK PARITY",
+    '4': "MAXIMUM DIVERSIFICATION",
+    '5': "MINIMUM CONDITIONAL VALUE AT RISK",
+}
+
+def annualized_statistics(rets, timing, statistics = None, estimator = 'sample'):
+    '''
+        Purpose: The annualized mean returns and covariance matrix of a set of stocks.
+
+        Params: A pandas dataframe of stock returns 'rets', the 'timing' used to annualize them, optionally
+                precomputed universe 'statistics' to slice them from instead of recomputing (sample covariance only)
+                and the covariance 'estimator' (see app/covariance.py).
+
+        Returns: A tuple of 'mu' (pandas series) and 'VarCov' (a pandas dataframe, or a FactorCovariance for 'pca').
+    '''
+    if statistics is not None and estimator == 'sample':
+        return statistics.subset(rets.keys())
+
+    from app.covariance import estimate_covariance
+
+    return rets.mean() * timing, estimate_covariance(rets, timing, estimator)
+
+def integrative_analysis(rets, timing, rf, portfolioSelection, statistics = None, opt_mve = None, estimator = 'sample',
+                         initial_guess = None, constraints = None, result_cache = None):
+    '''
+        Purpose: Constructs the integrative portfolio ('1' minimum risk, '2' maximum risk-return, '3' risk parity,
+                 '4' maximum diversification or '5' minimum CVaR over the historical returns) for a set of stocks.
+
+        Params: A pandas dataframe of stock returns 'rets', the 'timing' used to annualize them, the risk-free rate 'rf',
+                the 'portfolioSelection' (a key of PORTFOLIO_OBJECTIVES), optionally precomputed universe 'statistics' (app/stats_cache.py),
+                optionally an already solved construction 'opt_mve' (e.g. from app/parallel.py) and the covariance
+                'estimator' ('sample', 'ledoit_wolf', 'constant_correlation' or 'pca') and an optional 'initial_guess'
+                of the weights (e.g. the account's current weights) for the optimizer to start from and optional
+                PortfolioConstraints aligned to the columns of 'rets' (maximum holdings, position sizes, sector caps,
+                turnover; see app/constraints.py) and an optional ResultCache of solved constructions (app/result_cache.py).
+
+        Returns: A dictionary with the optimal 'weights' (keyed by ticker), the portfolio 'sharpe_ratio' and the solver 'method'.
+    '''
+    from app.optimizer import negative_sharpe, solve_portfolio
+
+    mu, VarCov = annualized_statistics(rets, timing, statistics, estimator)
+    if hasattr(VarCov, 'columns'):
+        VarCov = VarCov.values
+
+    if opt_mve is None:
+        objective = PORTFOLIO_OBJECTIVES[portfolioSelection]
+        #
+        # the minimum CVaR construction optimizes over the historical return scenarios themselves
+        #
+        scenarios = rets.dropna().values if objective == 'minimum_cvar' else None
+        opt_mve = solve_portfolio(objective, mu.values, VarCov, rf, initial_guess = initial_guess, scenarios = scenarios,
+                                  constraints = constraints, result_cache = result_cache)
+
+    #
+    # to extract the optimal portfolio weights, call it through 'x'
+    #
+    mve_weights = opt_mve['x']
+
+    sharpeRatio = -negative_sharpe(mve_weights, mu.values, VarCov, rf)
+
+    return {
+        'weights': dict(zip(rets.keys(), [float(weight) for weight in mve_weights])),
+        'sharpe_ratio': round(float(sharpeRatio), 2),
+        'method': opt_mve['method'],
+    }
+
+def simulated_risk(rets, timing, weights, risk_tolerance = 'moderate', statistics = None, estimator = 'sample',
+                   horizon = None, numOfPaths = 100000, seed = 0, max_workers = 1):
+    '''
+        Purpose: Forward-looking risk of a portfolio: Monte Carlo VaR, CVaR and terminal wealth (see app/simulation.py)
+                 at the confidence level of the investor's risk tolerance.
+
+        Params: A pandas dataframe of stock returns 'rets', the 'timing' used to annualize them, the portfolio 'weights'
+                (keyed by ticker, e.g. integrative_analysis(...)['weights']), the 'risk_tolerance', optionally
+                precomputed universe 'statistics', the covariance 'estimator', the 'horizon' in periods of the returns
+                (about one month by default, but at least one period: one quarter for quarterly returns), the number
+                of paths, the random 'seed' and the number of worker processes.
+
+        Returns: A dictionary of risk measures (see SimulationResult.summary).
+    '''
+    from app.simulation import monte_carlo
+
+    mu, VarCov = annualized_statistics(rets, timing, statistics, estimator)
+    weights = [weights.get(ticker, 0.0) for ticker in rets.keys()]
+    if horizon is None:
+        horizon = max(1, timing // 12)
+
+    result = monte_carlo(weights, mu.values, VarCov, timing, horizon, numOfPaths, seed, max_workers = max_workers)
+    return result.summary(risk_tolerance)
+
+def horizon_label(horizon, timing):
+    '''
+        Purpose: Describes a simulated horizon in the periods of the returns, e.g. '21-DAY' or '1-QUARTER'.
+
+        Params: The 'horizon' in periods and the 'timing' (periods per year) of the returns.
+    '''
+    periods = {FREQUENCIES[frequency][1]: name for frequency, name in
+               (('daily', "DAY"), ('monthly', "MONTH"), ('quarterly', "QUARTER"))}
+    return f"{horizon}-{periods.get(timing, 'PERIOD')}"
+
+def speculative_analysis(rets, risk_tolerance, timing = 252, statistics = None):
+    '''
+        Purpose: Produces Buy, Sell, Hold recommendations for every stock in 'rets' (see app/speculative.py).
+
+        Params: A pandas dataframe of stock returns 'rets', the 'risk_tolerance', the 'timing' used to annualize returns
+                and optionally precomputed universe 'statistics'.
+
+        Returns: A pandas dataframe indexed by ticker with the 'annual_return', 'recommendation' and 'reason' columns.
+    '''
+    if statistics is not None:
+        mu, _ = statistics.subset(rets.keys())
+    else:
+        mu = rets.mean() * timing
+
+    from app.speculative import score_recommendations
+
+    return score_recommendations(mu, risk_tolerance)
+
+def holistic_analysis(rets, new_rets, rf, timing = 252, statistics = None):
+    '''
+        Purpose: Evaluates whether adding each new stock improves the risk-return profile of an equally-weighted portfolio.
+                 All candidates are scored together (see app/holistic.py).
+
+        Params: A pandas dataframe of the current portfolio's returns 'rets', a dataframe of the candidate stock returns
+                'new_rets', the risk-free rate 'rf', the 'timing' used to annualize returns and optionally precomputed
+                universe 'statistics' containing both.
+
+        Returns: A tuple of the portfolio's Sharpe ratio and a pandas dataframe indexed by candidate with its 'sharpe_ratio',
+                 'correlation' with the portfolio, 'marginal_sharpe' and whether it 'improves' the portfolio.
+    '''
+    from app.holistic import candidate_impact
+
+    return candidate_impact(rets, new_rets, rf, timing, statistics)
+
+
 if __name__ == "__main__":
 
+    enable_from_environment()
+
+    #
+    # the interactive program needs the dataframe display options and the background fetcher
+    #
+    import pandas as pd
+    from app.providers import default_fetcher
+    from app.risk_free import default_risk_free
+    from app.speculative import render_recommendations
+
+    #
+    # pd.options.display customizes the display options for datasets
+    #
+    pd.options.display.max_seq_items = 10
+    pd.options.display.max_rows = 10
+
     #**************************************************************************
     #***************                  Module 1                      ***********
     #********************  Introduction to the Application  *******************
@@ -343,9 +561,9 @@ If at any point you wish to exit the program prematurely, please enter 'quit'.
             Holistic: Enter stocks within your current portfolio. After doing so, you may enter new stocks to recieve their impact on your portfolio.
     ''')
 
-    ifIntegrative = ['integrative', 'int', 'i']
-    ifSpeculative = ['speculative', 'spec', 's']
-    ifHolistic = ['holistic', 'hol', 'h']
+    ifIntegrative = APPROACHES['integrative']
+    ifSpeculative = APPROACHES['speculative']
+    ifHolistic = APPROACHES['holistic']
     status = False
 
     while True:
@@ -399,9 +617,9 @@ If at any point you wish to exit the program prematurely, please enter 'quit'.
 
             ''')
 
-    ifAggressive = ['aggressive', 'a']
-    ifModerate = ['moderate', 'm']
-    ifConservative = ['conservative', 'c']
+    ifAggressive = RISK_TOLERANCES['aggressive']
+    ifModerate = RISK_TOLERANCES['moderate']
+    ifConservative = RISK_TOLERANCES['conservative']
     status = False
 
     while True:
@@ -446,129 +664,75 @@ If at any point you wish to exit the program prematurely, please enter 'quit'.
                   1.  Minimum Risk: Your portfolio will be rebalanced based upon the risk tolerance you've indicated.
 
                   2.  Maximizing Risk-Return Profile: This portfolio will provide the greatest level of return per-unit of risk.
+
+                  3.  Risk Parity: Every stock contributes the same share of the portfolio's risk.
+
+                  4.  Maximum Diversification: This portfolio gets the most out of the stocks' low correlations.
+
+                  5.  Minimum Tail Risk: This portfolio has the smallest average loss on its worst 5% of historical days (CVaR).
             '''
         )
 
         while True:
-            portfolioSelection = input("Select one of the above portfolio constructions. Enter '1', or '2': ")
+            portfolioSelection = input("Select one of the above portfolio constructions. Enter '1', '2', '3', '4' or '5': ")
 
             premature_quit(portfolioSelection)
 
-            if portfolioSelection != '1' and portfolioSelection != '2':
+            if portfolioSelection not in PORTFOLIO_OBJECTIVES:
                 print("\nINVALID  ENTRY! Please try again!")
             else:
                 break
 
 
-        tickers = stock_upload()
-        price_data = stock_data_retrieval(tickers)
-        rets = fetch_returns(price_data)
-        timing = timeframe_selection(price_data)
-        mu = rets.mean() * timing
-        VarCov = rets.cov() * timing
-        rf = fetch_RiskFreeRate()
-
-        if portfolioSelection == '1':
-
-            numOfAssets = len(rets.keys())
-
-            #
-            # initial guess for the portfolio weights. Typically we start with equal weights as an initial guess
-            #
-            initial_guess = [1/numOfAssets for x in range(numOfAssets)]
-
-            #
-            # portfolio constraint: summation of weights should be 1
-            #
-            cons = ({'type': 'eq', 'fun': lambda weights: np.sum(weights) - 1})
-
-            #
-            # impose additional constraint: does not allow short sale, i.e. all the individual weights between 0 and 1
-            #
-            bnds = tuple((0,1) for x in range(numOfAssets))
-
-            #
-            # now we are ready to use the minimization function
-            # if you are leaving the arguments to "none", then you don't need to include them
-            #
-            opt_mve = sco.minimize(minimum_risk, initial_guess, bounds=bnds, constraints=cons)
-
-            #
-            # to extract the optimal portfolio weights, call it through 'x'
-            #
-            mve_weights = opt_mve['x']
-
-            sharpeRatio = -negative_sharpe(mve_weights)
-            sharpeRatio = round(sharpeRatio, 2)
-
-            print("---------------------------------------------------------\n")
-
-            print("OPTIMAL PORTFOLIO CONSTRUCTION FOR MINIMUM RISK:\n")
-
-            index = 0
-            stockWeights = {}
-            for stock in tickers:
-                stockWeights[tickers[index]] = to_Percentage(mve_weights[index])
-                index += 1
-
-            for item in stockWeights:
-                stockWeights[item] = float(stockWeights[item].replace('%', ""))
-                if stockWeights[item] > 0:
-                    print(item.rjust(8), "  ", str(stockWeights[item]) + "%")
-
-            print("\n---------------------------------------------------------\n")
-
-
-        if portfolioSelection == '2':
-
-
-            numOfAssets = len(rets.keys())
-
-            #
-            # initial guess for the portfolio weights. Typically we start with equal weights as an initial guess
-            #
-            initial_guess = [1/numOfAssets for x in range(numOfAssets)]
+        #
+        # maximum holdings and a minimum position size (not offered for risk parity, which holds every stock)
+        #
+        constraints = constraint_entry() if PORTFOLIO_OBJECTIVES[portfolioSelection] != 'risk_parity' else None
 
-            #
-            # portfolio constraint: summation of weights should be 1
-            #
-            cons = ({'type': 'eq', 'fun': lambda weights: np.sum(weights) - 1})
+        tickers = stock_upload()
 
-            #
-            # impose additional constraint: does not allow short sale, i.e. all the individual weights between 0 and 1
-            #
-            bnds = tuple((0,1) for x in range(numOfAssets))
+        #
+        # the risk-free yields download in the background while prices load and the timeframe is chosen;
+        # the rate is then averaged over exactly the dates of the chosen returns
+        #
+        risk_free = default_risk_free()
+        rf_future = default_fetcher().submit(risk_free.series)
+        price_data = stock_data_retrieval(tickers)
+        rets, timing = timeframe_selection(price_data)
+        rf_future.result()
+        rf = risk_free.annualized(rets.dropna(how = 'all').index, timing)
 
-            #
-            # now we are ready to use the minimization function
-            # if you are leaving the arguments to "none", then you don't need to include them
-            #
-            opt_mve = sco.minimize(negative_sharpe, initial_guess, bounds=bnds, constraints=cons)
+        #
+        # the solver engine uses the closed-form / active-set quadratic program and only falls back to SLSQP
+        # (with analytic gradients) when the QP cannot be applied
+        #
+        result = integrative_analysis(rets, timing, rf, portfolioSelection, constraints = constraints)
 
-            #
-            # to extract the optimal portfolio weights, call it through 'x'
-            #
-            mve_weights = opt_mve['x']
+        print("---------------------------------------------------------\n")
 
-            sharpeRatio = -negative_sharpe(mve_weights)
-            sharpeRatio = round(sharpeRatio, 2)
+        print("OPTIMAL PORTFOLIO CONSTRUCTION FOR " + PORTFOLIO_TITLES[portfolioSelection] + ":\n")
 
-            print("---------------------------------------------------------\n")
+        stockWeights = {}
+        for stock in result['weights']:
+            stockWeights[stock] = to_Percentage(result['weights'][stock])
 
-            print("OPTIMAL PORTFOLIO CONSTRUCTION FOR MAXIMUM RISK-RETURN:\n")
+        for item in stockWeights:
+            stockWeights[item] = float(stockWeights[item].replace('%', ""))
+            if stockWeights[item] > 0:
+                print(item.rjust(8), "  ", str(stockWeights[item]) + "%")
 
-            index = 0
-            stockWeights = {}
-            for stock in tickers:
-                stockWeights[tickers[index]] = to_Percentage(mve_weights[index])
-                index += 1
+        #
+        # forward-looking risk of the portfolio over about a month, at the confidence level of the chosen strategy
+        #
+        risk = simulated_risk(rets, timing, result['weights'], risk_tolerance)
+        confidence = to_Percentage(risk['confidence'])
 
-            for item in stockWeights:
-                stockWeights[item] = float(stockWeights[item].replace('%', ""))
-                if stockWeights[item] > 0:
-                    print(item.rjust(8), "  ", str(stockWeights[item]) + "%")
+        print("\nSIMULATED " + horizon_label(risk['horizon'], timing) + " RISK (" + str(risk['paths']) + " Monte Carlo paths):\n")
+        print(f"  Value at Risk ({confidence}):".ljust(40), to_Percentage(risk['value_at_risk']))
+        print(f"  Conditional Value at Risk ({confidence}):".ljust(40), to_Percentage(risk['conditional_value_at_risk']))
+        print("  Probability of a loss:".ljust(40), to_Percentage(risk['probability_of_loss']))
 
-            print("\n---------------------------------------------------------\n")
+        print("\n---------------------------------------------------------\n")
 
 
     if invApproach == 'speculative':
@@ -577,153 +741,37 @@ If at any point you wish to exit the program prematurely, please enter 'quit'.
         tickers = stock_upload()
         price_data = stock_data_retrieval(tickers)
         rets = fetch_returns(price_data)
-        validTickers = list(rets.keys())
-        mu = rets.mean() * 252
 
-    
-        for stock in validTickers:
-
-           # Recommendation
-           rec = ""
-           reason = ""
-
-           if (risk_tolerance == 'aggressive'):
-           
-               if (mu[stock].mean() >= 0.08):
-                   rec = "BUY"
-                   reason = '''     
-                     The stock is demonstrating upward momentum. 
-                     Asset offers a high-growth proposition.'''
-
-               elif (mu[stock] <= 0.04):
-                   rec = "SELL"
-                   reason = '''     
-                     The stock is demonstrating low growth value, 
-                     currently generating less than 4% annual return 
-                     An aggressive strategy calls for the liquidation 
-                     of low-growth postions.'''
-               else:
-                   rec = "HOLD"
-                   reason = '''    
-                     The stock is generating resonable returns
-                     and should be held until its growth proposition 
-                     is more clear to the market.'''
-
-           elif (risk_tolerance == 'moderate'):
-
-               if (mu[stock].mean() >= 0.06):
-                   rec = "BUY"
-                   reason = '''    
-                     The stock is currently generating greater than 6% annual 
-                     return offering relatively strong growth value to an 
-                     investor willing to incur moderate risk.'''
-
-               elif (mu[stock] <= 0.03):
-                   rec = "SELL"
-                   reason = ''' 
-                     The stock is generating less than 3% annual return, 
-                     indicating that the market recognizes little growth value 
-                     in the stock moving forward.'''           
-               else:
-                   rec = "HOLD"
-                   reason ='''    
-                     The stock is generating resonable returns
-                     and should be held until its growth proposition 
-                     is more clear to the market.'''
-           else:
-
-               if (mu[stock] >= 0.01):
-                   rec = "BUY"
-                   reason = '''   
-                     The stock is generating moderate returns. 
-                     A conservative strategy focuses on principal 
-                     protection rather than growth.'''
-
-               elif (mu[stock] <= -0.01):
-                   rec = "SELL"
-                   reason = '''   
-                     The stock is currently generating negative
-                     annual returns, indicating that principal is 
-                     at risk. Conservative investors should sell.'''
-               else:
-                   rec = "HOLD"
-                   reason = '''   
-                     The stock is demonstrating relative stability, 
-                     offering predictability and consistent 
-                     returns to conservative investors. '''
-
-           print("\n-----------------------------------------------------------------------------------")
-           print(f"SELECTED SYMBOL: {stock.upper()}")
-           print(f"RISK TOLERANCE: {risk_tolerance.upper()}")
-           print("-----------------------------------------------------------------------------------")
-           print(f"AVERAGE ANNUAL RETURN (3-YEAR SAMPLE): {to_Percentage(float(mu[stock]))}")
-           print("-----------------------------------------------------------------------------------")
-           print(f"RECOMMENDATION: {rec}")
-           print(f"RECOMMENDATION REASON: {reason}")
-           print("-----------------------------------------------------------------------------------")        
+        recommendations = speculative_analysis(rets, risk_tolerance)
+        print(render_recommendations(recommendations, risk_tolerance))
 
 
     if invApproach == 'holistic':
 
         print("Please provide the stocks currently contained within your portfolio.")
         tickers = stock_upload()
-        price_data = stock_data_retrieval(tickers)
-        rets = fetch_returns(price_data)
-        mu = rets.mean() * 252
-        VarCov = rets.cov() * 252
-        rf = fetch_RiskFreeRate()
-    
-        #assuming portfolio is well-diversified
-        numOfAssets = len(rets.keys())
 
         #
-        # assuming equal weighted portfolio to reduce complexity
+        # the risk-free rate downloads in the background while prices load and the candidate is entered
         #
-        weights = [1/numOfAssets for x in range(numOfAssets)]
-
-        sharpeRatio = -negative_sharpe(weights)
-        sharpeRatio = round(sharpeRatio, 2)
+        risk_free = default_risk_free()
+        rf_future = default_fetcher().submit(risk_free.series)
+        price_data = stock_data_retrieval(tickers)
+        rets = fetch_returns(price_data)
 
         print("\nNow provide a stock you'd like to consider purchasing.")
         comparison = True
         newStock = stock_entry(comparison)
         new_price_data = stock_data_retrieval(newStock)
         new_rets = fetch_returns(new_price_data)
-        new_mu = new_rets.mean() * 252
-
-        if len(newStock) == 1:
-            new_VarCov = np.var(new_rets) * 252
-        else:
-            new_VarCov = new_rets.cov() * 252
-
-        new_numOfAssets = len(newStock)
-        new_weights = [1/new_numOfAssets for x in range(new_numOfAssets)]
-        new_weights = np.array(new_weights)
-        new_pret = np.dot(new_weights, new_mu)
-        new_pvol = np.sqrt(np.dot(new_weights, np.dot(new_VarCov, new_weights.T)))
-        newSharpe = (new_pret-rf)/new_pvol
-        newSharpe = float(newSharpe)
-        newSharpe = round(newSharpe, 2)
-
-        rets = rets.mean(axis=1)
-
-        while len(rets) > len(new_rets):
-            rets.drop(rets.tail(1).index,inplace=True)
-
-
-        rets.drop(rets.head(1).index,inplace=True)
-        new_rets.drop(new_rets.head(1).index,inplace=True)
-
-
-        corrcoef = np.corrcoef(new_rets, rets)
-        corr = corrcoef.sum(axis=0)
-        corr = list(corr)
-        correlation = corr[0]-1
+        rf_future.result()
+        rf = risk_free.annualized(rets.dropna(how = 'all').index)
+        sharpeRatio, impact = holistic_analysis(rets, new_rets, rf)
 
         print("-----------------------------------------------------------------------------------")
         print("\nRESULT:")
 
-        if (newSharpe >= (sharpeRatio * correlation) ):
+        if impact['improves'].iloc[0]:
             print('''
 This stock improves the risk-return profile of your portfolio. 
 You should include it within your portfolio.
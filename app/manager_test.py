@@ -1,6 +1,9 @@
 # import some code we want to test
 
-from app.manager import to_Percentage, from_CSV, stock_entry
+import numpy as np
+import pandas as pd
+
+from app.manager import to_Percentage, from_CSV, stock_entry, timeframe_selection, constraint_entry
 
 def test_to_Percentage():
     assert to_Percentage(0.24678) == "24.68%"
@@ -13,3 +16,26 @@ def test_from_CSV():
     validResults = from_CSV('test/MockData/mock_stock_data.csv')
 
     assert validResults == ['AAPL', 'FB', 'MSFT', 'NFLX', 'PYPL']
+
+def test_timeframe_selection_returns_resampled_returns(monkeypatch):
+    dates = pd.bdate_range("2016-01-01", "2016-12-31")
+    price_data = pd.DataFrame({'AAPL': np.linspace(100, 120, len(dates))}, index = dates)
+    monkeypatch.setattr('builtins.input', lambda prompt: "Quarterly")
+
+    rets, timing = timeframe_selection(price_data)
+
+    assert timing == 4
+    assert len(rets) == 4
+    assert np.isclose(rets['AAPL'].sum(), np.log(120 / price_data['AAPL'].resample('QE').last().iloc[0]))
+
+def test_constraint_entry(monkeypatch):
+    answers = iter(["8", "-1", "2.5"])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(answers))
+
+    constraints = constraint_entry()
+
+    assert constraints.max_holdings == 8
+    assert np.isclose(constraints.min_weight, 0.025)
+
+    monkeypatch.setattr('builtins.input', lambda prompt: "")
+    assert constraint_entry() is None
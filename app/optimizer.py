@@ -0,0 +1,633 @@
+# this is the "app/optimizer.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import numpy as np
+
+from app.covariance import FactorCovariance
+from app.instrumentation import minimize, stage
+
+#
+# a portfolio whose volatility is below this fraction of its assets' average volatility is treated as riskless
+# (diversification ratios of real portfolios stay far below 1 / SINGULAR_TOLERANCE)
+#
+SINGULAR_TOLERANCE = 1e-6
+
+#
+# the largest deviation of a risk contribution from its budget (relative to the largest budget) accepted as risk parity
+#
+RISK_PARITY_TOLERANCE = 1e-4
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+#
+# every objective receives its inputs ('mu', 'VarCov', 'rf') as arguments rather than reading module globals,
+# so it can be passed to sco.minimize through 'args' and evaluated from several processes at once
+#
+
+def portfolio_moments(weights, mu, VarCov):
+    '''
+        Purpose: Computes the expected return and volatility of a portfolio.
+
+        Params: A numpy array of portfolio 'weights', expected returns 'mu' and the covariance matrix 'VarCov'.
+
+        Returns: The portfolio return, the portfolio volatility and the vector VarCov @ weights.
+    '''
+    weights = np.asarray(weights, dtype = float)
+    cov_w = np.asarray(VarCov @ weights, dtype = float)
+    pret = np.dot(weights, np.asarray(mu, dtype = float))
+    #
+    # a singular covariance (fewer observations than assets) can give a variance a rounding error below zero
+    #
+    pvol = np.sqrt(max(np.dot(weights, cov_w), 0.0))
+    return pret, pvol, cov_w
+
+def negative_sharpe(weights, mu, VarCov, rf):
+    '''
+        Purpose: To construct a portfolio which maximizes the Sharpe ratio (or, more precisely, minimizes the negative Sharpe ratio) of a portfolio.
+
+        Params: A numpy array containing portfolio 'weights', expected returns 'mu', the covariance matrix 'VarCov' and the risk-free rate 'rf'.
+    '''
+    pret, pvol, _ = portfolio_moments(weights, mu, VarCov)
+    return -(pret-rf)/pvol
+
+def negative_sharpe_gradient(weights, mu, VarCov, rf):
+    '''
+        Purpose: The closed-form gradient of negative_sharpe with respect to the portfolio weights.
+
+        Params: The same arguments as negative_sharpe.
+    '''
+    return negative_sharpe_with_gradient(weights, mu, VarCov, rf)[1]
+
+def negative_sharpe_with_gradient(weights, mu, VarCov, rf):
+    '''
+        Purpose: Evaluates negative_sharpe and its gradient together, sharing a single VarCov @ weights product.
+                 Intended for sco.minimize(..., jac=True).
+
+        Params: The same arguments as negative_sharpe.
+
+        Returns: A tuple of the objective value and its gradient.
+    '''
+    pret, pvol, cov_w = portfolio_moments(weights, mu, VarCov)
+    excess = pret - rf
+    gradient = -(np.asarray(mu, dtype = float) / pvol - excess * cov_w / pvol**3)
+    return -excess/pvol, gradient
+
+def minimum_risk(weights, VarCov):
+    '''
+        Purpose: To construct a portfolio which minimizes the risk of a portfolio.
+
+        Params: A numpy array containing portfolio 'weights' and the covariance matrix 'VarCov'.
+    '''
+    weights = np.asarray(weights, dtype = float)
+    pvol = np.sqrt(max(np.dot(weights, np.asarray(VarCov @ weights, dtype = float)), 0.0))
+    return pvol
+
+def minimum_risk_gradient(weights, VarCov):
+    '''
+        Purpose: The closed-form gradient of minimum_risk with respect to the portfolio weights.
+
+        Params: The same arguments as minimum_risk.
+    '''
+    return minimum_risk_with_gradient(weights, VarCov)[1]
+
+def minimum_risk_with_gradient(weights, VarCov):
+    '''
+        Purpose: Evaluates minimum_risk and its gradient together, sharing a single VarCov @ weights product.
+                 Intended for sco.minimize(..., jac=True).
+
+        Params: The same arguments as minimum_risk.
+
+        Returns: A tuple of the objective value and its gradient.
+    '''
+    weights = np.asarray(weights, dtype = float)
+    cov_w = np.asarray(VarCov @ weights, dtype = float)
+    pvol = np.sqrt(max(np.dot(weights, cov_w), 0.0))
+    return pvol, cov_w / pvol
+
+def weights_sum(weights):
+    '''
+        Purpose: The sum-to-one portfolio constraint. Equals zero when the weights are fully invested.
+
+        Params: A numpy array containing portfolio 'weights'.
+    '''
+    return np.sum(weights) - 1
+
+def weights_sum_jacobian(weights):
+    '''
+        Purpose: The Jacobian of the sum-to-one constraint, a row of ones.
+
+        Params: A numpy array containing portfolio 'weights'.
+    '''
+    return np.ones(len(weights))
+
+#
+# portfolio constraint: summation of weights should be 1, with its analytic Jacobian
+#
+SUM_TO_ONE = {'type': 'eq', 'fun': weights_sum, 'jac': weights_sum_jacobian}
+
+def asset_volatilities(VarCov):
+    '''
+        Purpose: The volatility of every asset, the square root of the covariance matrix diagonal.
+
+        Params: The covariance matrix 'VarCov' (dense or a FactorCovariance).
+    '''
+    if isinstance(VarCov, FactorCovariance):
+        return np.sqrt(VarCov.diagonal())
+    return np.sqrt(np.diag(np.asarray(VarCov, dtype = float)))
+
+def negative_diversification_ratio(weights, VarCov):
+    '''
+        Purpose: To construct the maximum diversification portfolio, which maximizes the ratio of the weighted average
+                 asset volatility to the portfolio volatility (or, more precisely, minimizes its negative).
+
+        Params: A numpy array containing portfolio 'weights' and the covariance matrix 'VarCov'.
+    '''
+    return negative_sharpe(weights, asset_volatilities(VarCov), VarCov, 0.0)
+
+def negative_diversification_ratio_with_gradient(weights, VarCov):
+    '''
+        Purpose: Evaluates negative_diversification_ratio and its gradient together. The ratio is the Sharpe ratio
+                 with the asset volatilities in place of the expected returns and a zero risk-free rate.
+
+        Params: The same arguments as negative_diversification_ratio.
+
+        Returns: A tuple of the objective value and its gradient.
+    '''
+    return negative_sharpe_with_gradient(weights, asset_volatilities(VarCov), VarCov, 0.0)
+
+def zero_variance(weights, VarCov):
+    '''
+        Purpose: Whether a portfolio's volatility is negligible next to the volatilities of its assets, as it can be
+                 under a singular covariance matrix. The Sharpe and diversification ratios of such a portfolio are
+                 meaningless (unbounded).
+
+        Params: A numpy array containing portfolio 'weights' and the covariance matrix 'VarCov'.
+    '''
+    weights = np.asarray(weights, dtype = float)
+    pvol = minimum_risk(weights, VarCov)
+    return pvol <= SINGULAR_TOLERANCE * np.dot(weights, asset_volatilities(VarCov))
+
+def risk_contributions(weights, VarCov):
+    '''
+        Purpose: The fraction of the portfolio variance contributed by every asset, w_i (VarCov w)_i / w' VarCov w.
+
+        Params: A numpy array containing portfolio 'weights' and the covariance matrix 'VarCov'.
+    '''
+    weights = np.asarray(weights, dtype = float)
+    contributions = weights * np.asarray(VarCov @ weights, dtype = float)
+    return contributions / contributions.sum()
+
+def risk_parity_with_gradient(y, VarCov, budgets):
+    '''
+        Purpose: The convex risk parity objective 1/2 y' VarCov y - budgets' log(y) and its gradient VarCov y - budgets / y.
+                 At its minimum every y_i (VarCov y)_i equals budgets_i, so the weights y / sum(y) have risk
+                 contributions proportional to the budgets. Intended for sco.minimize(..., jac=True).
+
+        Params: The unnormalized positive weights 'y', the covariance matrix 'VarCov' and the risk 'budgets'.
+
+        Returns: A tuple of the objective value and its gradient.
+    '''
+    cov_y = np.asarray(VarCov @ y, dtype = float)
+    return 0.5 * np.dot(y, cov_y) - np.dot(budgets, np.log(y)), cov_y - budgets / y
+
+def conditional_value_at_risk(weights, scenarios, confidence=0.95):
+    '''
+        Purpose: To construct a portfolio which minimizes the historical conditional value at risk: the average loss
+                 of the portfolio in the worst 1 - confidence of the return scenarios.
+
+        Params: A numpy array containing portfolio 'weights', a T x N array of return 'scenarios' (e.g. rets.values)
+                and the 'confidence' level.
+    '''
+    return conditional_value_at_risk_with_gradient(weights, scenarios, confidence)[0]
+
+def conditional_value_at_risk_with_gradient(weights, scenarios, confidence=0.95):
+    '''
+        Purpose: Evaluates conditional_value_at_risk and its (sub)gradient together, through the Rockafellar-Uryasev
+                 form VaR + mean(max(loss - VaR, 0)) / (1 - confidence).
+
+        Params: The same arguments as conditional_value_at_risk.
+
+        Returns: A tuple of the objective value and its gradient.
+    '''
+    scenarios = np.asarray(scenarios, dtype = float)
+    losses = -(scenarios @ np.asarray(weights, dtype = float))
+    var = np.quantile(losses, confidence)
+    tail = losses > var
+    scale = 1.0 / ((1.0 - confidence) * len(losses))
+    cvar = var + scale * np.sum(losses[tail] - var)
+    return cvar, -scale * scenarios[tail].sum(axis = 0)
+
+#**************************************************************************
+#***************             Portfolio Solver Engine              *********
+#**************************************************************************
+#**************************************************************************
+
+#
+# both long-only constructions reduce to the same quadratic program
+#
+#       minimize  1/2 y' VarCov y    subject to   a' y = b,  y >= 0
+#
+# (points on the efficient frontier add a second equality row for the target return, see app/frontier.py)
+#
+# minimum variance uses a = 1, b = 1 directly; maximum Sharpe uses the standard transformation
+# y = w / (mu - rf)'w with a = mu - rf, b = 1, and recovers the weights as w = y / sum(y)
+#
+
+def as_covariance(VarCov):
+    '''
+        Purpose: Converts a covariance matrix to a float numpy array, leaving a FactorCovariance (app/covariance.py)
+                 in its compact form.
+
+        Params: The covariance matrix 'VarCov' (numpy, pandas or FactorCovariance).
+    '''
+    if isinstance(VarCov, FactorCovariance):
+        return VarCov
+    return np.asarray(VarCov, dtype = float)
+
+def free_set_solution(VarCov, index, a, b):
+    '''
+        Purpose: Minimizes 1/2 y' VarCov y subject to a y = b over the free assets only. A FactorCovariance is solved
+                 with the Woodbury identity in O(NK^2); a dense matrix through the KKT system.
+
+        Params: The covariance matrix 'VarCov', the positions of the free assets 'index', and the constraint rows 'a'
+                and values 'b' restricted to those assets.
+
+        Returns: A tuple of the free assets' weights and the constraint multipliers.
+    '''
+    if isinstance(VarCov, FactorCovariance):
+        directions = VarCov.subset(index).solve(a.T)
+        multiplier = np.linalg.solve(a @ directions, b)
+        return directions @ multiplier, multiplier
+
+    size, numOfConstraints = len(index), len(b)
+    kkt = np.zeros((size + numOfConstraints, size + numOfConstraints))
+    kkt[:size, :size] = VarCov[np.ix_(index, index)]
+    kkt[:size, size:] = a.T
+    kkt[size:, :size] = a
+    rhs = np.zeros(size + numOfConstraints)
+    rhs[size:] = b
+    solution = np.linalg.solve(kkt, rhs)
+    return solution[:size], -solution[size:]
+
+def active_set_qp(VarCov, a, b, y0, max_iter=None, tol=1e-10):
+    '''
+        Purpose: Solves the long-only quadratic program above with a primal active-set method.
+                 Every iteration is one small linear solve on the currently non-zero assets.
+
+        Params: The covariance matrix 'VarCov' (dense or a FactorCovariance), the constraint vector 'a' and value 'b'
+                (or a matrix of constraint rows and a vector of values), and a feasible starting point 'y0'.
+
+        Returns: A tuple of the optimal 'y' and the number of iterations used. Raises LinAlgError or
+                 RuntimeError if the problem is singular or does not converge.
+    '''
+    VarCov = as_covariance(VarCov)
+    a = np.atleast_2d(np.asarray(a, dtype = float))
+    b = np.atleast_1d(np.asarray(b, dtype = float))
+    y = np.array(y0, dtype = float)
+    numOfAssets = len(y)
+    free = y > 0
+
+    if max_iter is None:
+        max_iter = 10 * numOfAssets + 10
+
+    for iteration in range(1, max_iter + 1):
+        index = np.flatnonzero(free)
+        size = len(index)
+
+        #
+        # the equality-constrained problem restricted to the free assets
+        #
+        target, multiplier = free_set_solution(VarCov, index, a[:, index], b)
+
+        step = target - y[index]
+        if np.max(np.abs(step)) <= tol * max(1.0, np.max(np.abs(target))):
+            #
+            # no progress on the free set: check the bound multipliers of the assets held at zero
+            #
+            bound_multipliers = VarCov @ y - a.T @ multiplier
+            bound_multipliers[free] = np.inf
+            release = int(np.argmin(bound_multipliers))
+            if bound_multipliers[release] >= -tol * max(1.0, np.max(np.abs(multiplier))):
+                return y, iteration
+            free[release] = True
+            continue
+
+        #
+        # step towards the target until the first free asset hits zero
+        #
+        shrinking = step < 0
+        ratios = np.full(size, np.inf)
+        ratios[shrinking] = -y[index][shrinking] / step[shrinking]
+        blocking = int(np.argmin(ratios))
+        alpha = min(1.0, ratios[blocking])
+
+        y[index] += alpha * step
+        if alpha < 1.0:
+            y[index[blocking]] = 0.0
+            free[index[blocking]] = False
+        y[index] = np.maximum(y[index], 0.0)
+
+    raise RuntimeError("active-set QP did not converge")
+
+def long_only_start(initial_guess, numOfAssets):
+    '''
+        Purpose: A long-only starting point summing to one from an optional initial guess (e.g. current holdings),
+                 falling back to equal weights.
+
+        Params: The initial guess (or None) and the number of assets.
+    '''
+    if initial_guess is not None:
+        start = np.maximum(np.asarray(initial_guess, dtype = float), 0.0)
+        if len(start) == numOfAssets and start.sum() > 0:
+            return start / start.sum()
+
+    return np.full(numOfAssets, 1 / numOfAssets)
+
+def min_variance_weights(VarCov, initial_guess=None):
+    '''
+        Purpose: The long-only minimum variance portfolio. When the analytic solution
+                 VarCov^-1 1 / (1' VarCov^-1 1) has no negative weights it is returned after a single linear solve.
+
+        Params: The covariance matrix 'VarCov' and an optional initial guess; starting from weights close to the
+                optimum (e.g. the current holdings) means fewer assets have to leave the active set.
+
+        Returns: A tuple of the portfolio weights and the number of active-set iterations.
+    '''
+    numOfAssets = len(VarCov)
+    return active_set_qp(VarCov, np.ones(numOfAssets), 1.0, long_only_start(initial_guess, numOfAssets))
+
+def max_sharpe_weights(mu, VarCov, rf, initial_guess=None):
+    '''
+        Purpose: The long-only maximum Sharpe ratio portfolio, solved as a quadratic program in the transformed variables.
+
+        Params: Expected returns 'mu', the covariance matrix 'VarCov', the risk-free rate 'rf' and an optional initial
+                guess (used as the starting point when it earns more than the risk-free rate).
+
+        Returns: A tuple of the portfolio weights and the number of active-set iterations. Raises ValueError
+                 when no asset earns more than the risk-free rate (the transformation does not apply).
+    '''
+    excess = np.asarray(mu, dtype = float) - rf
+    positive = np.maximum(excess, 0.0)
+    if not np.any(positive > 0):
+        raise ValueError("no asset has an expected return above the risk-free rate")
+
+    start = positive / np.dot(positive, positive)
+    if initial_guess is not None:
+        guess = long_only_start(initial_guess, len(excess))
+        if np.dot(excess, guess) > 0:
+            start = guess / np.dot(excess, guess)
+
+    y, iterations = active_set_qp(VarCov, excess, 1.0, start)
+    return y / np.sum(y), iterations
+
+def risk_parity_weights(VarCov, budgets=None, initial_guess=None):
+    '''
+        Purpose: The long-only risk parity (equal risk contribution) portfolio, found by minimizing the convex
+                 risk_parity_with_gradient with L-BFGS-B. Every iteration costs one VarCov @ y product, so a
+                 FactorCovariance keeps it linear in the number of assets.
+
+        Params: The covariance matrix 'VarCov', optional risk 'budgets' (equal by default) and an optional initial guess.
+
+        Returns: A tuple of the portfolio weights and the number of iterations. Raises ValueError when the risk
+                 contributions do not match the budgets, e.g. under a singular covariance matrix, where a riskless
+                 combination of the assets makes the objective unbounded.
+    '''
+    numOfAssets = len(VarCov)
+    budgets = np.full(numOfAssets, 1 / numOfAssets) if budgets is None else np.asarray(budgets, dtype = float) / np.sum(budgets)
+
+    #
+    # the inverse volatility portfolio is the exact solution for uncorrelated assets and a good start otherwise;
+    # it is scaled so that y' VarCov y equals sum(budgets), as at the optimum
+    #
+    start = long_only_start(initial_guess, numOfAssets) if initial_guess is not None else 1.0 / asset_volatilities(VarCov)
+    start = np.maximum(start, 1e-8 * start.max())
+    start *= np.sqrt(budgets.sum() / np.dot(start, np.asarray(VarCov @ start, dtype = float)))
+
+    result = minimize(risk_parity_with_gradient, start, args=(VarCov, budgets), jac=True, method='L-BFGS-B',
+                      bounds=[(1e-12 * start.max(), None)] * numOfAssets, options={'ftol': 1e-15, 'gtol': 1e-10})
+    #
+    # L-BFGS-B's own status is not enough: it can stop on a line search failure at the optimum and report success
+    # on an unbounded problem, so convergence is judged by the risk contributions themselves
+    #
+    weights = result.x / np.sum(result.x)
+    if not np.all(np.isfinite(weights)) or \
+            np.max(np.abs(risk_contributions(weights, VarCov) - budgets)) > RISK_PARITY_TOLERANCE * np.max(budgets):
+        raise ValueError(f"risk parity did not converge ({result.message}); the covariance matrix may be singular")
+
+    return weights, int(result.nit)
+
+def min_cvar_weights(scenarios, confidence=0.95):
+    '''
+        Purpose: The long-only portfolio with the lowest historical conditional value at risk, as the Rockafellar-Uryasev
+                 linear program over the T return scenarios:
+
+                     minimize   VaR + 1 / ((1 - confidence) T) sum(u)
+                     subject to u_t >= -r_t' w - VaR,  u >= 0,  w >= 0,  sum(w) = 1
+
+                 The constraint matrix [-R, -1, -I] is sparse apart from the scenarios and is solved with the HiGHS
+                 interior point method (with crossover), which needs far fewer iterations than simplex here.
+
+        Params: A T x N array of return 'scenarios' and the 'confidence' level.
+
+        Returns: A tuple of the portfolio weights, the minimum CVaR and the number of solver iterations.
+    '''
+    import scipy.sparse as sp
+    from scipy.optimize import linprog
+
+    scenarios = np.asarray(scenarios, dtype = float)
+    numOfScenarios, numOfAssets = scenarios.shape
+    if numOfScenarios == 0:
+        raise ValueError("no return scenarios to optimize the CVaR over")
+
+    #
+    # variables: the N weights, the VaR level and one shortfall per scenario
+    #
+    cost = np.concatenate([np.zeros(numOfAssets), [1.0], np.full(numOfScenarios, 1.0 / ((1.0 - confidence) * numOfScenarios))])
+    A_ub = sp.hstack([sp.csr_matrix(-scenarios), sp.csr_matrix(-np.ones((numOfScenarios, 1))), -sp.identity(numOfScenarios, format = 'csr')], format = 'csr')
+    A_eq = sp.csr_matrix(np.concatenate([np.ones(numOfAssets), np.zeros(1 + numOfScenarios)])[None, :])
+    bounds = [(0, None)] * numOfAssets + [(None, None)] + [(0, None)] * numOfScenarios
+
+    result = linprog(cost, A_ub = A_ub, b_ub = np.zeros(numOfScenarios), A_eq = A_eq, b_eq = [1.0], bounds = bounds, method = 'highs-ipm')
+    if result.status != 0:
+        raise RuntimeError(f"minimum CVaR linear program failed: {result.message}")
+
+    weights = np.maximum(result.x[:numOfAssets], 0.0)
+    return weights / weights.sum(), float(result.fun), int(result.nit)
+
+def slsqp_solve(objective, mu, VarCov, rf, initial_guess=None):
+    '''
+        Purpose: The general nonlinear SLSQP construction, used as a fallback by solve_portfolio.
+
+        Params: The objective name ('minimum_risk', 'negative_sharpe' or 'maximum_diversification'), expected returns
+                'mu', the covariance matrix 'VarCov', the risk-free rate 'rf' and an optional initial guess.
+
+        Returns: The scipy OptimizeResult.
+    '''
+    numOfAssets = len(mu)
+
+    #
+    # initial guess for the portfolio weights. Typically we start with equal weights as an initial guess
+    #
+    if initial_guess is None:
+        initial_guess = [1/numOfAssets for x in range(numOfAssets)]
+
+    #
+    # impose additional constraint: does not allow short sale, i.e. all the individual weights between 0 and 1
+    #
+    bnds = tuple((0,1) for x in range(numOfAssets))
+
+    if objective == 'minimum_risk':
+        fun, args = minimum_risk_with_gradient, (VarCov,)
+    elif objective == 'maximum_diversification':
+        fun, args = negative_diversification_ratio_with_gradient, (VarCov,)
+    else:
+        fun, args = negative_sharpe_with_gradient, (mu, VarCov, rf)
+
+    return minimize(fun, initial_guess, args=args, jac=True, bounds=bnds, constraints=(SUM_TO_ONE))
+
+#
+# the constructions solve_portfolio offers; 'minimum_cvar' optimizes over return scenarios rather than VarCov
+#
+PORTFOLIO_CONSTRUCTIONS = ('minimum_risk', 'negative_sharpe', 'risk_parity', 'maximum_diversification', 'minimum_cvar')
+SCENARIO_CONSTRUCTIONS = ('minimum_cvar',)
+
+#
+# constructions solved as convex programs (the active-set QP, or the CVaR linear program) whose optimum does not
+# depend on the initial guess
+#
+CONVEX_CONSTRUCTIONS = ('minimum_risk', 'negative_sharpe', 'maximum_diversification', 'minimum_cvar')
+
+def solve_portfolio(objective, mu, VarCov, rf, method='auto', initial_guess=None, scenarios=None, confidence=0.95,
+                    constraints=None, result_cache=None):
+    '''
+        Purpose: Constructs a long-only portfolio for the given objective. Minimum risk, maximum Sharpe and maximum
+                 diversification (a maximum Sharpe problem on the asset volatilities) try the closed-form / active-set
+                 quadratic program first and only use SLSQP when it cannot be applied. Risk parity is solved with
+                 L-BFGS-B and minimum CVaR as a sparse linear program over the return scenarios.
+
+        Params: The objective name (one of PORTFOLIO_CONSTRUCTIONS), expected returns 'mu', the covariance matrix
+                'VarCov' (dense or a FactorCovariance from app/covariance.py), the risk-free rate 'rf', the 'method'
+                ('auto', 'qp' or 'slsqp', for the quadratic constructions), an optional initial guess (e.g. the current
+                weights of an account, see app/holdings.py) from which the solver starts, and for 'minimum_cvar' the
+                T x N return 'scenarios' and the CVaR 'confidence' level. Optional PortfolioConstraints (maximum
+                holdings, position sizes, sector caps, turnover; see app/constraints.py) are solved by constrained_solve.
+                With a ResultCache (app/result_cache.py) a construction already solved for the same inputs and options
+                is returned without running the solver again.
+
+        Returns: A scipy OptimizeResult; the weights are in 'x' and the solver used is in 'method'.
+    '''
+    if objective not in PORTFOLIO_CONSTRUCTIONS:
+        raise ValueError(f"unknown portfolio objective '{objective}'")
+
+    mu = np.asarray(mu, dtype = float)
+    VarCov = as_covariance(VarCov)
+
+    if result_cache is None:
+        return construct_portfolio(objective, mu, VarCov, rf, method, initial_guess, scenarios, confidence, constraints)
+
+    from app.result_cache import cacheable
+
+    key = construction_key(objective, mu, VarCov, rf, method, initial_guess, scenarios, confidence, constraints)
+    with stage('result_cache', objective = objective, assets = len(mu)) as event:
+        result = result_cache.get(key)
+        event['hits'] = int(result is not None)
+        event['misses'] = int(result is None)
+    if result is not None:
+        return result
+
+    result = construct_portfolio(objective, mu, VarCov, rf, method, initial_guess, scenarios, confidence, constraints)
+    if cacheable(result):
+        result_cache.put(key, result)
+    return result
+
+def construction_key(objective, mu, VarCov, rf, method='auto', initial_guess=None, scenarios=None, confidence=0.95,
+                     constraints=None):
+    '''
+        Purpose: The ResultCache key of a solve_portfolio call (same parameters), so constructions solved elsewhere
+                 (e.g. on the process pool of app/parallel.py) share the cache entries of solve_portfolio. The initial
+                 guess is only part of the key where it can change the answer (risk parity and SLSQP), so accounts
+                 warm-started from different current weights share the solution of a convex construction.
+    '''
+    from app.result_cache import result_key
+
+    convex = objective == 'minimum_cvar' or (objective in CONVEX_CONSTRUCTIONS and method != 'slsqp')
+    if convex or (constraints is not None and constraints.is_active()):
+        initial_guess = None
+
+    return result_key(objective, mu, VarCov, rf, method = method, initial_guess = initial_guess, scenarios = scenarios,
+                      confidence = confidence if objective == 'minimum_cvar' else None, constraints = constraints)
+
+def construct_portfolio(objective, mu, VarCov, rf, method, initial_guess, scenarios, confidence, constraints):
+    '''
+        Purpose: Runs the solver of a construction for solve_portfolio (same parameters, already validated).
+    '''
+    from scipy.optimize import OptimizeResult
+
+    if constraints is not None and constraints.is_active():
+        from app.constraints import constrained_solve
+        return constrained_solve(objective, mu, VarCov, rf, constraints, scenarios, confidence)
+
+    if objective == 'minimum_cvar':
+        if scenarios is None:
+            raise ValueError("the minimum CVaR construction needs return scenarios")
+        with stage('minimum_cvar_lp', assets = len(mu), scenarios = len(scenarios)) as event:
+            weights, fun, iterations = min_cvar_weights(scenarios, confidence)
+            event['nit'] = iterations
+        return OptimizeResult(x=weights, fun=fun, success=True, nit=iterations, method='lp',
+                              message='Optimal solution found by the HiGHS linear program')
+
+    if objective == 'risk_parity':
+        with stage('risk_parity', assets = len(mu)) as event:
+            weights, iterations = risk_parity_weights(VarCov, initial_guess = initial_guess)
+            event['nit'] = iterations
+        return OptimizeResult(x=weights, fun=float(np.max(risk_contributions(weights, VarCov)) - 1 / len(weights)),
+                              success=True, nit=iterations, method='lbfgs',
+                              message='Equal risk contributions found by L-BFGS-B')
+
+    if method in ('auto', 'qp'):
+        try:
+            with stage('active_set_qp', objective = objective, assets = len(mu)) as event, \
+                    np.errstate(divide = 'ignore', invalid = 'ignore'):
+                if objective == 'minimum_risk':
+                    weights, iterations = min_variance_weights(VarCov, initial_guess)
+                    fun = minimum_risk(weights, VarCov)
+                elif objective == 'maximum_diversification':
+                    weights, iterations = max_sharpe_weights(asset_volatilities(VarCov), VarCov, 0.0, initial_guess)
+                    fun = negative_diversification_ratio(weights, VarCov)
+                else:
+                    weights, iterations = max_sharpe_weights(mu, VarCov, rf, initial_guess)
+                    fun = negative_sharpe(weights, mu, VarCov, rf)
+                event['nit'] = iterations
+        except (np.linalg.LinAlgError, RuntimeError, ValueError):
+            if method == 'qp':
+                raise
+        else:
+            if np.all(np.isfinite(weights)) and np.isfinite(fun) and \
+                    (objective == 'minimum_risk' or not zero_variance(weights, VarCov)):
+                return OptimizeResult(x=weights, fun=fun, success=True, nit=iterations, method='qp',
+                                      message='Optimal solution found by the active-set QP')
+
+            #
+            # a singular covariance (fewer observations than assets) holds a zero-variance portfolio, so the Sharpe
+            # or diversification ratio is unbounded and no solver can return a meaningful optimum
+            #
+            if np.all(np.isfinite(weights)):
+                raise ValueError(f"the {objective} objective is unbounded: the covariance matrix is singular (fewer "
+                                 "observations than assets?); use a shrinkage estimator or a longer window")
+            if method == 'qp':
+                raise ValueError(f"the active-set QP did not return finite weights for {objective}")
+
+    result = slsqp_solve(objective, mu, VarCov, rf, initial_guess)
+    result['method'] = 'slsqp'
+    if not result['success']:
+        raise ValueError(f"SLSQP did not converge for {objective}: {result['message']}")
+    if not (np.all(np.isfinite(result['x'])) and np.isfinite(result['fun'])):
+        raise ValueError(f"the {objective} objective is not finite at the SLSQP solution (singular covariance matrix?)")
+    return result
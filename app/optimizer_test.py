@@ -0,0 +1,95 @@
+# import some code we want to test
+
+import numpy as np
+from scipy.optimize import approx_fprime
+
+from app.optimizer import (negative_sharpe, negative_sharpe_gradient, negative_sharpe_with_gradient,
+                           minimum_risk, minimum_risk_gradient, solve_portfolio, risk_contributions,
+                           risk_parity_with_gradient, conditional_value_at_risk, negative_diversification_ratio)
+
+def test_analytic_gradients_match_finite_differences(random_universe):
+    mu, VarCov = random_universe.statistics(6, seed = 7)
+    weights = np.random.default_rng(7).dirichlet(np.ones(6))
+    rf = 0.01
+
+    numeric = approx_fprime(weights, negative_sharpe, 1e-7, mu, VarCov, rf)
+    assert np.allclose(negative_sharpe_gradient(weights, mu, VarCov, rf), numeric, atol = 1e-4)
+
+    numeric = approx_fprime(weights, minimum_risk, 1e-7, VarCov)
+    assert np.allclose(minimum_risk_gradient(weights, VarCov), numeric, atol = 1e-4)
+
+def test_combined_evaluation_matches_objective(random_universe):
+    mu, VarCov = random_universe.statistics(6, seed = 7)
+    weights = np.random.default_rng(7).dirichlet(np.ones(6))
+
+    value, _ = negative_sharpe_with_gradient(weights, mu, VarCov, 0.02)
+    assert np.isclose(value, negative_sharpe(weights, mu, VarCov, 0.02))
+
+def test_qp_fast_path_matches_slsqp(random_universe):
+    mu, VarCov = random_universe.statistics(25, seed = 7)
+
+    for objective in ['minimum_risk', 'negative_sharpe']:
+        fast = solve_portfolio(objective, mu, VarCov, 0.01)
+        slow = solve_portfolio(objective, mu, VarCov, 0.01, method = 'slsqp')
+
+        assert fast['method'] == 'qp'
+        assert np.isclose(fast['x'].sum(), 1) and fast['x'].min() >= 0
+        assert fast['fun'] <= slow['fun'] + 1e-6
+
+def test_max_sharpe_falls_back_to_slsqp(random_universe):
+    mu, VarCov = random_universe.statistics(6, seed = 7)
+
+    #
+    # no asset beats the risk-free rate, so the transformed QP does not apply
+    #
+    result = solve_portfolio('negative_sharpe', mu, VarCov, mu.max() + 1)
+    assert result['method'] == 'slsqp'
+    assert np.isclose(result['x'].sum(), 1)
+
+def test_risk_parity_equalizes_risk_contributions(random_universe):
+    mu, VarCov = random_universe.statistics(12, seed = 7)
+
+    y = np.linspace(0.5, 2.0, 12)
+    numeric = approx_fprime(y, lambda point: risk_parity_with_gradient(point, VarCov, np.full(12, 1 / 12))[0], 1e-7)
+    assert np.allclose(risk_parity_with_gradient(y, VarCov, np.full(12, 1 / 12))[1], numeric, atol = 1e-4)
+
+    result = solve_portfolio('risk_parity', mu, VarCov, 0.01)
+    assert np.isclose(result['x'].sum(), 1.0) and np.all(result['x'] > 0)
+    assert np.allclose(risk_contributions(result['x'], VarCov), 1 / 12, atol = 1e-6)
+
+def test_maximum_diversification_qp_matches_slsqp(random_universe):
+    mu, VarCov = random_universe.statistics(15, seed = 7)
+
+    fast = solve_portfolio('maximum_diversification', mu, VarCov, 0.01)
+    slow = solve_portfolio('maximum_diversification', mu, VarCov, 0.01, method = 'slsqp')
+
+    assert fast['method'] == 'qp'
+    assert fast['fun'] <= slow['fun'] + 1e-6
+    assert np.isclose(fast['fun'], negative_diversification_ratio(fast['x'], VarCov))
+
+def test_minimum_cvar_linear_program():
+    rng = np.random.default_rng(5)
+    scenarios = rng.standard_t(4, size = (800, 8)) * 0.01 + 0.0004
+    mu = scenarios.mean(axis = 0) * 252
+    VarCov = np.cov(scenarios, rowvar = False) * 252
+
+    result = solve_portfolio('minimum_cvar', mu, VarCov, 0.01, scenarios = scenarios)
+
+    assert result['method'] == 'lp'
+    assert np.isclose(result['fun'], conditional_value_at_risk(result['x'], scenarios))
+    for weights in [np.full(8, 1 / 8), solve_portfolio('minimum_risk', mu, VarCov, 0.01)['x']]:
+        assert result['fun'] <= conditional_value_at_risk(weights, scenarios) + 1e-12
+
+def test_singular_covariance_is_not_reported_as_optimal(random_universe):
+    mu, VarCov = random_universe.statistics(40, seed = 12, timing = 12, numOfDays = 12, mean = 0.01, vol = 0.05)
+
+    result = solve_portfolio('minimum_risk', mu, VarCov, 0.01)
+    assert np.isfinite(result['fun']) and result['fun'] < 1e-6
+
+    for objective in ('negative_sharpe', 'maximum_diversification', 'risk_parity'):
+        try:
+            solve_portfolio(objective, mu, VarCov, 0.01)
+        except ValueError as error:
+            assert 'singular' in str(error)
+        else:
+            raise AssertionError(f"{objective} returned a result for a singular covariance matrix")
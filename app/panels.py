@@ -0,0 +1,160 @@
+# this is the "app/panels.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from app.instrumentation import stage
+from app.frequencies import FREQUENCIES, RESAMPLE_RULES
+from app.price_panel import PricePanel
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def price_key(price_data):
+    '''
+        Purpose: Hashes a price panel (tickers, dates and prices).
+
+        Params: A pandas dataframe of prices or a PricePanel.
+
+        Returns: A hex digest identifying the panel.
+    '''
+    digest = hashlib.sha1()
+    if isinstance(price_data, PricePanel):
+        #
+        # a panel is hashed in its own dtype and (column-major) layout, so a memory-mapped panel is read only once
+        #
+        digest.update("\0".join(map(str, price_data.tickers)).encode())
+        digest.update(np.ascontiguousarray(price_data.dates.values).tobytes())
+        digest.update(str(price_data.values.dtype).encode())
+        digest.update(np.ascontiguousarray(price_data.values.T))
+        return digest.hexdigest()
+
+    digest.update("\0".join(map(str, price_data.columns)).encode())
+    digest.update(np.ascontiguousarray(price_data.index.values).tobytes())
+    digest.update(np.ascontiguousarray(price_data.values, dtype = float).tobytes())
+    return digest.hexdigest()
+
+def period_rows(dates, rule):
+    '''
+        Purpose: The periods of a resampling rule over a date index: their (period end) labels and the first and last
+                 row of each period, with -1 for periods without any dates.
+
+        Params: A pandas DatetimeIndex and a resampling 'rule' (e.g. 'ME').
+
+        Returns: A tuple of the period labels and two numpy integer arrays.
+    '''
+    periods = pd.Series(np.arange(len(dates)), index = dates).resample(rule = rule, label = 'right')
+    first = periods.min()
+    last = periods.max()
+    return last.index, first.fillna(-1).to_numpy(dtype = np.int64), last.fillna(-1).to_numpy(dtype = np.int64)
+
+def resample_last(values, dates, rule):
+    '''
+        Purpose: The last valid value of every column in every period (as DataFrame.resample(rule).last()), computed on
+                 the array one period at a time, so only the output and one period of rows are ever allocated.
+
+        Params: A T x N numpy array, its T dates and the resampling 'rule'.
+
+        Returns: A tuple of the period labels and the P x N array of values (in the dtype of 'values').
+    '''
+    labels, first, last = period_rows(dates, rule)
+    columns = np.arange(values.shape[1])
+
+    resampled = np.full((len(labels), len(columns)), np.nan, dtype = values.dtype, order = 'F')
+    for period, (low, high) in enumerate(zip(first, last)):
+        if high < 0:
+            continue
+        valid = ~np.isnan(values[low:high + 1])
+        #
+        # the number of rows between the end of the period and each column's last valid value
+        #
+        offset = valid[::-1].argmax(axis = 0)
+        resampled[period] = values[high - offset, columns]
+        resampled[period, ~valid.any(axis = 0)] = np.nan
+
+    return labels, resampled
+
+
+class ReturnPanels:
+    '''
+        Purpose: The log-return panels of one price load at every frequency. Log prices are taken once, each
+                 frequency's panel is the period-to-period difference of the (resampled) log prices, and the panels
+                 are kept so that switching frequency is a dictionary lookup.
+
+        Params: A pandas dataframe (or a PricePanel, whose dtype is kept) of daily prices and the frequencies to
+                precompute (all of FREQUENCIES by default; any other frequency is computed on first use).
+    '''
+
+    def __init__(self, price_data, frequencies=None):
+        self.price_data = price_data
+
+        #
+        # everything is computed on the price array in its own dtype (float32 for a PricePanel): no price, log price
+        # or resampled dataframe is built, only the returns of each frequency
+        #
+        if isinstance(price_data, PricePanel):
+            self.dates, self.tickers, values = price_data.dates, price_data.tickers, price_data.values
+        else:
+            self.dates, self.tickers = price_data.index, list(price_data.columns)
+            values = price_data.to_numpy(dtype = float, na_value = np.nan)
+
+        self.log_prices = np.log(values)
+        self._key = None
+        self._panels = {}
+
+        for frequency in (FREQUENCIES if frequencies is None else frequencies):
+            self.returns(frequency)
+
+    @property
+    def key(self):
+        '''
+            Purpose: The hash of the underlying prices (see price_key), computed once.
+        '''
+        if self._key is None:
+            self._key = price_key(self.price_data)
+        return self._key
+
+    def returns(self, frequency='daily'):
+        '''
+            Purpose: The log returns at a frequency ('daily', 'monthly' or 'quarterly'), with period end labels.
+
+            Params: The 'frequency'.
+
+            Returns: A pandas dataframe of returns (over a column-major array, in the dtype of the prices).
+        '''
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unknown frequency '{frequency}'.")
+
+        if frequency not in self._panels:
+            with stage('returns', frequency = frequency, tickers = self.log_prices.shape[1]):
+                dates, log_prices = self.dates, self.log_prices
+                if frequency in RESAMPLE_RULES:
+                    dates, log_prices = resample_last(log_prices, dates, RESAMPLE_RULES[frequency])
+
+                rets = np.empty(log_prices.shape, dtype = log_prices.dtype, order = 'F')
+                rets[:1] = np.nan
+                np.subtract(log_prices[1:], log_prices[:-1], out = rets[1:])
+
+                frame = pd.DataFrame(rets, index = dates, columns = self.tickers, copy = False)
+                frame.index.name = "Date"
+                self._panels[frequency] = frame
+
+        return self._panels[frequency]
+
+    def timing(self, frequency='daily'):
+        '''
+            Purpose: The number of periods per year used to annualize returns at a frequency.
+        '''
+        return FREQUENCIES[frequency][1]
+
+    def __getitem__(self, frequency):
+        return self.returns(frequency)
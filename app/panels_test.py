@@ -0,0 +1,44 @@
+# import some code we want to test
+
+import numpy as np
+
+from app.benchmarks import synthetic_prices
+from app.manager import frequency_returns
+from app.panels import ReturnPanels
+from app.price_panel import PricePanel
+from app.stats_cache import StatisticsCache
+
+def test_panels_match_resampled_returns():
+    prices = synthetic_prices(4, 2, seed = 1)
+    prices.iloc[:30, 2] = np.nan
+    panels = ReturnPanels(prices)
+
+    for frequency in ['daily', 'monthly', 'quarterly']:
+        expected = frequency_returns(prices, frequency)
+        assert panels[frequency].index.equals(expected.index)
+        assert np.allclose(panels[frequency].values, expected.values, equal_nan = True)
+
+    assert len(panels['monthly']) == 24 and panels.timing('quarterly') == 4
+    assert panels.returns('monthly') is panels.returns('monthly')
+
+def test_statistics_cache_accepts_panels():
+    prices = synthetic_prices(3, 1, seed = 2)
+    panels = ReturnPanels(prices)
+    cache = StatisticsCache()
+
+    monthly = cache.get(panels, 'monthly')
+    assert monthly.rets is panels['monthly']
+    assert cache.get(prices, 'monthly') is monthly
+
+def test_panels_of_a_float32_price_panel():
+    prices = synthetic_prices(5, 2, seed = 3)
+    prices.iloc[40:80, 1] = np.nan
+    panels = ReturnPanels(PricePanel.from_frame(prices))
+    expected = ReturnPanels(prices)
+
+    for frequency in ['daily', 'monthly', 'quarterly']:
+        assert panels[frequency].dtypes.unique().tolist() == [np.float32]
+        assert panels[frequency].index.equals(expected[frequency].index)
+        assert np.allclose(panels[frequency].values, expected[frequency].values, equal_nan = True, atol = 1e-5)
+
+    assert panels.key != expected.key and panels.key == ReturnPanels(PricePanel.from_frame(prices), []).key
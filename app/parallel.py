@@ -0,0 +1,148 @@
+# this is the "app/parallel.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.optimizer import solve_portfolio
+
+#
+# numpy views onto the shared universe statistics, set once per worker process by attach_shared_statistics
+#
+_worker_statistics = {}
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+class SharedStatistics:
+    '''
+        Purpose: Places the universe 'mu' vector and 'VarCov' matrix in one block of shared memory, so worker
+                 processes map the covariance once instead of receiving a pickled copy with every task.
+
+        Params: The universe expected returns 'mu' and covariance matrix 'VarCov' (numpy or pandas).
+    '''
+
+    def __init__(self, mu, VarCov):
+        mu = np.asarray(mu, dtype = float)
+        VarCov = np.asarray(VarCov, dtype = float)
+        self.numOfAssets = len(mu)
+
+        size = (self.numOfAssets + self.numOfAssets * self.numOfAssets) * np.dtype(float).itemsize
+        self.memory = shared_memory.SharedMemory(create = True, size = max(size, 1))
+
+        mu_view, VarCov_view = statistics_views(self.memory.buf, self.numOfAssets)
+        mu_view[:] = mu
+        VarCov_view[:] = VarCov
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def statistics_views(buffer, numOfAssets):
+    '''
+        Purpose: Numpy views of 'mu' and 'VarCov' over a shared memory buffer (no copy).
+
+        Params: The shared memory buffer and the number of assets in the universe.
+
+        Returns: A tuple of the 'mu' and 'VarCov' views.
+    '''
+    flat = np.ndarray((numOfAssets + numOfAssets * numOfAssets,), dtype = float, buffer = buffer)
+    return flat[:numOfAssets], flat[numOfAssets:].reshape(numOfAssets, numOfAssets)
+
+def attach_shared_statistics(name, numOfAssets):
+    '''
+        Purpose: Process pool initializer. Attaches the shared universe statistics once per worker.
+
+        Params: The shared memory block name and the number of assets in the universe.
+    '''
+    memory = shared_memory.SharedMemory(name = name)
+    _worker_statistics['memory'] = memory
+    _worker_statistics['mu'], _worker_statistics['VarCov'] = statistics_views(memory.buf, numOfAssets)
+
+def solve_task(task):
+    '''
+        Purpose: Solves one portfolio construction against the worker's shared universe statistics.
+
+        Params: A tuple of the objective name, the universe positions of the assets, the risk-free rate, the solver method
+                and the initial guess of the weights (or None).
+
+        Returns: A tuple of the weights, objective value, solver used and success flag.
+    '''
+    objective, positions, rf, method, initial_guess = task
+    mu = _worker_statistics['mu'][positions]
+    VarCov = _worker_statistics['VarCov'][np.ix_(positions, positions)]
+
+    result = solve_portfolio(objective, mu, VarCov, rf, method = method, initial_guess = initial_guess)
+    return result['x'], float(result['fun']), result['method'], bool(result['success'])
+
+def optimize_portfolios(tasks, mu, VarCov, rf, max_workers=None, method='auto'):
+    '''
+        Purpose: Runs many minimum-risk / maximum-Sharpe constructions at once across a process pool.
+                 The universe statistics are shared with the workers through shared memory.
+
+        Params: A list of tasks, each a tuple of (objective, tickers), (objective, tickers, rf) or
+                (objective, tickers, rf, initial_guess) to warm start the solver from given weights; the universe 'mu'
+                (a pandas series when tasks name tickers, otherwise tasks give integer positions), the universe 'VarCov',
+                the default risk-free rate 'rf', the number of worker processes and the solver 'method'.
+
+        Returns: A list of scipy OptimizeResult objects in the same order as the tasks.
+    '''
+    labels = list(mu.index) if hasattr(mu, 'index') else None
+    positions_of = {ticker: position for position, ticker in enumerate(labels)} if labels is not None else None
+
+    prepared = []
+    for task in tasks:
+        objective, assets = task[0], list(task[1])
+        task_rf = task[2] if len(task) > 2 and task[2] is not None else rf
+        task_guess = task[3] if len(task) > 3 else None
+        if positions_of is not None:
+            positions = np.array([positions_of[asset] for asset in assets], dtype = int)
+        else:
+            positions = np.array(assets, dtype = int)
+        prepared.append((objective, positions, task_rf, method, task_guess))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    with SharedStatistics(mu, VarCov) as shared:
+        if max_workers <= 1 or len(prepared) <= 1:
+            attach_shared_statistics(shared.name, shared.numOfAssets)
+            try:
+                solutions = [solve_task(task) for task in prepared]
+            finally:
+                memory = _worker_statistics.pop('memory')
+                _worker_statistics.clear()
+                memory.close()
+        else:
+            chunksize = max(1, len(prepared) // (max_workers * 4))
+            with ProcessPoolExecutor(max_workers = max_workers, initializer = attach_shared_statistics,
+                                     initargs = (shared.name, shared.numOfAssets)) as executor:
+                solutions = list(executor.map(solve_task, prepared, chunksize = chunksize))
+
+    from scipy.optimize import OptimizeResult
+
+    results = []
+    for task, (weights, fun, solver, success) in zip(tasks, solutions):
+        results.append(OptimizeResult(x = weights, fun = fun, method = solver, success = success, assets = list(task[1])))
+
+    return results
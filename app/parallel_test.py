@@ -0,0 +1,30 @@
+# import some code we want to test
+
+import numpy as np
+
+from app.optimizer import solve_portfolio
+from app.parallel import optimize_portfolios
+
+def universe(random_universe):
+    rets = random_universe.returns(12, seed = 11, numOfDays = 400, mean = 0.0006)
+    return rets.mean() * 252, rets.cov() * 252
+
+def test_pool_results_match_serial_and_keep_order(random_universe):
+    mu, VarCov = universe(random_universe)
+    tasks = [('minimum_risk', ['T0', 'T3', 'T5']), ('negative_sharpe', ['T1', 'T2', 'T7', 'T9']),
+             ('negative_sharpe', ['T4', 'T0'], 0.03), ('minimum_risk', list(mu.index))]
+
+    results = optimize_portfolios(tasks, mu, VarCov, 0.01, max_workers = 2)
+
+    assert [result['assets'] for result in results] == [list(task[1]) for task in tasks]
+    for task, result in zip(tasks, results):
+        tickers = list(task[1])
+        rf = task[2] if len(task) > 2 else 0.01
+        expected = solve_portfolio(task[0], mu[tickers], VarCov.loc[tickers, tickers], rf)
+        assert np.allclose(result['x'], expected['x'])
+
+def test_single_worker_runs_in_process(random_universe):
+    mu, VarCov = universe(random_universe)
+    results = optimize_portfolios([('minimum_risk', [0, 1, 2])], mu.values, VarCov.values, 0.01, max_workers = 1)
+
+    assert np.isclose(results[0]['x'].sum(), 1)
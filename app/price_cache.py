@@ -0,0 +1,326 @@
+# this is the "app/price_cache.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import json
+import logging
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.price_panel import PricePanel
+from app.providers import PartialDownloadError, ProviderError, default_fetcher
+
+#
+# prices are stored one file per ticker as a structured numpy array of (date, price) rows,
+# which lets repeat runs memory-map the history instead of parsing it again
+#
+PRICE_DTYPE = np.dtype([("date", "M8[D]"), ("price", "f8")])
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "data", "price_cache")
+
+#
+# prices of the last few days may not be published yet: a gap ending this close to today is only marked as cached
+# up to the last price actually returned, so the next run asks for the rest again
+#
+SETTLEMENT_DAYS = 7
+
+logger = logging.getLogger(__name__)
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def read_fixture(fixture_dir, ticker):
+    '''
+        Purpose: Reads a ticker's price history from a local fixture directory. Each ticker is
+                 stored as '<TICKER>.csv' in the Yahoo! Finance export format ('Date' and 'Adj Close' columns).
+
+        Params: The path to the fixture directory and a stock symbol.
+
+        Returns: A pandas series of adjusted close prices indexed by date, or None if there is no fixture.
+    '''
+    if fixture_dir is None:
+        return None
+
+    path = os.path.join(fixture_dir, f"{ticker}.csv")
+    if not os.path.exists(path):
+        return None
+
+    frame = pd.read_csv(path, parse_dates = ["Date"], index_col = "Date")
+    column = "Adj Close" if "Adj Close" in frame.columns else "Close"
+
+    return frame[column].rename(ticker)
+
+
+class PriceCache:
+    '''
+        Purpose: A persistent on-disk store of daily adjusted close prices keyed by ticker and date range.
+                 Repeat requests are served from disk and only the missing ticker/date gaps are fetched.
+
+        Params: 'cache_dir' where price files are kept, an optional 'fixture_dir' of local CSV prices,
+                'offline' to never touch the network, and a 'downloader': a PriceProvider (app/providers.py) or any
+                function of (tickers, start, end) returning prices. Defaults to the concurrent Yahoo! Finance fetcher.
+                Tickers whose download failed (with a ProviderError or a network error) are logged and listed in
+                'failures' with the error, and served from whatever is already on disk. One cache can be shared by
+                several threads (e.g. the risk-free rate downloading next to the portfolio prices): downloads run
+                concurrently, while the price files and the coverage index are updated under a lock.
+    '''
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, fixture_dir=None, offline=False, downloader=None):
+        self.cache_dir = cache_dir
+        self.fixture_dir = fixture_dir
+        self.offline = offline
+        self.downloader = downloader if downloader is not None else default_fetcher()
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._index = None
+        self._lock = threading.RLock()
+        self.failures = {}
+
+    def get(self, tickers, start, end):
+        '''
+            Purpose: Returns adjusted close prices for the tickers over [start, end), fetching any gaps first.
+
+            Params: A list of stock symbols and the 'start' / 'end' dates of the window.
+
+            Returns: A pandas dataframe of prices with one column per ticker, in the order requested.
+        '''
+        columns = {}
+        for ticker, history in self._histories(tickers, start, end).items():
+            columns[ticker] = pd.Series(history["price"], index = pd.DatetimeIndex(history["date"]))
+
+        price_data = pd.DataFrame(columns)
+        price_data.index.name = "Date"
+
+        return price_data.sort_index()
+
+    def get_panel(self, tickers, start, end, dtype=np.float32):
+        '''
+            Purpose: The same prices as get, placed directly into a compact PricePanel (app/price_panel.py) without
+                     building an intermediate float64 dataframe.
+
+            Params: A list of stock symbols, the 'start' / 'end' dates of the window and the panel 'dtype'.
+
+            Returns: A PricePanel with one column per ticker that has data, in the order requested.
+        '''
+        histories = self._histories(tickers, start, end)
+        dates = np.unique(np.concatenate([history["date"] for history in histories.values()])) if histories else \
+            np.array([], dtype = "M8[D]")
+
+        values = np.full((len(dates), len(histories)), np.nan, dtype = dtype, order = "F")
+        for column, history in enumerate(histories.values()):
+            values[np.searchsorted(dates, history["date"]), column] = history["price"]
+
+        return PricePanel(values, dates, histories.keys())
+
+    def _histories(self, tickers, start, end):
+        #
+        # fill any gaps, then slice every ticker's cached (date, price) rows to [start, end)
+        #
+        tickers = list(dict.fromkeys(tickers))
+        start = np.datetime64(pd.Timestamp(start).date(), "D")
+        end = np.datetime64(pd.Timestamp(end).date(), "D")
+
+        self.fill_gaps(tickers, start, end)
+
+        histories = {}
+        for ticker in tickers:
+            history = self._load(ticker)
+            if history is None:
+                continue
+            mask = (history["date"] >= start) & (history["date"] < end)
+            histories[ticker] = history[mask]
+
+        return histories
+
+    def fill_gaps(self, tickers, start, end):
+        '''
+            Purpose: Fetches whatever part of [start, end) is not yet cached for each ticker. Tickers missing
+                     the same date range are downloaded together in one batch.
+
+            Params: A list of stock symbols and the 'start' / 'end' dates as numpy datetime64 values.
+        '''
+        gaps = {}
+        with self._lock:
+            for ticker in tickers:
+                for gap in self._missing_ranges(ticker, start, end):
+                    gaps.setdefault(gap, []).append(ticker)
+
+        for (gap_start, gap_end), gap_tickers in gaps.items():
+            fetched = self._fetch(gap_tickers, gap_start, gap_end)
+            #
+            # another thread may have stored the same ticker meanwhile; _store merges with whatever is on disk
+            #
+            with self._lock:
+                for ticker in gap_tickers:
+                    if ticker in fetched:
+                        self._store(ticker, fetched[ticker], gap_start, gap_end)
+
+        if gaps:
+            with self._lock:
+                self._save_index()
+
+    def _missing_ranges(self, ticker, start, end):
+        covered = self._load_index().get(ticker)
+        if covered is None:
+            return [(start, end)]
+
+        covered_start = np.datetime64(covered[0], "D")
+        covered_end = np.datetime64(covered[1], "D")
+
+        missing = []
+        if start < covered_start:
+            missing.append((start, covered_start))
+        if end > covered_end:
+            missing.append((covered_end, end))
+
+        return missing
+
+    def _fetch(self, tickers, start, end):
+        fetched = {}
+
+        remaining = []
+        for ticker in tickers:
+            fixture = read_fixture(self.fixture_dir, ticker)
+            if fixture is not None:
+                fetched[ticker] = fixture
+            else:
+                remaining.append(ticker)
+
+        if remaining and not self.offline:
+            try:
+                downloaded = self.downloader(remaining, str(start), str(end))
+            except PartialDownloadError as error:
+                #
+                # the fetcher already logged the chunks that failed
+                #
+                self.failures.update(error.failures)
+                downloaded = error.prices
+            except (ProviderError, OSError) as error:
+                #
+                # without network access we keep running from whatever is already on disk; anything else is a bug
+                # and is raised
+                #
+                logger.warning("Could not download prices of %s for [%s, %s): %s", ", ".join(remaining), start, end, error)
+                for ticker in remaining:
+                    self.failures[ticker] = str(error)
+                downloaded = pd.DataFrame()
+
+            for ticker in downloaded.columns:
+                fetched[ticker] = downloaded[ticker]
+
+        return fetched
+
+    def _store(self, ticker, prices, start, end):
+        prices = prices.dropna()
+        dates = prices.index.values.astype("M8[D]")
+        in_range = (dates >= start) & (dates < end)
+
+        new_rows = np.empty(int(in_range.sum()), dtype = PRICE_DTYPE)
+        new_rows["date"] = dates[in_range]
+        new_rows["price"] = prices.values[in_range]
+
+        existing = self._load(ticker)
+        if existing is not None:
+            new_rows = np.concatenate([np.array(existing), new_rows])
+
+        #
+        # keep the first price seen for any date and store rows in date order
+        #
+        _, first = np.unique(new_rows["date"], return_index = True)
+        history = new_rows[first]
+
+        path = self._price_path(ticker)
+        self._write_atomic(path, lambda handle: np.save(handle, history))
+
+        self.failures.pop(ticker, None)
+
+        #
+        # never mark dates as cached that are in the future, or recent dates that did not come back yet
+        #
+        today = np.datetime64(pd.Timestamp.today().date(), "D")
+        end = min(end, today)
+        if end > today - SETTLEMENT_DAYS:
+            end = min(end, dates[in_range].max() + 1 if in_range.any() else start)
+        if end <= start:
+            return
+
+        index = self._load_index()
+        covered = index.get(ticker)
+        if covered is None:
+            index[ticker] = [str(start), str(end)]
+        else:
+            index[ticker] = [str(min(start, np.datetime64(covered[0], "D"))), str(max(end, np.datetime64(covered[1], "D")))]
+
+    def _load(self, ticker):
+        path = self._price_path(ticker)
+        if not os.path.exists(path):
+            return None
+
+        return np.load(path, mmap_mode = "r")
+
+    def _price_path(self, ticker):
+        safe_name = ticker.replace(os.sep, "_")
+        return os.path.join(self.cache_dir, f"{safe_name}.npy")
+
+    def _load_index(self):
+        if self._index is None:
+            if os.path.exists(self._index_path):
+                with open(self._index_path) as handle:
+                    self._index = json.load(handle)
+            else:
+                self._index = {}
+
+        return self._index
+
+    def _save_index(self):
+        self._write_atomic(self._index_path,
+                           lambda handle: handle.write(json.dumps(self._index, indent = 2, sort_keys = True).encode()))
+
+    def _write_atomic(self, path, write):
+        #
+        # every writer gets its own temporary file, so concurrent writers (threads or processes) never rename each
+        # other's half-written files
+        #
+        os.makedirs(self.cache_dir, exist_ok = True)
+        descriptor, temp_path = tempfile.mkstemp(dir = self.cache_dir, prefix = os.path.basename(path), suffix = ".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as handle:
+                write(handle)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def default_cache():
+    '''
+        Purpose: Returns the price cache shared by the application, so every part of a process (e.g. the risk-free rate
+                 and the portfolio prices) reads and updates one coverage index. The location can be changed with the
+                 PORTFOLIO_CACHE_DIR environment variable, PORTFOLIO_FIXTURE_DIR points at a directory of
+                 local CSV prices (e.g. test/MockData), and PORTFOLIO_OFFLINE=1 disables downloads entirely.
+
+        Params: None
+
+        Returns: A PriceCache instance.
+    '''
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PriceCache(
+                cache_dir = os.environ.get("PORTFOLIO_CACHE_DIR", DEFAULT_CACHE_DIR),
+                fixture_dir = os.environ.get("PORTFOLIO_FIXTURE_DIR"),
+                offline = os.environ.get("PORTFOLIO_OFFLINE", "").lower() in ("1", "true", "yes"),
+            )
+    return _default_cache
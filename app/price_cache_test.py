@@ -0,0 +1,105 @@
+# import some code we want to test
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.price_cache import PriceCache
+
+def fake_prices(tickers, start, end):
+    dates = pd.bdate_range(start, end, inclusive = "left")
+    return pd.DataFrame({ticker: np.linspace(10, 20, len(dates)) for ticker in tickers}, index = dates)
+
+def test_repeat_runs_only_fetch_gaps(tmp_path):
+    calls = []
+    def downloader(tickers, start, end):
+        calls.append((sorted(tickers), start, end))
+        return fake_prices(tickers, start, end)
+
+    cache = PriceCache(cache_dir = str(tmp_path), downloader = downloader)
+    first = cache.get(["MSFT", "AAPL"], "2016-01-01", "2016-06-30")
+    assert list(first.columns) == ["MSFT", "AAPL"]
+    assert calls == [(["AAPL", "MSFT"], "2016-01-01", "2016-06-30")]
+
+    #
+    # a new process reading the same directory should not download anything it already has
+    #
+    reopened = PriceCache(cache_dir = str(tmp_path), downloader = downloader)
+    again = reopened.get(["AAPL", "MSFT"], "2016-01-01", "2016-06-30")
+    assert len(calls) == 1
+    assert again["AAPL"].equals(first["AAPL"])
+
+    reopened.get(["AAPL", "NFLX"], "2016-01-01", "2016-12-31")
+    assert calls[1:] == [(["AAPL"], "2016-06-30", "2016-12-31"), (["NFLX"], "2016-01-01", "2016-12-31")]
+
+def test_offline_reads_fixture_directory(tmp_path):
+    fixture_dir = tmp_path / "fixtures"
+    fixture_dir.mkdir()
+    prices = fake_prices(["AAPL"], "2016-01-01", "2016-03-01")
+    prices.rename(columns = {"AAPL": "Adj Close"}).to_csv(fixture_dir / "AAPL.csv", index_label = "Date")
+
+    def downloader(tickers, start, end):
+        raise AssertionError("offline cache must not download")
+
+    cache = PriceCache(cache_dir = str(tmp_path / "cache"), fixture_dir = str(fixture_dir), offline = True, downloader = downloader)
+    price_data = cache.get(["AAPL", "FB"], "2016-01-01", "2016-02-01")
+
+    assert list(price_data.columns) == ["AAPL"]
+    assert price_data.index.max() < pd.Timestamp("2016-02-01")
+    assert np.allclose(price_data["AAPL"].values, prices["AAPL"].values[:len(price_data)])
+
+def test_failed_and_recent_downloads_are_fetched_again(tmp_path, caplog):
+    from app.providers import ProviderError
+
+    calls = []
+    def downloader(tickers, start, end):
+        calls.append((sorted(tickers), start, end))
+        if len(calls) == 1:
+            raise ProviderError("rate limited")
+        return fake_prices(tickers, start, min(end, "2016-03-01"))
+
+    cache = PriceCache(cache_dir = str(tmp_path), downloader = downloader)
+    assert cache.get(["AAPL"], "2016-01-01", "2016-06-30").empty
+    assert cache.failures == {"AAPL": "rate limited"} and "rate limited" in caplog.text
+
+    #
+    # the provider only has prices up to 2016-03-01 and the request runs into the future: only the returned dates
+    # are marked as cached
+    #
+    future = str((pd.Timestamp.today() + pd.Timedelta(days = 30)).date())
+    cache.get(["AAPL"], "2016-01-01", future)
+    assert cache.failures == {}
+    cache.get(["AAPL"], "2016-01-01", future)
+    assert calls[1:] == [(["AAPL"], "2016-01-01", future), (["AAPL"], "2016-03-01", future)]
+
+    def broken(tickers, start, end):
+        raise KeyError("bug")
+
+    with pytest.raises(KeyError):
+        PriceCache(cache_dir = str(tmp_path / "other"), downloader = broken).get(["AAPL"], "2016-01-01", "2016-06-30")
+
+def test_threads_share_one_cache(tmp_path):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    def downloader(tickers, start, end):
+        time.sleep(0.01)
+        return fake_prices(tickers, start, end)
+
+    cache = PriceCache(cache_dir = str(tmp_path), downloader = downloader)
+    tickers = [f"T{number}" for number in range(16)]
+    with ThreadPoolExecutor(max_workers = 8) as executor:
+        list(executor.map(lambda ticker: cache.get([ticker, "^IRX"], "2016-01-01", "2016-06-30"), tickers))
+
+    reopened = PriceCache(cache_dir = str(tmp_path), downloader = fake_prices)
+    assert set(reopened._load_index()) == set(tickers + ["^IRX"])
+    assert not [name for name in tmp_path.iterdir() if name.suffix == ".tmp"]
+
+def test_default_cache_is_shared(tmp_path, monkeypatch):
+    import app.price_cache as price_cache
+
+    monkeypatch.setattr(price_cache, "_default_cache", None)
+    monkeypatch.setenv("PORTFOLIO_CACHE_DIR", str(tmp_path))
+
+    assert price_cache.default_cache() is price_cache.default_cache()
+    assert price_cache.default_cache().cache_dir == str(tmp_path)
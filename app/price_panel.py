@@ -0,0 +1,150 @@
+# this is the "app/price_panel.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+class PricePanel:
+    '''
+        Purpose: A compact dates x tickers panel of adjusted close prices backed by one contiguous numpy array
+                 (float32 by default, half the memory of a float64 dataframe). The array is stored column-major, so
+                 every ticker's history is contiguous: selecting tickers or a date window returns views, and the panel
+                 can be saved and memory-mapped back from disk without reading it into RAM.
+
+        Params: A T x N array of prices 'values', the T 'dates' and the N 'tickers'.
+    '''
+
+    def __init__(self, values, dates, tickers):
+        values = np.asanyarray(values)
+        if not values.flags.f_contiguous:
+            values = np.asfortranarray(values)
+
+        self.values = values
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = list(tickers)
+        self._positions = {ticker: position for position, ticker in enumerate(self.tickers)}
+
+        if values.shape != (len(self.dates), len(self.tickers)):
+            raise ValueError("The price array does not match the dates and tickers.")
+
+    @classmethod
+    def from_frame(cls, price_data, dtype=np.float32):
+        '''
+            Purpose: Builds a panel from a pandas dataframe of prices (e.g. the output of stock_data_retrieval).
+
+            Params: The dataframe and the 'dtype' of the panel (np.float32 or np.float64).
+
+            Returns: A PricePanel.
+        '''
+        values = np.asfortranarray(price_data.to_numpy(dtype = dtype, na_value = np.nan))
+        return cls(values, price_data.index, price_data.columns)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        '''
+            Purpose: Opens a panel written by save. With the default 'mmap_mode' the prices stay on disk and are
+                     paged in as they are read.
+
+            Params: The panel directory and the numpy 'mmap_mode' (None reads the prices into memory).
+
+            Returns: A PricePanel.
+        '''
+        with open(os.path.join(directory, "tickers.json")) as handle:
+            tickers = json.load(handle)
+        dates = np.load(os.path.join(directory, "dates.npy"))
+        values = np.load(os.path.join(directory, "prices.npy"), mmap_mode = mmap_mode)
+        return cls(values, dates, tickers)
+
+    def save(self, directory):
+        '''
+            Purpose: Writes the panel as 'prices.npy' (column-major), 'dates.npy' and 'tickers.json'.
+
+            Params: The directory to write to (created if missing).
+        '''
+        os.makedirs(directory, exist_ok = True)
+        np.save(os.path.join(directory, "prices.npy"), self.values)
+        np.save(os.path.join(directory, "dates.npy"), self.dates.values.astype("M8[D]"))
+        with open(os.path.join(directory, "tickers.json"), "w") as handle:
+            json.dump(self.tickers, handle)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def __len__(self):
+        return len(self.dates)
+
+    def positions(self, tickers):
+        return np.array([self._positions[ticker] for ticker in tickers], dtype = int)
+
+    def column(self, ticker):
+        '''
+            Purpose: One ticker's prices as a contiguous view of the panel.
+        '''
+        return self.values[:, self._positions[ticker]]
+
+    def window(self, start=None, end=None):
+        '''
+            Purpose: The panel restricted to dates in [start, end), as a view.
+
+            Params: The 'start' / 'end' dates (either may be None).
+
+            Returns: A PricePanel.
+        '''
+        first = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side = 'left')
+        last = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side = 'left')
+        return PricePanel(self.values[first:last], self.dates[first:last], self.tickers)
+
+    def to_frame(self, tickers=None):
+        '''
+            Purpose: A pandas dataframe over the panel's memory (no copy), e.g. for fetch_returns. The whole panel
+                     is one block; a subset of tickers is built from the column views.
+
+            Params: An optional list of tickers (all by default).
+
+            Returns: A pandas dataframe of prices indexed by date.
+        '''
+        if tickers is None:
+            frame = pd.DataFrame(self.values, index = self.dates, columns = self.tickers, copy = False)
+        else:
+            tickers = list(tickers)
+            frame = pd.DataFrame({ticker: self.column(ticker) for ticker in tickers}, index = self.dates, copy = False)
+        frame.index.name = "Date"
+        return frame
+
+    def returns(self, tickers=None):
+        '''
+            Purpose: Log returns computed directly from the panel's array (the same values as fetch_returns), in the
+                     panel's dtype. Only the output is allocated.
+
+            Params: An optional list of tickers (all by default).
+
+            Returns: A pandas dataframe of returns with a NaN first row.
+        '''
+        tickers = self.tickers if tickers is None else list(tickers)
+        positions = self.positions(tickers)
+
+        rets = np.empty((len(self.dates), len(tickers)), dtype = self.values.dtype, order = 'F')
+        rets[:1] = np.nan
+        for column, position in enumerate(positions):
+            prices = self.values[:, position]
+            np.divide(prices[1:], prices[:-1], out = rets[1:, column])
+        np.log(rets[1:], out = rets[1:])
+
+        return pd.DataFrame(rets, index = self.dates, columns = tickers, copy = False)
@@ -0,0 +1,39 @@
+# import some code we want to test
+
+import numpy as np
+
+from app.benchmarks import synthetic_prices
+from app.manager import fetch_returns
+from app.price_cache import PriceCache
+from app.price_panel import PricePanel
+
+def test_memory_mapped_panel_round_trip(tmp_path):
+    price_data = synthetic_prices(6, 1, seed = 4)
+    price_data.iloc[:10, 3] = np.nan
+    panel = PricePanel.from_frame(price_data)
+    assert panel.values.dtype == np.float32 and panel.nbytes == price_data.values.nbytes // 2
+
+    panel.save(str(tmp_path / "panel"))
+    mapped = PricePanel.load(str(tmp_path / "panel"))
+    assert isinstance(mapped.values, np.memmap)
+    assert mapped.tickers == panel.tickers and mapped.dates.equals(price_data.index)
+
+    #
+    # ticker subsets are views of the mapped file, and returns match fetch_returns
+    #
+    subset = mapped.to_frame(["SYN0003", "SYN0001"])
+    assert all(np.shares_memory(subset[ticker].values, mapped.values) for ticker in subset.columns)
+    expected = fetch_returns(price_data[["SYN0003", "SYN0001"]])
+    assert np.allclose(mapped.returns(["SYN0003", "SYN0001"]).values, expected.values, equal_nan = True, atol = 1e-6)
+    assert np.allclose(fetch_returns(subset).values, expected.values, equal_nan = True, atol = 1e-6)
+
+def test_cache_builds_panel_directly(tmp_path):
+    price_data = synthetic_prices(3, 1, seed = 5)
+    cache = PriceCache(cache_dir = str(tmp_path), downloader = lambda tickers, *window: price_data[tickers])
+
+    panel = cache.get_panel(["SYN0002", "SYN0000"], "2000-01-01", "2000-07-01", dtype = np.float64)
+    frame = cache.get(["SYN0002", "SYN0000"], "2000-01-01", "2000-07-01")
+
+    assert panel.tickers == ["SYN0002", "SYN0000"]
+    assert np.array_equal(panel.values, frame.values) and panel.dates.equals(frame.index)
+    assert len(panel.window("2000-02-01", "2000-03-01")) == 21
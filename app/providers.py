@@ -0,0 +1,267 @@
+# this is the "app/providers.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+class ProviderError(Exception):
+    '''
+        Purpose: Raised by a provider when prices cannot be downloaded (network failure, rate limit, outage), as
+                 opposed to a bug in the caller. The price cache keeps running from disk on these errors only.
+    '''
+
+
+class PartialDownloadError(ProviderError):
+    '''
+        Purpose: Raised by ConcurrentFetcher when some chunks could not be downloaded. The prices of the chunks that
+                 came back are in 'prices' and the error of every ticker that did not in 'failures'.
+
+        Params: The pandas dataframe of prices and the dictionary of ticker to error message.
+    '''
+
+    def __init__(self, prices, failures):
+        super().__init__(f"no prices for {', '.join(failures)}")
+        self.prices = prices
+        self.failures = failures
+
+
+#
+# errors worth retrying: provider failures and network errors (requests and urllib raise OSError subclasses);
+# anything else is a bug and is raised at once
+#
+RETRYABLE_ERRORS = (ProviderError, OSError)
+
+
+class PriceProvider:
+    '''
+        Purpose: The interface of a source of daily adjusted close prices. Providers are callables, so they can be
+                 passed anywhere a downloader function is expected (e.g. PriceCache(downloader=...)).
+
+        Params: None
+    '''
+
+    def download(self, tickers, start, end):
+        '''
+            Purpose: Downloads daily adjusted close prices.
+
+            Params: A list of stock symbols and the 'start' / 'end' dates of the window (end is exclusive).
+
+            Returns: A pandas dataframe of prices indexed by date with one column per ticker that has data.
+        '''
+        raise NotImplementedError
+
+    def __call__(self, tickers, start, end):
+        return self.download(tickers, start, end)
+
+
+class YahooProvider(PriceProvider):
+    '''
+        Purpose: Prices from the Yahoo! Finance API (yfinance). Each chunk of tickers is one multi-ticker yf.download
+                 call, which fetches the tickers of the chunk concurrently itself. yf.download keeps module-level state
+                 and is not safe to call from several threads, so only one call runs at a time: chunks handed over by
+                 several threads wait for each other instead of downloading in parallel.
+
+        Params: None
+    '''
+
+    _lock = threading.Lock()
+
+    def download(self, tickers, start, end):
+        import yfinance as yf
+
+        tickers = list(tickers)
+        with self._lock:
+            try:
+                history = yf.download(tickers, start = start, end = end, auto_adjust = False, group_by = 'column',
+                                      threads = True, progress = False)
+            except Exception as error:
+                raise ProviderError(f"Yahoo! Finance download of {', '.join(tickers)} failed: {error}") from error
+
+        #
+        # an invalid symbol comes back as an empty column and should not sink the rest of its chunk, but a chunk
+        # where every ticker failed is retried
+        #
+        if history is None or history.empty:
+            raise ProviderError(f"Yahoo! Finance returned no prices for {', '.join(tickers)}")
+
+        prices = history["Adj Close"]
+        if isinstance(prices, pd.Series):
+            prices = prices.to_frame(tickers[0])
+        if prices.index.tz is not None:
+            prices.index = prices.index.tz_localize(None)
+
+        prices = prices.dropna(axis = 1, how = 'all')
+        if prices.empty:
+            raise ProviderError(f"Yahoo! Finance returned no prices for {', '.join(tickers)}")
+
+        return prices[[ticker for ticker in tickers if ticker in prices.columns]]
+
+
+class FileProvider(PriceProvider):
+    '''
+        Purpose: Prices from a local directory of '<TICKER>.csv' files in the Yahoo! Finance export format
+                 ('Date' and 'Adj Close' columns), e.g. for tests and offline runs.
+
+        Params: The path to the directory.
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def download(self, tickers, start, end):
+        from app.price_cache import read_fixture
+
+        columns = {}
+        for ticker in tickers:
+            prices = read_fixture(self.directory, ticker)
+            if prices is not None:
+                columns[ticker] = prices[(prices.index >= pd.Timestamp(start)) & (prices.index < pd.Timestamp(end))]
+
+        return pd.DataFrame(columns)
+
+
+class RateLimiter:
+    '''
+        Purpose: Spaces out calls made from several threads so that at most one starts every 'min_interval' seconds.
+
+        Params: The minimum number of seconds between calls.
+    '''
+
+    def __init__(self, min_interval=0.0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_call = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._next_call - now)
+            self._next_call = max(now, self._next_call) + self.min_interval
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ConcurrentFetcher(PriceProvider):
+    '''
+        Purpose: Wraps a provider to split large ticker lists into chunks that are downloaded concurrently on a
+                 thread pool, rate limited and retried with exponential backoff, then merged into one date-aligned frame.
+
+        Params: The underlying 'provider', the number of tickers per request ('chunk_size'), the number of concurrent
+                requests ('max_workers'), the number of 'retries' per chunk, the initial 'backoff' in seconds (doubled
+                after every failure) and the minimum seconds between requests ('min_interval').
+    '''
+
+    def __init__(self, provider, chunk_size=100, max_workers=4, retries=3, backoff=1.0, min_interval=0.0):
+        self.provider = provider
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(min_interval)
+        self._executor = ThreadPoolExecutor(max_workers = max_workers)
+
+    def submit(self, function, *args):
+        '''
+            Purpose: Runs any function on the fetcher's thread pool, e.g. to download the risk-free rate while prices load.
+
+            Params: The function and its arguments.
+
+            Returns: A concurrent.futures.Future.
+        '''
+        return self._executor.submit(function, *args)
+
+    def download(self, tickers, start, end):
+        tickers = list(dict.fromkeys(tickers))
+        chunks = [tickers[position:position + self.chunk_size] for position in range(0, len(tickers), self.chunk_size)]
+
+        #
+        # chunks run on a dedicated pool so that a download submitted from the shared pool cannot wait on itself
+        #
+        with ThreadPoolExecutor(max_workers = min(self.max_workers, max(1, len(chunks)))) as executor:
+            futures = [executor.submit(self.download_chunk, chunk, start, end) for chunk in chunks]
+
+            frames = []
+            failures = {}
+            for chunk, future in zip(chunks, futures):
+                try:
+                    frames.append(future.result())
+                except RETRYABLE_ERRORS as error:
+                    failures.update(dict.fromkeys(chunk, str(error)))
+                    last_error = error
+
+        #
+        # when every chunk failed the error is the caller's to report; when only some did, the failed chunks are
+        # logged here and named in a PartialDownloadError next to the prices that came back
+        #
+        if failures and not frames:
+            raise last_error
+
+        frames = [frame for frame in frames if not frame.empty]
+        prices = pd.DataFrame()
+        if frames:
+            prices = pd.concat(frames, axis = 1, join = 'outer').sort_index()
+            prices = prices.loc[:, ~prices.columns.duplicated()]
+            prices = prices[[ticker for ticker in tickers if ticker in prices.columns]]
+
+        if failures:
+            logger.warning("Could not download prices of %s for [%s, %s): %s", ", ".join(failures), start, end, last_error)
+            raise PartialDownloadError(prices, failures)
+
+        return prices
+
+    def download_chunk(self, tickers, start, end):
+        '''
+            Purpose: Downloads one chunk of tickers, retrying provider and network errors (RETRYABLE_ERRORS) with
+                     exponential backoff.
+
+            Params: A list of stock symbols and the 'start' / 'end' dates of the window.
+
+            Returns: A pandas dataframe of prices.
+        '''
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait()
+            try:
+                return self.provider.download(tickers, start, end)
+            except RETRYABLE_ERRORS:
+                if attempt == self.retries:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+
+#
+# the fetcher used by the application: Yahoo! Finance, 100 tickers per chunk. yf.download runs one call at a time
+# (see YahooProvider), so chunks are fetched one after another and yfinance's own threads download the tickers of a
+# chunk concurrently
+#
+_default_fetcher = None
+
+def default_fetcher():
+    '''
+        Purpose: Returns the application's shared ConcurrentFetcher around the Yahoo! Finance provider.
+
+        Params: None
+
+        Returns: A ConcurrentFetcher instance.
+    '''
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = ConcurrentFetcher(YahooProvider(), chunk_size = 100, max_workers = 1)
+    return _default_fetcher
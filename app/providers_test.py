@@ -0,0 +1,112 @@
+# import some code we want to test
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.providers import ConcurrentFetcher, FileProvider, PriceProvider
+
+class FakeProvider(PriceProvider):
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = []
+
+    def download(self, tickers, start, end):
+        self.calls.append(list(tickers))
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("rate limited")
+        dates = pd.bdate_range(start, end, inclusive = "left")
+        return pd.DataFrame({ticker: np.linspace(10, 20, len(dates)) for ticker in tickers}, index = dates)
+
+def test_chunks_are_merged_in_requested_order():
+    provider = FakeProvider()
+    fetcher = ConcurrentFetcher(provider, chunk_size = 2, max_workers = 3, backoff = 0)
+    tickers = ["MSFT", "AAPL", "NFLX", "AMZN", "GOOG"]
+
+    prices = fetcher.download(tickers, "2016-01-01", "2016-02-01")
+
+    assert list(prices.columns) == tickers
+    assert sorted(map(len, provider.calls)) == [1, 2, 2]
+    assert prices.notna().all().all()
+
+def test_failed_chunks_are_retried():
+    provider = FakeProvider(failures = 2)
+    fetcher = ConcurrentFetcher(provider, chunk_size = 10, retries = 3, backoff = 0)
+    prices = fetcher.download(["AAPL"], "2016-01-01", "2016-02-01")
+    assert list(prices.columns) == ["AAPL"]
+    assert len(provider.calls) == 3
+
+    #
+    # once the retries are used up the last error is raised
+    #
+    fetcher = ConcurrentFetcher(FakeProvider(failures = 5), retries = 1, backoff = 0)
+    with pytest.raises(ConnectionError):
+        fetcher.download(["AAPL"], "2016-01-01", "2016-02-01")
+
+def test_file_provider_filters_window(tmp_path):
+    dates = pd.bdate_range("2016-01-01", "2016-03-01")
+    pd.DataFrame({"Adj Close": np.arange(len(dates), dtype = float)}, index = dates).to_csv(tmp_path / "AAPL.csv", index_label = "Date")
+
+    prices = FileProvider(str(tmp_path))(["AAPL", "MISSING"], "2016-02-01", "2016-03-01")
+
+    assert list(prices.columns) == ["AAPL"]
+    assert prices.index.min() >= pd.Timestamp("2016-02-01")
+    assert prices.index.max() < pd.Timestamp("2016-03-01")
+
+def test_yahoo_provider_downloads_each_chunk_at_once(monkeypatch):
+    import yfinance as yf
+
+    from app.providers import ProviderError, YahooProvider
+
+    calls = []
+    def download(tickers, start, end, **options):
+        calls.append(list(tickers))
+        dates = pd.bdate_range(start, end, inclusive = "left")
+        columns = pd.MultiIndex.from_product([["Adj Close", "Close"], tickers], names = ["Price", "Ticker"])
+        history = pd.DataFrame(np.linspace(10, 20, len(dates))[:, None].repeat(len(columns), axis = 1),
+                               index = dates, columns = columns)
+        if "MISSING" in tickers:
+            history.loc[:, (slice(None), "MISSING")] = np.nan
+        return history
+
+    monkeypatch.setattr(yf, "download", download)
+    fetcher = ConcurrentFetcher(YahooProvider(), chunk_size = 2, backoff = 0)
+    prices = fetcher.download(["AAPL", "MISSING", "MSFT"], "2016-01-01", "2016-02-01")
+
+    assert sorted(calls) == [["AAPL", "MISSING"], ["MSFT"]]
+    assert list(prices.columns) == ["AAPL", "MSFT"]
+
+    with pytest.raises(ProviderError):
+        YahooProvider()(["MISSING"], "2016-01-01", "2016-02-01")
+
+def test_partial_failures_are_reported_and_bugs_are_not_retried(tmp_path, caplog):
+    from app.price_cache import PriceCache
+    from app.providers import PartialDownloadError
+
+    class FlakyProvider(FakeProvider):
+        def download(self, tickers, start, end):
+            if "NFLX" in tickers:
+                self.calls.append(list(tickers))
+                raise TimeoutError("read timed out")
+            return super().download(tickers, start, end)
+
+    fetcher = ConcurrentFetcher(FlakyProvider(), chunk_size = 2, retries = 1, backoff = 0)
+    with pytest.raises(PartialDownloadError) as raised:
+        fetcher.download(["AAPL", "MSFT", "NFLX"], "2016-01-01", "2016-02-01")
+    assert list(raised.value.prices.columns) == ["AAPL", "MSFT"] and list(raised.value.failures) == ["NFLX"]
+    assert "NFLX" in caplog.text
+
+    cache = PriceCache(cache_dir = str(tmp_path), downloader = fetcher)
+    assert list(cache.get(["AAPL", "MSFT", "NFLX"], "2016-01-01", "2016-02-01").columns) == ["AAPL", "MSFT"]
+    assert list(cache.failures) == ["NFLX"]
+
+    class BrokenProvider(FakeProvider):
+        def download(self, tickers, start, end):
+            self.calls.append(list(tickers))
+            raise KeyError("Adj Close")
+
+    broken = BrokenProvider()
+    with pytest.raises(KeyError):
+        ConcurrentFetcher(broken, retries = 3, backoff = 0).download(["AAPL"], "2016-01-01", "2016-02-01")
+    assert len(broken.calls) == 1
@@ -0,0 +1,227 @@
+# this is the "app/result_cache.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.covariance import FactorCovariance
+
+#
+# the fields of a solver result that are stored; the weights 'x' are kept as an array, the others as JSON
+#
+RESULT_FIELDS = ('fun', 'success', 'nit', 'method', 'message')
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def hash_value(digest, value):
+    '''
+        Purpose: Adds one input of a construction to a running hash: arrays by dtype, shape and bytes, a
+                 FactorCovariance by its three components, anything else by its JSON (or repr) text.
+
+        Params: A hashlib digest and the value.
+    '''
+    if isinstance(value, FactorCovariance):
+        for part in (value.loadings, value.factor_variances, value.specific_variances):
+            hash_value(digest, part)
+        return
+
+    if hasattr(value, 'values') and hasattr(value, 'index'):
+        value = value.values
+
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        value = np.ascontiguousarray(value, dtype = float)
+        digest.update(f"array{value.shape}".encode())
+        digest.update(value.tobytes())
+        return
+
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    digest.update(json.dumps(value, sort_keys = True, default = repr).encode())
+
+def result_key(objective, mu, VarCov, rf, **options):
+    '''
+        Purpose: The content address of a portfolio construction: a hash of the objective, 'mu', 'VarCov', 'rf' and
+                 every solver option (method, initial guess, scenarios, confidence, constraints), so two requests share
+                 a key exactly when the solver would receive the same inputs.
+
+        Params: The objective name, 'mu', 'VarCov' (dense or FactorCovariance), the risk-free rate and the solver options
+                given to solve_portfolio. Options that are None are left out. PortfolioConstraints are hashed by their
+                fields.
+
+        Returns: A hex digest.
+    '''
+    digest = hashlib.sha1()
+    hash_value(digest, objective)
+    hash_value(digest, mu)
+    hash_value(digest, VarCov)
+    hash_value(digest, float(rf))
+
+    for name in sorted(options):
+        value = options[name]
+        if value is None:
+            continue
+        digest.update(name.encode())
+        if hasattr(value, '__dict__') and not isinstance(value, FactorCovariance):
+            for field in sorted(vars(value)):
+                digest.update(field.encode())
+                hash_value(digest, getattr(value, field))
+        else:
+            hash_value(digest, value)
+
+    return digest.hexdigest()
+
+
+def cacheable(result):
+    '''
+        Purpose: Whether a solver result may be stored: it converged and its weights and objective value are finite
+                 (a degenerate problem can report success with an undefined objective).
+
+        Params: A scipy OptimizeResult.
+    '''
+    return bool(result['success']) and np.isfinite(result['fun']) and bool(np.all(np.isfinite(result['x'])))
+
+
+class ResultCache:
+    '''
+        Purpose: A content-addressed cache of solved portfolio constructions (see result_key). The most recently used
+                 'maxsize' results are kept in memory; with a 'cache_dir' every result is also written to disk, one
+                 small .npz file per key, so separate runs (batch jobs, service restarts) reuse each other's solutions.
+                 The disk tier keeps at most 'max_files' results and drops the oldest ones first.
+
+        Params: The number of results kept in memory, an optional directory for the disk tier and its size bound.
+    '''
+
+    def __init__(self, maxsize=256, cache_dir=None, max_files=10000):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.max_files = max_files
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._files = None
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok = True)
+
+    def get(self, key):
+        '''
+            Purpose: Looks a construction up in memory, then on disk (promoting a disk hit into memory).
+
+            Params: The key from result_key.
+
+            Returns: A fresh scipy OptimizeResult (its weights may be modified by the caller), or None on a miss.
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            else:
+                entry = self._read(key)
+                if entry is not None:
+                    self._remember(key, entry)
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        from scipy.optimize import OptimizeResult
+
+        weights, fields = entry
+        return OptimizeResult(x = weights.copy(), **fields)
+
+    def put(self, key, result):
+        '''
+            Purpose: Stores a solved construction.
+
+            Params: The key from result_key and the scipy OptimizeResult.
+        '''
+        fields = {name: result[name] for name in RESULT_FIELDS if name in result}
+        fields = json.loads(json.dumps(fields, default = lambda value: value.item() if hasattr(value, 'item') else str(value)))
+        entry = (np.array(result['x'], dtype = float), fields)
+
+        with self._lock:
+            self._remember(key, entry)
+            self._write(key, entry)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last = False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _read(self, key):
+        if self.cache_dir is None or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with np.load(self._path(key), allow_pickle = False) as stored:
+                return stored['x'], json.loads(str(stored['fields']))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, key, entry):
+        if self.cache_dir is None:
+            return
+
+        #
+        # written under a temporary name and renamed, so a concurrent reader never sees a partial file
+        #
+        weights, fields = entry
+        temporary = os.path.join(self.cache_dir, f".{key}.{os.getpid()}.{threading.get_ident()}.npz")
+        np.savez(temporary, x = weights, fields = np.array(json.dumps(fields)))
+        os.replace(temporary, self._path(key))
+
+        if self._files is None:
+            self._files = sum(name.endswith(".npz") and not name.startswith(".") for name in os.listdir(self.cache_dir))
+        else:
+            self._files += 1
+
+        if self._files > self.max_files:
+            self._evict_files()
+
+    def _evict_files(self):
+        #
+        # drop the oldest tenth of the files at once, so the directory is listed only once per many writes
+        #
+        paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                 if name.endswith(".npz") and not name.startswith(".")]
+        paths.sort(key = os.path.getmtime)
+        remove = len(paths) - int(self.max_files * 0.9)
+        for path in paths[:max(remove, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._files = len(paths) - max(remove, 0)
+
+#
+# the cache shared by batch runs within one process
+#
+default_result_cache = ResultCache()
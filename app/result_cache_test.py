@@ -0,0 +1,72 @@
+# import some code we want to test
+
+import numpy as np
+
+from app.instrumentation import instrumented
+from app.optimizer import solve_portfolio
+from app.result_cache import ResultCache, result_key
+
+def test_solve_portfolio_reuses_cached_results(random_universe):
+    mu, VarCov = random_universe.statistics(20, seed = 1, mean = 0.0003, drift = 0.0002, numOfFactors = 3)
+    cache = ResultCache(maxsize = 2)
+
+    with instrumented() as trace:
+        first = solve_portfolio('negative_sharpe', mu, VarCov, 0.01, result_cache = cache)
+        first['x'][:] = 0.0
+        second = solve_portfolio('negative_sharpe', mu, VarCov, 0.01, result_cache = cache)
+        solve_portfolio('negative_sharpe', mu, VarCov, 0.02, result_cache = cache)
+
+    assert np.isclose(second['x'].sum(), 1) and second['method'] == 'qp'
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert trace.summary()['result_cache']['hit_rate'] == 1 / 3
+
+    assert result_key('minimum_risk', mu, VarCov, 0.01) == result_key('minimum_risk', mu.copy(), VarCov.copy(), 0.01)
+    assert result_key('minimum_risk', mu, VarCov, 0.01) != result_key('minimum_risk', mu, VarCov, 0.01, method = 'slsqp')
+
+def test_disk_tier_is_shared_and_bounded(tmp_path, random_universe):
+    mu, VarCov = random_universe.statistics(10, seed = 2, mean = 0.0003, drift = 0.0002, numOfFactors = 3)
+    solve_portfolio('minimum_risk', mu, VarCov, 0.01, result_cache = ResultCache(cache_dir = str(tmp_path)))
+
+    restarted = ResultCache(cache_dir = str(tmp_path))
+    result = solve_portfolio('minimum_risk', mu, VarCov, 0.01, result_cache = restarted)
+    assert restarted.hits == 1 and np.isclose(result['x'].sum(), 1) and result['method'] == 'qp'
+
+    bounded = ResultCache(maxsize = 1, cache_dir = str(tmp_path / "bounded"), max_files = 5)
+    for rf in np.linspace(0.0, 0.02, 8):
+        solve_portfolio('negative_sharpe', mu, VarCov, rf, result_cache = bounded)
+    assert len(bounded) == 1 and len(list((tmp_path / "bounded").iterdir())) <= 5
+
+def test_pool_solutions_share_the_cache_and_undefined_results_are_not_stored(tmp_path):
+    from scipy.optimize import OptimizeResult
+
+    from app.batch import load_client_requests, run_batch
+    from app.batch_test import fake_prices
+    from app.price_cache import PriceCache
+    from app.result_cache import cacheable
+
+    cache = PriceCache(cache_dir = str(tmp_path), downloader = fake_prices)
+    requests = load_client_requests('test/MockData/mock_client_requests.csv')
+
+    results = ResultCache()
+    pooled = run_batch(requests, cache = cache, rf = 0.01, workers = 2, result_cache = results)
+    assert (results.hits, len(results)) == (0, 2)
+
+    serial = run_batch(requests, cache = cache, rf = 0.01, result_cache = results)
+    assert results.hits == 2
+    assert [result['weights'] for result in serial[:2]] == [result['weights'] for result in pooled[:2]]
+
+    assert not cacheable(OptimizeResult(x = np.array([0.5, 0.5]), fun = np.nan, success = True))
+    assert not cacheable(OptimizeResult(x = np.array([np.nan, 1.0]), fun = 0.1, success = True))
+
+def test_warm_starts_share_convex_constructions(random_universe):
+    mu, VarCov = random_universe.statistics(20, seed = 3, mean = 0.0003, drift = 0.0002, numOfFactors = 3)
+    cache = ResultCache()
+    first, second = np.full(20, 1 / 20), np.random.default_rng(3).dirichlet(np.ones(20))
+
+    solve_portfolio('negative_sharpe', mu, VarCov, 0.01, initial_guess = first, result_cache = cache)
+    shared = solve_portfolio('negative_sharpe', mu, VarCov, 0.01, initial_guess = second, result_cache = cache)
+    assert cache.hits == 1 and shared['method'] == 'qp'
+
+    solve_portfolio('risk_parity', mu, VarCov, 0.01, initial_guess = first, result_cache = cache)
+    solve_portfolio('risk_parity', mu, VarCov, 0.01, initial_guess = second, result_cache = cache)
+    assert cache.hits == 1
@@ -0,0 +1,158 @@
+# this is the "app/risk_free.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.price_cache import default_cache
+
+#
+# the 13-week Treasury bill yield, quoted in percent per year
+#
+RISK_FREE_TICKER = "^IRX"
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+class RiskFreeService:
+    '''
+        Purpose: Serves the risk-free rate from the ^IRX yield. The yield history is kept in the on-disk price cache,
+                 so it is downloaded once and later windows only fetch the missing dates, and every window already
+                 loaded in this process is kept in memory (and serves any window inside it). The rate can be taken as the daily yield series, as a
+                 per-period rate aligned to a return panel's dates or as one annualized scalar.
+
+        Params: An optional PriceCache (defaults to the application cache) and the yield 'ticker'.
+    '''
+
+    def __init__(self, cache=None, ticker=RISK_FREE_TICKER):
+        self.cache = cache
+        self.ticker = ticker
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def series(self, start="2016-01-01", end="2018-12-31"):
+        '''
+            Purpose: The daily annualized risk-free yield as a decimal (e.g. 0.015 for 1.5%).
+
+            Params: The 'start' / 'end' dates of the window.
+
+            Returns: A pandas series indexed by date. Raises ValueError when no yields are available.
+        '''
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        key = (str(start.date()), str(end.date()))
+
+        with self._lock:
+            covering = self._covering(start, end)
+            if covering is not None:
+                return covering
+
+            if key not in self._series:
+                if self.cache is None:
+                    self.cache = default_cache()
+                prices = self.cache.get([self.ticker], start, end)
+                if self.ticker not in prices.columns or prices[self.ticker].dropna().empty:
+                    raise ValueError(f"No {self.ticker} risk-free rate data between {key[0]} and {key[1]}.")
+                self._series[key] = (prices[self.ticker].dropna() / 100).rename('rf')
+
+        return self._series[key]
+
+    def _covering(self, start, end):
+        #
+        # a window already loaded that contains [start, end) is sliced instead of going back to the cache
+        #
+        for (first, last), yields in self._series.items():
+            if pd.Timestamp(first) <= start and end <= pd.Timestamp(last):
+                window = yields[(yields.index >= start) & (yields.index < end)]
+                if not window.empty:
+                    return window
+        return None
+
+    def _loaded_end(self, start):
+        ends = [pd.Timestamp(last) for first, last in self._series if pd.Timestamp(first) <= start < pd.Timestamp(last)]
+        return max(ends) if ends else None
+
+    def annual_rate(self, start="2016-01-01", end="2018-12-31"):
+        '''
+            Purpose: The average annualized risk-free rate over a window.
+
+            Params: The 'start' / 'end' dates of the window.
+
+            Returns: A float.
+        '''
+        return float(self.series(start, end).mean())
+
+    def rates(self, index, timing=252):
+        '''
+            Purpose: The per-period risk-free rate for each date of a return panel: the latest yield known on that date
+                     (the last quote of the period for monthly or quarterly returns) divided by the number of periods
+                     per year.
+
+            Params: The return dates (e.g. rets.index) and the 'timing' of the returns (252, 12 or 4).
+
+            Returns: A pandas series indexed by the return dates.
+        '''
+        index = pd.DatetimeIndex(index)
+        start, end = index.min().normalize(), index.max().normalize() + pd.Timedelta(days = 1)
+
+        #
+        # monthly and quarterly returns are labelled with the period end, which can fall after the end of the price
+        # window (e.g. 2018-12-31 for a window ending on that date); the yields already loaded for the window are
+        # then used rather than fetching past it
+        #
+        with self._lock:
+            loaded_end = self._loaded_end(start)
+        if loaded_end is not None and loaded_end < end <= loaded_end + pd.Timedelta(days = 366 // timing + 1):
+            end = loaded_end
+
+        yields = self.series(start, end)
+
+        positions = yields.index.searchsorted(index, side = 'right') - 1
+        aligned = np.where(positions >= 0, yields.values[np.clip(positions, 0, None)], yields.values[0])
+        return pd.Series(aligned / timing, index = index, name = 'rf')
+
+    def annualized(self, index, timing=252):
+        '''
+            Purpose: The annualized risk-free rate over exactly the dates of a return panel, consistent with
+                     annualizing the mean return (rets.mean() * timing). This is the scalar 'rf' of negative_sharpe.
+
+            Params: The return dates and the 'timing' of the returns.
+
+            Returns: A float.
+        '''
+        return float(self.rates(index, timing).mean() * timing)
+
+    def excess_returns(self, rets, timing=252):
+        '''
+            Purpose: Returns in excess of the per-period risk-free rate, in one vectorized subtraction.
+
+            Params: A pandas dataframe of returns and their 'timing'.
+
+            Returns: A pandas dataframe of the same shape.
+        '''
+        return rets.sub(self.rates(rets.index, timing), axis = 0)
+
+#
+# the service shared within one process, so every analysis and batch in a run uses one fetch of the yields
+#
+_default_risk_free = None
+
+def default_risk_free():
+    '''
+        Purpose: Returns the application's shared RiskFreeService.
+
+        Params: None
+
+        Returns: A RiskFreeService instance.
+    '''
+    global _default_risk_free
+    if _default_risk_free is None:
+        _default_risk_free = RiskFreeService()
+    return _default_risk_free
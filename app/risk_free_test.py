@@ -0,0 +1,70 @@
+# import some code we want to test
+
+import numpy as np
+import pandas as pd
+
+from app.manager import fetch_RiskFreeRate, frequency_returns
+from app.price_cache import PriceCache
+from app.risk_free import RiskFreeService
+
+def risk_free_service(tmp_path, calls):
+    def downloader(tickers, start, end):
+        calls.append((list(tickers), start, end))
+        dates = pd.bdate_range(start, end, inclusive = "left")
+        return pd.DataFrame({"^IRX": np.linspace(1.0, 2.0, len(dates))}, index = dates)
+
+    return RiskFreeService(PriceCache(cache_dir = str(tmp_path), downloader = downloader))
+
+def test_yields_are_fetched_once_and_annualized(tmp_path):
+    calls = []
+    service = risk_free_service(tmp_path, calls)
+
+    rf = fetch_RiskFreeRate("2016-01-01", "2018-12-31", service = service)
+    assert np.isclose(rf, 0.015)
+    assert np.isclose(service.annual_rate("2016-01-01", "2018-12-31"), rf)
+    assert calls == [(["^IRX"], "2016-01-01", "2018-12-31")]
+
+def test_rates_align_to_monthly_returns(tmp_path):
+    service = risk_free_service(tmp_path, [])
+    dates = pd.bdate_range("2016-01-01", "2016-12-31")
+    price_data = pd.DataFrame({"AAPL": np.linspace(100, 120, len(dates))}, index = dates)
+    rets = frequency_returns(price_data, 'monthly').dropna()
+
+    rates = service.rates(rets.index, 12)
+    yields = service.series("2016-01-01", "2017-01-01")
+    assert rates.index.equals(rets.index)
+    assert np.isclose(rates.iloc[-1], yields.iloc[-1] / 12)
+
+    excess = service.excess_returns(rets, 12)
+    assert np.allclose(excess["AAPL"].values, rets["AAPL"].values - rates.values)
+    assert np.isclose(service.annualized(rets.index, 12), rates.mean() * 12)
+
+def test_period_end_labels_use_the_loaded_window(tmp_path):
+    calls = []
+    service = risk_free_service(tmp_path, calls)
+    service.series("2016-01-01", "2018-12-31")
+
+    dates = pd.bdate_range("2016-01-01", "2018-12-31", inclusive = "left")
+    price_data = pd.DataFrame({"AAPL": np.linspace(100, 120, len(dates))}, index = dates)
+    rets = frequency_returns(price_data, 'quarterly').dropna()
+    assert rets.index[-1] == pd.Timestamp("2018-12-31")
+
+    rates = service.rates(rets.index, 4)
+    assert len(calls) == 1 and np.isclose(rates.iloc[-1], service.series("2016-01-01", "2018-12-31").iloc[-1] / 4)
+    assert service.series("2017-01-01", "2018-01-01").index[0] >= pd.Timestamp("2017-01-01") and len(calls) == 1
+
+def test_batch_rate_follows_the_cache_and_frequency(tmp_path):
+    from app.batch import run_batch
+
+    calls = []
+    service = risk_free_service(tmp_path, calls)
+    request = {'client_id': '1', 'tickers': '^IRX', 'approach': 'integrative', 'portfolio': '1', 'frequency': 'monthly'}
+
+    result = run_batch([request], cache = service.cache)[0]
+    batch_calls = list(calls)
+    monthly = frequency_returns(service.cache.get(["^IRX"], "2016-01-01", "2018-12-31"), 'monthly').dropna(how = 'all')
+
+    expected = service.annualized(monthly.index, 12)
+    sharpe = (monthly["^IRX"].mean() * 12 - expected) / (monthly["^IRX"].std() * np.sqrt(12))
+    assert np.isclose(result['sharpe_ratio'], sharpe, atol = 0.05)
+    assert batch_calls and all(tickers == ["^IRX"] and end == "2018-12-31" for tickers, _, end in batch_calls)
@@ -0,0 +1,173 @@
+# this is the "app/rolling.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import numpy as np
+import pandas as pd
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+class RollingMoments:
+    '''
+        Purpose: Incrementally maintained mean vector and covariance matrix of asset returns. Each new observation
+                 costs O(N^2) (a rank-one update) instead of recomputing the covariance over the whole window.
+
+                 Three weighting schemes are supported:
+                   - expanding (default): every observation so far, with Welford's update
+                   - 'window': the last 'window' observations; the oldest one is removed with the inverse update
+                   - 'halflife': exponentially weighted, an observation 'halflife' periods old has half the weight
+
+        Params: The number of assets, and optionally a 'window' length or a 'halflife' (not both).
+    '''
+
+    def __init__(self, numOfAssets, window=None, halflife=None):
+        if window is not None and halflife is not None:
+            raise ValueError("Choose either a rolling window or an exponential halflife, not both.")
+
+        self.numOfAssets = numOfAssets
+        self.window = window
+        self.halflife = halflife
+        self.alpha = 1 - 0.5 ** (1 / halflife) if halflife is not None else None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._mean = np.zeros(self.numOfAssets)
+        self._comoment = np.zeros((self.numOfAssets, self.numOfAssets))
+
+        #
+        # exponential weighting tracks the sum of the weights and of their squares for the bias correction
+        #
+        self._weight = 0.0
+        self._weight_squares = 0.0
+
+        #
+        # a rolling window keeps its observations in a ring buffer so the oldest can be removed
+        #
+        self._buffer = np.empty((self.window, self.numOfAssets)) if self.window is not None else None
+        self._oldest = 0
+
+    def update(self, observation):
+        '''
+            Purpose: Adds one observation (e.g. a day of returns). Observations containing NaN are ignored.
+
+            Params: A numpy array of N returns.
+        '''
+        observation = np.asarray(observation, dtype = float)
+        if not np.isfinite(observation).all():
+            return
+
+        if self.halflife is not None:
+            self._add_weighted(observation)
+            return
+
+        if self.window is not None and self.count == self.window:
+            self._remove(self._buffer[self._oldest])
+            self._buffer[self._oldest] = observation
+            self._oldest = (self._oldest + 1) % self.window
+        elif self.window is not None:
+            self._buffer[self.count] = observation
+
+        self._add(observation)
+
+    def update_many(self, observations):
+        '''
+            Purpose: Adds several observations in date order.
+
+            Params: A T x N numpy array (or pandas dataframe) of returns.
+        '''
+        for observation in np.asarray(observations, dtype = float):
+            self.update(observation)
+
+    def _add(self, observation):
+        self.count += 1
+        delta = observation - self._mean
+        self._mean += delta / self.count
+        self._comoment += np.outer(delta, observation - self._mean)
+
+    def _remove(self, observation):
+        #
+        # the inverse of _add: adding 'observation' back to the reduced moments reproduces the current ones
+        #
+        self.count -= 1
+        if self.count == 0:
+            self._mean[:] = 0.0
+            self._comoment[:] = 0.0
+            return
+
+        reduced_mean = (self._mean * (self.count + 1) - observation) / self.count
+        self._comoment -= np.outer(observation - reduced_mean, observation - self._mean)
+        self._mean = reduced_mean
+
+    def _add_weighted(self, observation):
+        alpha = self.alpha if self.count else 1.0
+        self.count += 1
+        delta = observation - self._mean
+        self._mean += alpha * delta
+        self._comoment = (1 - alpha) * (self._comoment + alpha * np.outer(delta, delta))
+
+        self._weight = (1 - alpha) * self._weight + alpha
+        self._weight_squares = (1 - alpha)**2 * self._weight_squares + alpha**2
+
+    @property
+    def mean(self):
+        return self._mean.copy()
+
+    @property
+    def covariance(self):
+        '''
+            Purpose: The sample covariance matrix (ddof = 1, as pandas' DataFrame.cov). The exponentially weighted
+                     covariance carries the matching unbiased correction for the effective number of observations.
+
+            Returns: An N x N numpy array (NaN before there are two observations).
+        '''
+        if self.count < 2:
+            return np.full((self.numOfAssets, self.numOfAssets), np.nan)
+
+        if self.halflife is not None:
+            #
+            # _weight is the total normalized weight (1 for the first observation onward), so the biased
+            # covariance is scaled by 1 / (1 - sum of squared weights)
+            #
+            return self._comoment / (1 - self._weight_squares / self._weight**2)
+
+        covariance = self._comoment / (self.count - 1)
+        return (covariance + covariance.T) / 2
+
+    def statistics(self, timing=252):
+        '''
+            Purpose: The annualized mean vector and covariance matrix, ready for the optimizer.
+
+            Params: The 'timing' used to annualize (252 daily, 12 monthly, 4 quarterly).
+
+            Returns: A tuple of 'mu' and 'VarCov' numpy arrays.
+        '''
+        return self.mean * timing, self.covariance * timing
+
+
+def walk_forward_statistics(rets, rebalance_dates, window=None, halflife=None, timing=252):
+    '''
+        Purpose: Streams a return panel through RollingMoments and yields the annualized statistics known at each
+                 rebalance date, i.e. using returns up to and including that date. Used for walk-forward rebalancing.
+
+        Params: A pandas dataframe of returns, the rebalance dates, an optional 'window' length or 'halflife' and the
+                'timing' used to annualize.
+
+        Returns: A generator of (date, mu, VarCov) tuples, with 'mu' a pandas series and 'VarCov' a pandas dataframe.
+    '''
+    tickers = list(rets.columns)
+    moments = RollingMoments(len(tickers), window = window, halflife = halflife)
+
+    rebalance = set(pd.DatetimeIndex(rebalance_dates))
+    values = rets.values
+    for position, date in enumerate(rets.index):
+        moments.update(values[position])
+        if date in rebalance and moments.count >= 2:
+            mu, VarCov = moments.statistics(timing)
+            yield date, pd.Series(mu, index = tickers), pd.DataFrame(VarCov, index = tickers, columns = tickers)
@@ -0,0 +1,33 @@
+# import some code we want to test
+
+import numpy as np
+
+from app.rolling import RollingMoments, walk_forward_statistics
+
+def test_rolling_window_matches_pandas(random_universe):
+    rets = random_universe.returns(4, seed = 0, numOfDays = 300, mean = 0.0, tickers = ["AAPL", "MSFT", "NFLX", "AMZN"])
+
+    moments = RollingMoments(4, window = 60)
+    moments.update_many(rets)
+    assert np.allclose(moments.mean, rets.iloc[-60:].mean().values)
+    assert np.allclose(moments.covariance, rets.iloc[-60:].cov().values)
+
+    #
+    # exponential weighting should agree with pandas' recursive (adjust = False) weights
+    #
+    weighted = RollingMoments(4, halflife = 20)
+    weighted.update_many(rets)
+    assert np.isclose(weighted.mean[0], rets["AAPL"].ewm(halflife = 20, adjust = False).mean().iloc[-1])
+    assert np.isclose(weighted.covariance[0, 1], rets["AAPL"].ewm(halflife = 20, adjust = False).cov(rets["MSFT"]).iloc[-1])
+
+def test_walk_forward_uses_data_up_to_each_rebalance(random_universe):
+    rets = random_universe.returns(3, seed = 1, numOfDays = 250, mean = 0.0, tickers = ["AAPL", "MSFT", "NFLX"])
+    rets.iloc[0] = np.nan
+    rebalance_dates = rets.groupby(rets.index.to_period('M')).tail(1).index
+
+    steps = list(walk_forward_statistics(rets, rebalance_dates, window = 40))
+    assert len(steps) == len(rebalance_dates)
+    for date, mu, VarCov in steps:
+        history = rets.loc[:date].dropna().iloc[-40:]
+        assert np.allclose(mu.values, history.mean().values * 252)
+        assert np.allclose(VarCov.values, history.cov().values * 252)
@@ -0,0 +1,469 @@
+# this is the "app/service.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+import pandas as pd
+
+from app.batch import run_batch, split_tickers
+from app.instrumentation import enable_from_environment, stage
+from app.price_cache import default_cache
+from app.price_panel import PricePanel
+from app.result_cache import ResultCache
+from app.risk_free import RiskFreeService
+from app.stats_cache import StatisticsCache
+
+#
+# the analyses served as POST endpoints; the approach of a request is taken from its path
+#
+ENDPOINTS = {'/integrative': 'integrative', '/speculative': 'speculative', '/holistic': 'holistic'}
+
+#
+# the largest request body accepted (a batch of a few thousand requests fits easily)
+#
+MAX_BODY_BYTES = 16 * 2**20
+
+#
+# seconds before a ticker that returned no prices is looked up again
+#
+UNAVAILABLE_TTL = 3600.0
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+class MemoryPriceCache:
+    '''
+        Purpose: Keeps the prices of every ticker already served in memory, per price window, in front of the
+                 on-disk PriceCache; only tickers not seen before are read (or downloaded). It has the PriceCache 'get'
+                 method, so it can be passed wherever a cache is expected (e.g. run_batch). The 'maxsize' most recently
+                 used windows are kept, and a window holding more than 'max_tickers' tickers is cut back to the last
+                 request's. Tickers that came back without prices are not asked for again for 'unavailable_ttl'
+                 seconds; tickers whose download failed (PriceCache.failures) are retried with the next request.
+
+        Params: An optional PriceCache (defaults to the application cache), the number of windows and of tickers per
+                window kept in memory and the lifetime in seconds of a 'no prices' answer.
+    '''
+
+    def __init__(self, cache=None, maxsize=8, max_tickers=5000, unavailable_ttl=UNAVAILABLE_TTL):
+        self.cache = cache
+        self.maxsize = maxsize
+        self.max_tickers = max_tickers
+        self.unavailable_ttl = unavailable_ttl
+        self.hits = 0
+        self.misses = 0
+        self._prices = OrderedDict()
+        self._unavailable = {}
+        self._lock = threading.Lock()
+
+    def get(self, tickers, start, end):
+        '''
+            Purpose: Returns adjusted close prices for the tickers over [start, end), loading only the tickers that
+                     are not in memory yet.
+
+            Params: A list of stock symbols and the 'start' / 'end' dates of the window.
+
+            Returns: A pandas dataframe of prices with one column per ticker that has data, in the order requested.
+        '''
+        key = (str(pd.Timestamp(start).date()), str(pd.Timestamp(end).date()))
+        tickers = list(dict.fromkeys(tickers))
+
+        with self._lock:
+            now = time.monotonic()
+            prices = self._prices.get(key, pd.DataFrame())
+            unavailable = self._unavailable.setdefault(key, {})
+            missing = [ticker for ticker in tickers if ticker not in prices.columns and unavailable.get(ticker, 0.0) <= now]
+
+            self.hits += len(tickers) - len(missing)
+            self.misses += len(missing)
+
+            if missing:
+                if self.cache is None:
+                    self.cache = default_cache()
+                loaded = self.cache.get(missing, start, end)
+
+                #
+                # only a 'no prices' answer is remembered; a failed download is retried with the next request
+                #
+                failures = getattr(self.cache, 'failures', {})
+                for ticker in missing:
+                    unavailable.pop(ticker, None)
+                    if ticker not in loaded.columns and ticker not in failures:
+                        unavailable[ticker] = now + self.unavailable_ttl
+
+                prices = loaded if prices.empty else prices.join(loaded, how = 'outer')
+                if len(prices.columns) > self.max_tickers:
+                    prices = prices[[ticker for ticker in tickers if ticker in prices.columns]].dropna(how = 'all')
+
+            self._prices[key] = prices
+            self._prices.move_to_end(key)
+            while len(self._prices) > self.maxsize:
+                evicted, _ = self._prices.popitem(last = False)
+                self._unavailable.pop(evicted, None)
+
+        #
+        # rows where none of the requested tickers traded belong to other tickers only (e.g. other exchanges' holidays)
+        #
+        price_data = prices[[ticker for ticker in tickers if ticker in prices.columns]].dropna(how = 'all')
+        price_data.index.name = "Date"
+        return price_data
+
+    def get_panel(self, tickers, start, end, dtype=np.float32):
+        '''
+            Purpose: The same prices as get, as a compact PricePanel (see PriceCache.get_panel).
+        '''
+        return PricePanel.from_frame(self.get(tickers, start, end), dtype)
+
+    def tickers(self):
+        with self._lock:
+            return sorted({ticker for prices in self._prices.values() for ticker in prices.columns})
+
+def request_problem(clientRequest):
+    '''
+        Purpose: Checks the shape of a client request before it is queued.
+
+        Params: A client request (any decoded JSON value).
+
+        Returns: A description of the problem, or None when the request can be queued.
+    '''
+    if not isinstance(clientRequest, dict):
+        return "a request must be a JSON object"
+
+    for field in ('tickers', 'candidates'):
+        value = clientRequest.get(field)
+        if value is None or isinstance(value, str):
+            continue
+        if not isinstance(value, list) or not all(isinstance(symbol, str) for symbol in value):
+            return f"'{field}' must be a string or a list of strings"
+
+    for field in ('start', 'end'):
+        if clientRequest.get(field) is not None and not isinstance(clientRequest[field], str):
+            return f"'{field}' must be a date string"
+
+    return None
+
+def failure(clientRequest, error):
+    client_id = clientRequest.get('client_id', '') if isinstance(clientRequest, dict) else ''
+    return {'client_id': str(client_id), 'error': str(error)}
+
+def request_window(clientRequest, start, end):
+    return str(clientRequest.get('start') or start), str(clientRequest.get('end') or end)
+
+def group_requests(clientRequests, start="2016-01-01", end="2018-12-31"):
+    '''
+        Purpose: Splits concurrent client requests into groups that are computed together: requests over the same
+                 price window whose tickers overlap, directly or through other requests, share one group (and so one
+                 price load and one covariance matrix), while unrelated requests do not inflate each other's universe.
+
+        Params: A list of client request dictionaries and the default 'start' / 'end' dates.
+
+        Returns: A list of groups, each a list of positions into the requests.
+    '''
+    parent = list(range(len(clientRequests)))
+
+    def root(position):
+        while parent[position] != position:
+            parent[position] = parent[parent[position]]
+            position = parent[position]
+        return position
+
+    owners = {}
+    for position, clientRequest in enumerate(clientRequests):
+        window = request_window(clientRequest, start, end)
+        symbols = split_tickers(clientRequest.get('tickers')) + split_tickers(clientRequest.get('candidates'))
+        for ticker in symbols or [None]:
+            owner = owners.setdefault((window, ticker), position)
+            parent[root(position)] = root(owner)
+
+    groups = {}
+    for position in range(len(clientRequests)):
+        groups.setdefault(root(position), []).append(position)
+    return list(groups.values())
+
+
+class AnalyticsService:
+    '''
+        Purpose: The long-running analytics engine behind the HTTP endpoints. Prices, universe statistics (returns,
+                 'mu', 'VarCov') and the risk-free yields stay warm in memory between requests. Requests arriving
+                 within 'batch_window' seconds of each other are grouped by overlapping tickers (group_requests) and
+                 every group is computed by one run_batch call. All computations run on one worker thread, so the
+                 event loop keeps accepting requests and the caches are never used concurrently.
+
+        Params: The default 'start' / 'end' of the price window, an optional PriceCache, an optional risk-free rate
+                'rf' (by default the cached ^IRX rate of each window), the batching window in seconds and the number
+                of universes whose statistics are kept, and optionally a directory where solved constructions are
+                kept across restarts (they are always kept in memory, see app/result_cache.py).
+    '''
+
+    def __init__(self, start="2016-01-01", end="2018-12-31", cache=None, rf=None, batch_window=0.005, maxsize=32,
+                 result_dir=None):
+        self.start = start
+        self.end = end
+        self.rf = rf
+        self.batch_window = batch_window
+        self.prices = MemoryPriceCache(cache)
+        self.risk_free = RiskFreeService(self.prices)
+        self.statistics_cache = StatisticsCache(maxsize = maxsize)
+        self.result_cache = ResultCache(cache_dir = result_dir)
+        self.requests = 0
+        self.batches = 0
+        self._pending = []
+        self._flush = None
+        self._executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "analytics")
+
+    def compute(self, clientRequests):
+        '''
+            Purpose: Runs one group of requests (all over the same price window) on the warm state.
+
+            Params: A list of client request dictionaries.
+
+            Returns: A list of result dictionaries in the same order.
+        '''
+        start, end = request_window(clientRequests[0], self.start, self.end)
+        with stage('service_batch', requests = len(clientRequests)):
+            return run_batch(clientRequests, start, end, cache = self.prices, rf = self.rf, statistics_cache = self.statistics_cache,
+                             result_cache = self.result_cache, risk_free = self.risk_free)
+
+    async def analyze(self, clientRequest):
+        '''
+            Purpose: Queues one request for the next batch and waits for its result.
+
+            Params: A client request dictionary (see app/batch.py).
+
+            Returns: The result dictionary.
+        '''
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((clientRequest, future))
+        self.requests += 1
+
+        if self._flush is None:
+            self._flush = loop.create_task(self._flush_later())
+
+        return await future
+
+    async def analyze_many(self, clientRequests):
+        return await asyncio.gather(*[self.analyze(clientRequest) for clientRequest in clientRequests])
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_window)
+        pending, self._pending, self._flush = self._pending, [], None
+
+        #
+        # every queued request is answered, whatever fails: a request left unresolved would hang its connection
+        #
+        try:
+            loop = asyncio.get_running_loop()
+            for group in group_requests([clientRequest for clientRequest, _ in pending], self.start, self.end):
+                self.batches += 1
+                try:
+                    results = await loop.run_in_executor(self._executor, self.compute, [pending[position][0] for position in group])
+                except Exception as error:
+                    results = [failure(pending[position][0], error) for position in group]
+                for position, result in zip(group, results):
+                    if not pending[position][1].done():
+                        pending[position][1].set_result(result)
+        except Exception as error:
+            for clientRequest, future in pending:
+                if not future.done():
+                    future.set_result(failure(clientRequest, error))
+
+    async def warm(self, tickers, frequencies=('daily',)):
+        '''
+            Purpose: Loads prices and computes the universe statistics of a list of tickers ahead of the first request.
+
+            Params: A list of stock symbols and the frequencies to prepare.
+        '''
+        clientRequests = [{'client_id': 'warm', 'tickers': list(tickers), 'approach': 'speculative', 'frequency': frequency}
+                          for frequency in frequencies]
+        await self.analyze_many(clientRequests)
+
+    def status(self):
+        return {
+            'status': 'ok',
+            'requests': self.requests,
+            'batches': self.batches,
+            'warm_tickers': len(self.prices.tickers()),
+            'price_hits': self.prices.hits,
+            'price_misses': self.prices.misses,
+            'statistics_hits': self.statistics_cache.hits,
+            'statistics_misses': self.statistics_cache.misses,
+            'result_hits': self.result_cache.hits,
+            'result_misses': self.result_cache.misses,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait = False)
+
+async def read_request(reader):
+    '''
+        Purpose: Reads one HTTP/1.1 request from a connection.
+
+        Params: The asyncio StreamReader of the connection.
+
+        Returns: A tuple of the method, path, headers (lower-case names) and body bytes, or None when the client
+                 closed the connection. Raises ValueError on a malformed request.
+    '''
+    line = await reader.readline()
+    if not line:
+        return None
+
+    parts = line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise ValueError("malformed request line")
+    method, path, _ = parts
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0) or 0)
+    if length > MAX_BODY_BYTES:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+
+    return method, path.split("?")[0], headers, body
+
+def encode_response(status, payload, keep_alive=True):
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+async def route(service, method, path, body):
+    '''
+        Purpose: Dispatches one HTTP request to the service.
+
+            GET  /health                                   service status and cache statistics
+            POST /integrative, /speculative, /holistic     one client request (JSON object) -> one result
+            POST /batch                                    a JSON list of client requests -> a list of results
+
+        Params: The AnalyticsService, the HTTP method and path and the request body.
+
+        Returns: A tuple of the HTTP status and the JSON payload.
+    '''
+    if path == '/health':
+        if method != 'GET':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "use GET"}
+        return HTTPStatus.OK, service.status()
+
+    if path not in ENDPOINTS and path != '/batch':
+        return HTTPStatus.NOT_FOUND, {'error': f"unknown endpoint '{path}'"}
+    if method != 'POST':
+        return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "use POST"}
+
+    try:
+        payload = json.loads(body or b"null")
+    except ValueError:
+        return HTTPStatus.BAD_REQUEST, {'error': "the body is not valid JSON"}
+
+    if path == '/batch':
+        if not isinstance(payload, list):
+            return HTTPStatus.BAD_REQUEST, {'error': "the batch body must be a JSON list of requests"}
+        for position, clientRequest in enumerate(payload):
+            problem = request_problem(clientRequest)
+            if problem is not None:
+                return HTTPStatus.BAD_REQUEST, {'error': f"request {position}: {problem}"}
+        return HTTPStatus.OK, await service.analyze_many(payload)
+
+    problem = request_problem(payload)
+    if problem is not None:
+        return HTTPStatus.BAD_REQUEST, {'error': problem}
+
+    result = await service.analyze(dict(payload, approach = ENDPOINTS[path]))
+    return (HTTPStatus.UNPROCESSABLE_ENTITY if 'error' in result else HTTPStatus.OK), result
+
+async def handle_connection(service, reader, writer):
+    '''
+        Purpose: Serves the requests of one (keep-alive) connection in turn.
+
+        Params: The AnalyticsService and the connection's StreamReader / StreamWriter.
+    '''
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError) as error:
+                writer.write(encode_response(HTTPStatus.BAD_REQUEST, {'error': str(error)}, keep_alive = False))
+                break
+            if request is None:
+                break
+
+            method, path, headers, body = request
+            keep_alive = headers.get('connection', '').lower() != 'close'
+            status, payload = await route(service, method, path, body)
+            writer.write(encode_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def start_server(service, host="127.0.0.1", port=8765):
+    '''
+        Purpose: Starts serving the analytics endpoints.
+
+        Params: The AnalyticsService, the 'host' and the 'port' (0 picks a free port).
+
+        Returns: The asyncio Server (its bound port is server.sockets[0].getsockname()[1]).
+    '''
+    return await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer), host, port)
+
+async def serve(args):
+    service = AnalyticsService(args.start, args.end, rf = args.rf, batch_window = args.batch_window, result_dir = args.result_cache)
+    server = await start_server(service, args.host, args.port)
+
+    if args.warm:
+        await service.warm(split_tickers(args.warm))
+
+    print(f"Serving portfolio analytics on http://{args.host}:{server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
+
+def main(argv = None):
+    '''
+        Purpose: Command-line entry point: python -m app.service [--port 8765] [--warm "AAPL MSFT NFLX"]
+
+        Params: An optional list of command-line arguments.
+    '''
+    parser = argparse.ArgumentParser(description = "Serve the portfolio analyses as local JSON endpoints.")
+    parser.add_argument("--host", default = "127.0.0.1", help = "address to listen on")
+    parser.add_argument("--port", type = int, default = 8765, help = "port to listen on")
+    parser.add_argument("--start", default = "2016-01-01", help = "default first date of the price window")
+    parser.add_argument("--end", default = "2018-12-31", help = "default end date of the price window (exclusive)")
+    parser.add_argument("--rf", type = float, help = "risk-free rate to use instead of the cached ^IRX rate")
+    parser.add_argument("--batch-window", type = float, default = 0.005, help = "seconds to collect concurrent requests")
+    parser.add_argument("--result-cache", help = "directory of solved constructions kept across restarts")
+    parser.add_argument("--warm", help = "tickers to load and prepare before serving")
+    args = parser.parse_args(argv)
+
+    enable_from_environment()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
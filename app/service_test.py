@@ -0,0 +1,123 @@
+# import some code we want to test
+
+import asyncio
+import json
+
+import numpy as np
+
+from app.batch_test import fake_prices
+from app.price_cache import PriceCache
+from app.service import AnalyticsService, group_requests, start_server
+
+async def post(port, path, payload):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                 + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+def test_group_requests_joins_overlapping_tickers():
+    requests = [{'tickers': 'AAPL MSFT'}, {'tickers': 'XOM CVX'}, {'tickers': 'NFLX', 'candidates': 'MSFT'},
+                {'tickers': 'AAPL', 'start': '2017-01-01'}]
+
+    assert group_requests(requests) == [[0, 2], [1], [3]]
+
+def test_service_batches_concurrent_requests(tmp_path):
+    calls = []
+    def downloader(tickers, start, end):
+        calls.append(tickers)
+        return fake_prices(tickers, start, end)
+
+    service = AnalyticsService(cache = PriceCache(cache_dir = str(tmp_path), downloader = downloader), rf = 0.01,
+                               batch_window = 0.05)
+
+    async def scenario():
+        server = await start_server(service, port = 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            first = await asyncio.gather(
+                post(port, '/integrative', {'client_id': '1', 'tickers': 'AAPL MSFT NFLX', 'portfolio': '1'}),
+                post(port, '/speculative', {'client_id': '2', 'tickers': 'MSFT NFLX'}),
+                post(port, '/nowhere', {}))
+            second = await post(port, '/integrative', {'client_id': '3', 'tickers': 'AAPL MSFT NFLX', 'portfolio': '1'})
+            health = await post(port, '/health', {})
+        return first, second, health
+
+    (integrative, speculative, missing), repeat, health = asyncio.run(scenario())
+    service.close()
+
+    assert calls == [['AAPL', 'MSFT', 'NFLX']]
+    assert integrative[0] == 200 and np.isclose(sum(integrative[1]['weights'].values()), 1)
+    assert speculative[0] == 200 and [rec['ticker'] for rec in speculative[1]['recommendations']] == ['MSFT', 'NFLX']
+    assert missing[0] == 404
+    assert repeat[1]['weights'] == integrative[1]['weights']
+    assert service.batches == 2 and service.statistics_cache.hits >= 1 and service.result_cache.hits == 1
+    assert health[0] == 405
+
+def test_service_rejects_malformed_requests_without_stalling_the_batch(tmp_path):
+    service = AnalyticsService(cache = PriceCache(cache_dir = str(tmp_path), downloader = fake_prices), rf = 0.01,
+                               batch_window = 0.05)
+
+    async def scenario():
+        server = await start_server(service, port = 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await asyncio.wait_for(asyncio.gather(
+                post(port, '/speculative', {'client_id': '1', 'tickers': 'AAPL MSFT'}),
+                post(port, '/speculative', {'client_id': '2', 'tickers': 5}),
+                post(port, '/batch', [{'client_id': '3', 'tickers': 'AAPL'}, {'candidates': [1, 2]}])), timeout = 30)
+
+    valid, malformed, batch = asyncio.run(scenario())
+    service.close()
+
+    assert valid[0] == 200 and len(valid[1]['recommendations']) == 2
+    assert malformed[0] == 400 and 'tickers' in malformed[1]['error']
+    assert batch[0] == 400 and batch[1]['error'].startswith("request 1")
+
+def test_flush_answers_every_request_when_grouping_fails():
+    service = AnalyticsService(batch_window = 0.0)
+
+    async def scenario():
+        return await asyncio.wait_for(service.analyze_many([{'client_id': '1', 'tickers': 'AAPL'},
+                                                            {'client_id': '2', 'tickers': 5}]), timeout = 5)
+
+    results = asyncio.run(scenario())
+    service.close()
+
+    assert [result['client_id'] for result in results] == ['1', '2'] and all('error' in result for result in results)
+
+def test_memory_prices_retry_failures_and_stay_bounded(tmp_path):
+    from app.providers import ProviderError
+    from app.service import MemoryPriceCache
+
+    calls = []
+    def downloader(tickers, start, end):
+        calls.append(list(tickers))
+        if len(calls) == 1:
+            raise ProviderError("timed out")
+        return fake_prices([ticker for ticker in tickers if ticker != 'NODATA'], start, end)
+
+    prices = MemoryPriceCache(PriceCache(cache_dir = str(tmp_path), downloader = downloader), maxsize = 2)
+    assert prices.get(['AAPL'], "2016-01-01", "2016-06-30").empty
+    assert list(prices.get(['AAPL', 'NODATA'], "2016-01-01", "2016-06-30").columns) == ['AAPL']
+    prices.get(['AAPL', 'NODATA'], "2016-01-01", "2016-06-30")
+    assert calls == [['AAPL'], ['AAPL', 'NODATA']]
+
+    prices.get(['AAPL'], "2016-01-01", "2016-03-31")
+    prices.get(['AAPL'], "2016-02-01", "2016-06-30")
+    assert len(prices._prices) == 2 and ("2016-01-01", "2016-06-30") not in prices._prices
+
+def test_service_keeps_one_risk_free_service(tmp_path):
+    service = AnalyticsService(cache = PriceCache(cache_dir = str(tmp_path), downloader = fake_prices), batch_window = 0.0)
+
+    for client_id in ('1', '2'):
+        result = service.compute([{'client_id': client_id, 'tickers': 'AAPL MSFT', 'approach': 'integrative', 'portfolio': '1'}])
+        assert 'error' not in result[0]
+    service.close()
+
+    assert list(service.risk_free._series) == [("2016-01-01", "2018-12-31")]
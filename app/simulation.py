@@ -0,0 +1,220 @@
+# this is the "app/simulation.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.covariance import FactorCovariance
+from app.instrumentation import stage
+
+#
+# the VaR / CVaR confidence level of each risk tolerance collected by the interactive program: a conservative
+# investor is shown the loss exceeded in 1% of outcomes, an aggressive one the loss exceeded in 10%
+#
+RISK_CONFIDENCE = {'aggressive': 0.90, 'moderate': 0.95, 'conservative': 0.99}
+
+#
+# the largest block of random draws (paths x steps x factors, in bytes) held in memory at once
+#
+MAX_CHUNK_BYTES = 64 * 2**20
+
+#
+# paths per shard: each shard has its own seed, so results do not depend on the number of worker processes
+#
+SHARD_PATHS = 250000
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def covariance_factor(VarCov):
+    '''
+        Purpose: A factor L with L @ L.T equal to the covariance matrix, used to correlate standard normal draws.
+                 Dense matrices use the Cholesky factor (falling back to the eigen-decomposition with negative
+                 eigenvalues clipped when the matrix is only positive semi-definite). A FactorCovariance is kept in
+                 factor form: its draws are the loadings times the factor shocks plus independent specific shocks.
+
+        Params: The N x N covariance matrix (numpy array, pandas dataframe or FactorCovariance).
+
+        Returns: A tuple of the N x K dense factor and the length N specific volatilities (or None).
+    '''
+    if isinstance(VarCov, FactorCovariance):
+        return VarCov.loadings * np.sqrt(VarCov.factor_variances), np.sqrt(VarCov.specific_variances)
+
+    VarCov = np.asarray(VarCov, dtype = float)
+    try:
+        return np.linalg.cholesky(VarCov), None
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(VarCov)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None)), None
+
+def simulate_shard(mu, factor, specific, weights, steps, numOfPaths, seed, chunk_size):
+    '''
+        Purpose: Simulates one shard of buy-and-hold portfolio paths. Per-step log returns are mu plus correlated
+                 normal shocks; each chunk of paths is drawn, accumulated and valued in place, so memory is bounded by
+                 the chunk and not by the number of paths. The draws are taken from one generator in path order, so
+                 the result does not depend on 'chunk_size'.
+
+        Params: The per-step mean log returns 'mu', the covariance factor and specific volatilities (see
+                covariance_factor), the portfolio 'weights', the number of 'steps' per path, the number of paths, the
+                shard's 'seed' (a numpy SeedSequence) and the number of paths per chunk.
+
+        Returns: A tuple of numpy arrays: each path's terminal return and its maximum drawdown.
+    '''
+    rng = np.random.default_rng(seed)
+    numOfAssets, numOfFactors = factor.shape
+
+    terminal = np.empty(numOfPaths)
+    drawdown = np.empty(numOfPaths)
+    for first in range(0, numOfPaths, chunk_size):
+        last = min(first + chunk_size, numOfPaths)
+
+        #
+        # one block of draws per chunk (factor shocks, then specific shocks), so the stream is consumed in path order
+        #
+        shocks = rng.standard_normal((last - first, steps, numOfFactors + (0 if specific is None else numOfAssets)))
+        log_returns = shocks[:, :, :numOfFactors] @ factor.T
+        if specific is not None:
+            log_returns += shocks[:, :, numOfFactors:] * specific
+        log_returns += mu
+
+        #
+        # each asset's value is the exponential of its cumulative log return; the portfolio holds the initial weights
+        #
+        np.cumsum(log_returns, axis = 1, out = log_returns)
+        np.exp(log_returns, out = log_returns)
+        wealth = log_returns @ weights
+
+        peaks = np.maximum(np.maximum.accumulate(wealth, axis = 1), 1.0)
+        terminal[first:last] = wealth[:, -1] - 1.0
+        drawdown[first:last] = (1.0 - wealth / peaks).max(axis = 1)
+
+    return terminal, drawdown
+
+def simulate_task(task):
+    return simulate_shard(*task)
+
+
+class SimulationResult:
+    '''
+        Purpose: The simulated terminal returns and maximum drawdowns of a portfolio, with the risk measures taken
+                 from their distribution.
+
+        Params: The numpy arrays of terminal 'returns' and 'drawdowns' (one value per path) and the 'horizon' in steps.
+    '''
+
+    def __init__(self, returns, drawdowns, horizon):
+        self.returns = returns
+        self.drawdowns = drawdowns
+        self.horizon = horizon
+
+    def __len__(self):
+        return len(self.returns)
+
+    def value_at_risk(self, confidence=0.95):
+        '''
+            Purpose: The loss (as a positive fraction of the initial value) exceeded with probability 1 - confidence.
+        '''
+        return float(-np.quantile(self.returns, 1.0 - confidence))
+
+    def conditional_value_at_risk(self, confidence=0.95):
+        '''
+            Purpose: The average loss in the worst 1 - confidence of the paths (expected shortfall).
+        '''
+        threshold = np.quantile(self.returns, 1.0 - confidence)
+        return float(-self.returns[self.returns <= threshold].mean())
+
+    def terminal_wealth(self, initial_value=1.0, percentiles=(1, 5, 25, 50, 75, 95, 99)):
+        '''
+            Purpose: Percentiles of the terminal wealth distribution.
+
+            Params: The initial portfolio value and the percentiles to report.
+
+            Returns: A dictionary of percentile to terminal wealth.
+        '''
+        values = np.percentile(initial_value * (1.0 + self.returns), percentiles)
+        return {percentile: float(value) for percentile, value in zip(percentiles, values)}
+
+    def summary(self, risk_tolerance='moderate', initial_value=1.0):
+        '''
+            Purpose: The risk measures at the confidence level of a risk tolerance (see RISK_CONFIDENCE).
+
+            Params: The 'risk_tolerance' ('aggressive', 'moderate' or 'conservative') and the initial portfolio value.
+
+            Returns: A dictionary of the 'confidence', 'value_at_risk', 'conditional_value_at_risk', 'expected_return',
+                     'probability_of_loss', 'median_max_drawdown' and 'terminal_wealth' percentiles.
+        '''
+        confidence = RISK_CONFIDENCE[risk_tolerance]
+        return {
+            'paths': len(self),
+            'horizon': self.horizon,
+            'confidence': confidence,
+            'value_at_risk': self.value_at_risk(confidence),
+            'conditional_value_at_risk': self.conditional_value_at_risk(confidence),
+            'expected_return': float(self.returns.mean()),
+            'probability_of_loss': float((self.returns < 0).mean()),
+            'median_max_drawdown': float(np.median(self.drawdowns)),
+            'terminal_wealth': self.terminal_wealth(initial_value),
+        }
+
+def monte_carlo(weights, mu, VarCov, timing=252, horizon=21, numOfPaths=100000, seed=0, chunk_size=None, max_workers=1):
+    '''
+        Purpose: Simulates correlated return paths of every asset from the annualized mean returns and covariance
+                 matrix and values the buy-and-hold portfolio along each path. The paths are split into shards of
+                 SHARD_PATHS with seeds spawned from 'seed', so the same seed gives the same paths whether the shards
+                 run in this process or in 'max_workers' processes, and whatever the 'chunk_size'.
+
+        Params: The portfolio 'weights', the annualized 'mu' and 'VarCov' (as from annualized_statistics), the
+                'timing' (steps per year), the 'horizon' in steps (21 trading days is about one month), the number of
+                paths, the random 'seed', the number of paths simulated at once (by default as many as fit in
+                MAX_CHUNK_BYTES) and the number of worker processes.
+
+        Returns: A SimulationResult.
+    '''
+    weights = np.asarray(weights, dtype = float)
+
+    #
+    # only the assets held move the portfolio, and optimized portfolios usually hold few of the candidates
+    #
+    held = np.flatnonzero(weights)
+    if len(held) == 0:
+        #
+        # nothing is invested, so every path keeps its initial value
+        #
+        return SimulationResult(np.zeros(numOfPaths), np.zeros(numOfPaths), horizon)
+
+    if isinstance(VarCov, FactorCovariance):
+        VarCov = VarCov.subset(held)
+    else:
+        VarCov = np.asarray(VarCov, dtype = float)[np.ix_(held, held)]
+
+    factor, specific = covariance_factor(VarCov)
+    factor = factor / np.sqrt(timing)
+    specific = None if specific is None else specific / np.sqrt(timing)
+    mu = np.asarray(mu, dtype = float)[held] / timing
+    weights = weights[held]
+
+    if chunk_size is None:
+        chunk_size = max(1, MAX_CHUNK_BYTES // (8 * horizon * (factor.shape[1] + len(weights))))
+
+    shards = [(first, min(first + SHARD_PATHS, numOfPaths)) for first in range(0, numOfPaths, SHARD_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(shards))
+    tasks = [(mu, factor, specific, weights, horizon, last - first, shardSeed, chunk_size)
+             for (first, last), shardSeed in zip(shards, seeds)]
+
+    with stage('monte_carlo', paths = numOfPaths, assets = len(held), horizon = horizon):
+        if max_workers <= 1 or len(tasks) <= 1:
+            results = [simulate_task(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers = max_workers) as executor:
+                results = list(executor.map(simulate_task, tasks))
+
+    returns = np.concatenate([terminal for terminal, _ in results]) if results else np.empty(0)
+    drawdowns = np.concatenate([drawdown for _, drawdown in results]) if results else np.empty(0)
+    return SimulationResult(returns, drawdowns, horizon)
@@ -0,0 +1,58 @@
+# import some code we want to test
+
+import numpy as np
+from scipy.stats import norm
+
+from app import simulation
+from app.covariance import FactorCovariance
+from app.simulation import monte_carlo
+
+def test_results_do_not_depend_on_chunks_or_workers(monkeypatch, random_universe):
+    monkeypatch.setattr(simulation, 'SHARD_PATHS', 1000)
+    mu, VarCov = random_universe.statistics(6, seed = 2, mean = 0.0003, drift = 0.0001, vol = 0.009, numOfFactors = 2,
+                                            factor_vol = 0.0095)
+    weights = np.array([0.3, 0.0, 0.2, 0.1, 0.4, 0.0])
+
+    single = monte_carlo(weights, mu, VarCov, numOfPaths = 3000, seed = 7)
+    sharded = monte_carlo(weights, mu, VarCov, numOfPaths = 3000, seed = 7, chunk_size = 128, max_workers = 2)
+
+    assert np.array_equal(single.returns, sharded.returns)
+    assert not np.array_equal(single.returns, monte_carlo(weights, mu, VarCov, numOfPaths = 3000, seed = 8).returns)
+
+def test_one_step_var_matches_the_normal_quantile(random_universe):
+    mu, VarCov = random_universe.statistics(6, seed = 2, mean = 0.0003, drift = 0.0001, vol = 0.009, numOfFactors = 2,
+                                            factor_vol = 0.0095)
+    weights = np.full(6, 1 / 6)
+
+    #
+    # over one step the portfolio log return is normal; for small returns exp(x) - 1 is close to x
+    #
+    scale = np.sqrt(weights @ VarCov @ weights) * 0.01
+    small = monte_carlo(weights, mu * 0.01, VarCov * 1e-4, timing = 1, horizon = 1, numOfPaths = 400000, seed = 1)
+
+    assert abs(small.value_at_risk(0.95) - (norm.ppf(0.95) * scale - weights @ mu * 0.01)) < 2e-4
+    assert small.conditional_value_at_risk(0.95) > small.value_at_risk(0.95)
+    assert small.summary('conservative')['confidence'] == 0.99
+
+def test_factor_covariance_is_simulated_in_factor_form():
+    rng = np.random.default_rng(4)
+    factor_model = FactorCovariance(rng.normal(0, 0.2, size = (5, 2)), np.array([1.0, 0.5]), np.full(5, 0.03))
+    weights = np.full(5, 0.2)
+
+    factor = monte_carlo(weights, np.zeros(5), factor_model, timing = 1, horizon = 1, numOfPaths = 200000, seed = 3)
+    dense = monte_carlo(weights, np.zeros(5), factor_model.to_dense(), timing = 1, horizon = 1, numOfPaths = 200000, seed = 3)
+
+    assert abs(factor.value_at_risk(0.95) - dense.value_at_risk(0.95)) < 0.01
+
+def test_uninvested_portfolio_and_quarterly_horizon():
+    from app.manager import horizon_label, simulated_risk
+    import pandas as pd
+
+    result = monte_carlo(np.zeros(3), np.full(3, 0.05), np.eye(3) * 0.04, numOfPaths = 100)
+    assert result.value_at_risk() == 0 and result.conditional_value_at_risk() == 0
+
+    rng = np.random.default_rng(3)
+    rets = pd.DataFrame(rng.normal(0.02, 0.08, size = (40, 2)), columns = ['AAPL', 'MSFT'])
+    risk = simulated_risk(rets, 4, {'AAPL': 0.5, 'MSFT': 0.5}, numOfPaths = 1000)
+    assert risk['horizon'] == 1 and horizon_label(risk['horizon'], 4) == "1-QUARTER"
+    assert horizon_label(21, 252) == "21-DAY"
@@ -0,0 +1,131 @@
+# this is the "app/speculative.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+import json
+
+import numpy as np
+import pandas as pd
+
+#
+# annual return thresholds per risk tolerance: BUY at or above the first, SELL at or below the second, otherwise HOLD
+#
+THRESHOLDS = {
+    'aggressive': (0.08, 0.04),
+    'moderate': (0.06, 0.03),
+    'conservative': (0.01, -0.01),
+}
+
+#
+# the reason given with each recommendation
+#
+REASONS = {
+    ('aggressive', 'BUY'): '''     
+                     The stock is demonstrating upward momentum. 
+                     Asset offers a high-growth proposition.''',
+    ('aggressive', 'SELL'): '''     
+                     The stock is demonstrating low growth value, 
+                     currently generating less than 4% annual return 
+                     An aggressive strategy calls for the liquidation 
+                     of low-growth postions.''',
+    ('aggressive', 'HOLD'): '''    
+                     The stock is generating resonable returns
+                     and should be held until its growth proposition 
+                     is more clear to the market.''',
+    ('moderate', 'BUY'): '''    
+                     The stock is currently generating greater than 6% annual 
+                     return offering relatively strong growth value to an 
+                     investor willing to incur moderate risk.''',
+    ('moderate', 'SELL'): ''' 
+                     The stock is generating less than 3% annual return, 
+                     indicating that the market recognizes little growth value 
+                     in the stock moving forward.''',
+    ('moderate', 'HOLD'): '''    
+                     The stock is generating resonable returns
+                     and should be held until its growth proposition 
+                     is more clear to the market.''',
+    ('conservative', 'BUY'): '''   
+                     The stock is generating moderate returns. 
+                     A conservative strategy focuses on principal 
+                     protection rather than growth.''',
+    ('conservative', 'SELL'): '''   
+                     The stock is currently generating negative
+                     annual returns, indicating that principal is 
+                     at risk. Conservative investors should sell.''',
+    ('conservative', 'HOLD'): '''   
+                     The stock is demonstrating relative stability, 
+                     offering predictability and consistent 
+                     returns to conservative investors. ''',
+}
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def score_recommendations(mu, risk_tolerance):
+    '''
+        Purpose: Produces Buy, Sell, Hold recommendations for a whole series of annual returns at once by
+                 applying the risk tolerance thresholds as array comparisons.
+
+        Params: A pandas series 'mu' of average annual returns indexed by ticker and the 'risk_tolerance'
+                ('aggressive', 'moderate' or 'conservative').
+
+        Returns: A pandas dataframe indexed by ticker with the 'annual_return', 'recommendation' and 'reason' columns.
+    '''
+    if risk_tolerance not in THRESHOLDS:
+        raise ValueError(f"invalid risk tolerance '{risk_tolerance}'")
+
+    buy_at, sell_at = THRESHOLDS[risk_tolerance]
+    annual_returns = np.asarray(mu, dtype = float)
+
+    recommendation = np.select([annual_returns >= buy_at, annual_returns <= sell_at], ["BUY", "SELL"], default = "HOLD")
+    reasons = np.array([REASONS[(risk_tolerance, rec)] for rec in ("BUY", "SELL", "HOLD")], dtype = object)
+    reason = reasons[np.select([recommendation == "BUY", recommendation == "SELL"], [0, 1], default = 2)]
+
+    recommendations = pd.DataFrame({'annual_return': annual_returns, 'recommendation': recommendation, 'reason': reason},
+                                   index = pd.Index(mu.index, name = 'ticker'))
+    return recommendations
+
+def render_recommendations(recommendations, risk_tolerance, fmt = 'text', filePath = None):
+    '''
+        Purpose: Renders a dataframe of recommendations in bulk, as the report printed by the interactive program,
+                 as CSV or as JSON (one record per ticker).
+
+        Params: The dataframe produced by score_recommendations, the 'risk_tolerance', the format ('text', 'csv' or 'json')
+                and an optional path to write the output to.
+
+        Returns: The rendered string.
+    '''
+    if fmt == 'csv':
+        output = recommendations.to_csv()
+    elif fmt == 'json':
+        output = json.dumps(recommendations.reset_index().to_dict(orient = 'records'))
+    elif fmt == 'text':
+        divider = "-----------------------------------------------------------------------------------"
+        blocks = []
+        for stock, annual_return, rec, reason in zip(recommendations.index, recommendations['annual_return'],
+                                                      recommendations['recommendation'], recommendations['reason']):
+            blocks.append("\n".join([
+                "\n" + divider,
+                f"SELECTED SYMBOL: {stock.upper()}",
+                f"RISK TOLERANCE: {risk_tolerance.upper()}",
+                divider,
+                f"AVERAGE ANNUAL RETURN (3-YEAR SAMPLE): {round(annual_return * 100, 2)}%",
+                divider,
+                f"RECOMMENDATION: {rec}",
+                f"RECOMMENDATION REASON: {reason}",
+                divider,
+            ]))
+        output = "\n".join(blocks)
+    else:
+        raise ValueError(f"unknown format '{fmt}'")
+
+    if filePath is not None:
+        with open(filePath, "w") as handle:
+            handle.write(output)
+
+    return output
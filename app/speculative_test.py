@@ -0,0 +1,33 @@
+# import some code we want to test
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.speculative import score_recommendations, render_recommendations
+
+def test_score_recommendations_thresholds():
+    mu = pd.Series([0.08, 0.05, 0.04, 0.06, 0.03, -0.01, 0.0, np.nan], index = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H'])
+
+    aggressive = score_recommendations(mu, 'aggressive')['recommendation']
+    assert list(aggressive) == ['BUY', 'HOLD', 'SELL', 'HOLD', 'SELL', 'SELL', 'SELL', 'HOLD']
+
+    moderate = score_recommendations(mu, 'moderate')['recommendation']
+    assert list(moderate) == ['BUY', 'HOLD', 'HOLD', 'BUY', 'SELL', 'SELL', 'SELL', 'HOLD']
+
+    conservative = score_recommendations(mu, 'conservative')
+    assert list(conservative['recommendation']) == ['BUY', 'BUY', 'BUY', 'BUY', 'BUY', 'SELL', 'HOLD', 'HOLD']
+    assert "principal" in conservative.loc['F', 'reason']
+
+def test_render_recommendations_in_bulk(tmp_path):
+    recommendations = score_recommendations(pd.Series([0.1, 0.02], index = ['AAPL', 'FB']), 'moderate')
+
+    records = json.loads(render_recommendations(recommendations, 'moderate', fmt = 'json'))
+    assert [(record['ticker'], record['recommendation']) for record in records] == [('AAPL', 'BUY'), ('FB', 'SELL')]
+
+    render_recommendations(recommendations, 'moderate', fmt = 'csv', filePath = str(tmp_path / "recs.csv"))
+    assert list(pd.read_csv(tmp_path / "recs.csv")['ticker']) == ['AAPL', 'FB']
+
+    text = render_recommendations(recommendations, 'moderate')
+    assert "SELECTED SYMBOL: FB" in text and "AVERAGE ANNUAL RETURN (3-YEAR SAMPLE): 10.0%" in text
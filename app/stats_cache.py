@@ -0,0 +1,123 @@
+# this is the "app/stats_cache.py" file
+
+#**************************************************************************
+#***************      Importation of Python Libraries             *********
+#**************************************************************************
+#**************************************************************************
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from app.instrumentation import stage
+from app.panels import ReturnPanels, price_key
+
+#**************************************************************************
+#***********    Custom Functions (Modular Program Approach)    ************
+#**************************************************************************
+#**************************************************************************
+
+def universe_key(price_data, frequency):
+    '''
+        Purpose: Hashes a price panel (tickers, dates and prices) together with the return frequency.
+
+        Params: A pandas dataframe of prices (or its ReturnPanels) and the 'frequency' ('daily', 'monthly' or 'quarterly').
+
+        Returns: A key identifying the universe.
+    '''
+    key = price_data.key if isinstance(price_data, ReturnPanels) else price_key(price_data)
+    return f"{frequency}:{key}"
+
+
+class UniverseStatistics:
+    '''
+        Purpose: The return matrix, annualized mean vector 'mu' and covariance matrix 'VarCov' of a whole ticker universe.
+                 Statistics for any subset of tickers are served by index slicing instead of being recomputed.
+
+        Params: A pandas dataframe of universe returns 'rets' and the 'timing' used to annualize them.
+    '''
+
+    def __init__(self, rets, timing):
+        self.rets = rets
+        self.timing = timing
+        with stage('covariance', estimator = 'sample', tickers = rets.shape[1]):
+            #
+            # returns of a float32 PricePanel keep their dtype; the statistics are always float64
+            #
+            self.mu = rets.mean().astype(float) * timing
+            self.VarCov = rets.cov() * timing
+        self.tickers = list(rets.columns)
+        self._positions = {ticker: position for position, ticker in enumerate(self.tickers)}
+        self._mu = self.mu.values
+        self._VarCov = self.VarCov.values
+
+    def positions(self, tickers):
+        return np.array([self._positions[ticker] for ticker in tickers], dtype = int)
+
+    def subset(self, tickers):
+        '''
+            Purpose: Statistics of a subset of the universe. pandas computes the covariance over pairwise complete
+                     observations, so the sliced matrix equals the covariance of the subset computed on its own.
+
+            Params: A list of stock symbols contained in the universe.
+
+            Returns: A tuple of 'mu' (pandas series) and 'VarCov' (pandas dataframe) for those tickers.
+        '''
+        tickers = list(tickers)
+        index = self.positions(tickers)
+        mu = pd.Series(self._mu[index], index = tickers)
+        VarCov = pd.DataFrame(self._VarCov[np.ix_(index, index)], index = tickers, columns = tickers)
+        return mu, VarCov
+
+
+class StatisticsCache:
+    '''
+        Purpose: A least-recently-used cache of UniverseStatistics keyed by universe hash and frequency,
+                 so the returns and covariance of a universe are computed once per (frequency, window).
+
+        Params: The maximum number of universes to keep ('maxsize').
+    '''
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, price_data, frequency='daily'):
+        '''
+            Purpose: Returns the statistics of a price panel at the requested frequency, computing them on a miss.
+
+            Params: A pandas dataframe of prices, or the ReturnPanels of a price load (hashed only once and with
+                    its returns already computed), and the 'frequency' ('daily', 'monthly' or 'quarterly').
+
+            Returns: A UniverseStatistics instance.
+        '''
+        key = universe_key(price_data, frequency)
+
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        panels = price_data if isinstance(price_data, ReturnPanels) else ReturnPanels(price_data, [frequency])
+        statistics = UniverseStatistics(panels.returns(frequency), panels.timing(frequency))
+        self._entries[key] = statistics
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last = False)
+
+        return statistics
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+#
+# the cache shared by batch runs within one process
+#
+default_statistics_cache = StatisticsCache()
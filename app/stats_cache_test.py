@@ -0,0 +1,41 @@
+# import some code we want to test
+
+import numpy as np
+import pandas as pd
+
+from app.stats_cache import StatisticsCache
+
+def sample_prices():
+    dates = pd.bdate_range("2016-01-01", periods = 300)
+    rng = np.random.default_rng(3)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, size = (300, 4)), axis = 0)),
+                          index = dates, columns = ['AAPL', 'FB', 'MSFT', 'NFLX'])
+    #
+    # a ticker with a shorter history
+    #
+    prices.iloc[:40, 1] = np.nan
+    return prices
+
+def test_subset_matches_direct_computation():
+    prices = sample_prices()
+    statistics = StatisticsCache().get(prices, 'monthly')
+
+    mu, VarCov = statistics.subset(['NFLX', 'FB'])
+    direct = np.log(prices.resample('ME', label = 'right').last())[['NFLX', 'FB']].diff()
+
+    assert np.allclose(mu.values, direct.mean().values * 12)
+    assert np.allclose(VarCov.values, direct.cov().values * 12)
+    assert list(VarCov.columns) == ['NFLX', 'FB']
+
+def test_lru_eviction_and_hits():
+    prices = sample_prices()
+    cache = StatisticsCache(maxsize = 2)
+
+    daily = cache.get(prices, 'daily')
+    assert cache.get(prices, 'daily') is daily
+    cache.get(prices, 'monthly')
+    cache.get(prices, 'quarterly')
+
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert cache.get(prices, 'daily') is not daily